@@ -0,0 +1,155 @@
+"""
+✂️ REPLAY DE RÁFAGAS SOBRE TRÁFICO REAL (SIN RED NI GEMINI)
+
+¿Cuántas llamadas a Gemini ahorra BURST_COALESCING_ENABLED en NUESTRO
+grupo? Este script reproduce un historial real de mensajes con las mismas
+reglas que BurstCoalescer (src/bot/services/burst_coalescer.py) y reporta,
+para cada ventana:
+
+- 📉 análisis (llamadas) vs mensajes y el % de reducción
+- ⏱️ espera añadida por mensaje (media, p95 y máxima) hasta cerrar la ráfaga
+- 📦 tamaño medio y máximo de las ráfagas
+
+FUENTES DEL HISTORIAL:
+- moderation.log: las líneas "🧾 Decisión: {...}" (timestamp del log +
+  user_id; sin chat, así que la llave es solo el usuario)
+- JSONL propio: una línea {"ts": segundos, "chat_id": ..., "user_id": ..., "text": ...}
+
+Uso (desde la raíz del repo):
+    uv run python -m benchmarks.burst_replay --log moderation.log
+    uv run python -m benchmarks.burst_replay --trace chat.jsonl --windows 500 1000 1500 3000 --max-wait 4000
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+from src.bot.moderator.classifier import DECISION_LOG_MARKER
+
+from .e2e import _percentiles
+
+LOG_TIME_FORMAT = "%Y-%m-%d %H:%M:%S,%f"  # %(asctime)s de logging
+
+Event = Tuple[float, Hashable]  # (segundos, llave)
+
+
+def read_moderation_log(path: str) -> Iterator[Event]:
+    """Eventos (momento, user_id) de las decisiones registradas en moderation.log"""
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            idx = line.find(DECISION_LOG_MARKER)
+            if idx == -1:
+                continue
+            try:
+                ts = datetime.strptime(line[:23], LOG_TIME_FORMAT).timestamp()
+                record = json.loads(line[idx + len(DECISION_LOG_MARKER):])
+            except ValueError:
+                continue
+            if record.get("user_id") is not None:
+                yield ts, record["user_id"]
+
+
+def read_trace(path: str) -> Iterator[Event]:
+    """Eventos (ts, (chat_id, user_id)) de un JSONL propio"""
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                yield float(record["ts"]), (record.get("chat_id"), record["user_id"])
+
+
+def simulate(events: List[Event], window: float, max_wait: float, max_messages: int) -> Dict[str, Any]:
+    """
+    Aplica las reglas de BurstCoalescer a eventos ordenados por tiempo:
+    la ráfaga se cierra tras `window` sin mensajes, a `max_wait` de su primer
+    mensaje o al juntar `max_messages`.
+    """
+    max_wait = max(max_wait, window)
+    open_bursts: Dict[Hashable, List[float]] = {}  # llave → llegadas de la ráfaga abierta
+    sizes: List[int] = []
+    waits: List[float] = []
+
+    def close(arrivals: List[float], at: float) -> None:
+        sizes.append(len(arrivals))
+        waits.extend(at - arrival for arrival in arrivals)
+
+    def deadline(arrivals: List[float]) -> float:
+        return min(arrivals[-1] + window, arrivals[0] + max_wait)
+
+    for ts, key in events:
+        arrivals = open_bursts.get(key)
+        if arrivals is not None and ts >= deadline(arrivals):
+            close(arrivals, deadline(arrivals))
+            arrivals = None
+        if arrivals is None:
+            arrivals = open_bursts[key] = []
+        arrivals.append(ts)
+        if len(arrivals) >= max_messages:
+            close(arrivals, ts)
+            del open_bursts[key]
+
+    for arrivals in open_bursts.values():
+        close(arrivals, deadline(arrivals))
+
+    messages = sum(sizes)
+    return {
+        "messages": messages,
+        "analyses": len(sizes),
+        "reduction_pct": round(100 * (1 - len(sizes) / messages), 1) if messages else 0.0,
+        "avg_burst": round(messages / len(sizes), 2) if sizes else 0.0,
+        "largest_burst": max(sizes, default=0),
+        "added_wait_ms": _percentiles(waits),
+        "max_added_wait_ms": round(max(waits, default=0.0) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="✂️ Reducción de llamadas por ráfagas sobre un historial real")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help="moderation.log (líneas de decisión)")
+    source.add_argument("--trace", help="JSONL con ts, chat_id, user_id, text")
+    parser.add_argument("--windows", type=int, nargs="+", default=[500, 1000, 1500, 3000], help="Ventanas en ms")
+    parser.add_argument("--max-wait", type=int, default=4000, help="Espera máxima por ráfaga en ms")
+    parser.add_argument("--max-messages", type=int, default=8)
+    parser.add_argument("--out", help="Archivo JSON de resultados (por defecto stdout)")
+    args = parser.parse_args()
+
+    events = sorted(read_moderation_log(args.log) if args.log else read_trace(args.trace), key=lambda e: e[0])
+    if not events:
+        sys.exit("❌ El historial no tiene mensajes")
+
+    per_key = defaultdict(int)
+    for _, key in events:
+        per_key[key] += 1
+    results = {
+        "source": args.log or args.trace,
+        "messages": len(events),
+        "keys": len(per_key),
+        "span_hours": round((events[-1][0] - events[0][0]) / 3600, 2),
+        "max_wait_ms": args.max_wait,
+        "max_messages": args.max_messages,
+        "windows": {
+            str(window): simulate(events, window / 1000, args.max_wait / 1000, args.max_messages)
+            for window in args.windows
+        },
+    }
+
+    for window, summary in results["windows"].items():
+        print(
+            f"   ventana {window:>5} ms: {summary['analyses']}/{summary['messages']} análisis "
+            f"(-{summary['reduction_pct']}%), espera p95 {summary['added_wait_ms']['p95']}ms",
+            file=sys.stderr,
+        )
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+🏁 BENCHMARK DE PUNTA A PUNTA DEL PIPELINE DE MODERACIÓN
+
+El README promete "~1 segundo promedio por mensaje", pero no había cómo
+medirlo. Este benchmark ejecuta TelegramBot._handle_message con Updates
+sintéticos (objetos reales de python-telegram-bot), un bot de Telegram
+simulado y un Gemini simulado (benchmarks/fake_gemini.py en proceso o por
+HTTP), y reporta en JSON:
+
+- 🚀 throughput (mensajes/s)
+- ⏱️ latencia p50/p95/p99 (desde que llega el mensaje, incluye la cola)
+- 🔬 desglose por etapa: análisis vs acciones de Telegram, y por fuente del
+  veredicto (rules, classifier, cache, llm, fallback...)
+- 🧠 pico de memoria (RSS) del proceso
+
+Los updates pasan por el mismo ChatOrderedUpdateProcessor que usa el bot
+(--concurrency updates a la vez, en orden por chat y usuario); con
+--chats N el tráfico se reparte entre N grupos para medir la ganancia.
+
+ESCENARIOS (mezclas de tráfico):
+- baseline: charla normal, ~95% se aprueba
+- raid:     ataque de spam (mucho repetido, muchos usuarios)
+- code:     pegado de código largo
+- flood:    unos pocos usuarios mandan la mayoría de los mensajes
+- chatty:   charla normal escrita en ráfagas (una idea en varios mensajes)
+
+Cada escenario corre en un proceso nuevo (la memoria y la configuración no
+se mezclan) dentro de un directorio temporal (moderation.log no se ensucia).
+
+Uso (desde la raíz del repo):
+    uv run python -m benchmarks.e2e --out results.json
+    uv run python -m benchmarks.e2e --scenarios raid --rate 50 --concurrency 8 --chats 20
+    uv run python -m benchmarks.e2e --set AI_TWO_STAGE_ENABLED=true --baseline results.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("baseline", "raid", "code", "flood", "chatty")
+
+# Veredictos del Gemini simulado (regex sobre el mensaje)
+FAKE_RULES = [
+    {"pattern": r"\b(?:cursos?|descuento|promo|oferta|s[ií]gueme)\b", "action": "DELETE",
+     "reason": "Spam comercial", "confidence": 0.93},
+    {"pattern": r"\b(?:idiota|tonto|in[uú]til)\b", "action": "WARN",
+     "reason": "Lenguaje ofensivo", "confidence": 0.88},
+]
+
+# Métricas que se comparan contra --baseline (True = más alto es mejor)
+REGRESSION_METRICS = {"throughput": True, "latency_p50": False, "latency_p95": False, "latency_p99": False}
+
+
+# =============================================================================
+# 📨 GENERADORES DE TRÁFICO
+# =============================================================================
+
+_GREETINGS = ["hola", "gracias", "jajaja", "buenos días", "👍", "ok", "muchas gracias", "+1", "xD"]
+_VERBS = ["instalo", "configuro", "despliego", "pruebo", "depuro", "optimizo", "empaqueto"]
+_THINGS = ["Django", "FastAPI", "pandas", "un venv", "poetry", "pytest", "asyncio", "Celery", "SQLAlchemy"]
+_PLACES = ["Windows", "Docker", "Ubuntu", "un Raspberry Pi", "AWS Lambda", "macOS", "Heroku"]
+_SPAM = [
+    "🚀 Gana $500 diarios con trading de bitcoin, escríbeme al privado",
+    "Únete a nuestro grupo VIP t.me/+AbCdEf{n} señales gratis",
+    "Cursos de Python a 99 pesos con descuento, solo hoy {n}",
+    "Oferta exclusiva: sígueme y gana premios {n}",
+    "Inversión mínima 100 USDT, ganancias garantizadas {n}",
+]
+_CODE_LINES = [
+    "def procesar(datos: list[dict]) -> dict:",
+    "    resultado = {}",
+    "    for fila in datos:",
+    "        clave = fila.get('id')",
+    "        if clave is None:",
+    "            continue",
+    "        resultado[clave] = sum(v for v in fila.values() if isinstance(v, (int, float)))",
+    "    return resultado",
+    "",
+    "class Repositorio:",
+    "    def __init__(self, conexion):",
+    "        self.conexion = conexion",
+    "    async def buscar(self, consulta: str):",
+    "        async with self.conexion.cursor() as cur:",
+    "            await cur.execute(consulta)",
+    "            return await cur.fetchall()",
+]
+
+
+def _question(rng: random.Random) -> str:
+    return f"¿Alguien sabe cómo {rng.choice(_VERBS)} {rng.choice(_THINGS)} en {rng.choice(_PLACES)}?"
+
+
+def _spam(rng: random.Random) -> str:
+    return rng.choice(_SPAM).format(n=rng.randint(1, 20))  # Pocas variantes: se repiten como en un raid
+
+
+def _code_paste(rng: random.Random) -> str:
+    lines = [rng.choice(_CODE_LINES) for _ in range(rng.randint(60, 200))]
+    return "Me sale un error con este código, ¿qué hago mal?\n\n" + "\n".join(lines)
+
+
+def generate_messages(scenario: str, count: int, seed: int, chats: int = 1) -> List[Dict[str, Any]]:
+    """Lista de {user_id, chat_id, text} según la mezcla del escenario"""
+    rng = random.Random(seed)
+    chat_rng = random.Random(seed + 2)  # Aparte: el texto no cambia con --chats
+    messages = []
+    for _ in range(count):
+        roll = rng.random()
+        if scenario == "baseline":
+            text = rng.choice(_GREETINGS) if roll < 0.45 else _question(rng) if roll < 0.95 else _spam(rng)
+            user_id = rng.randint(1, 300)
+        elif scenario == "raid":
+            text = _spam(rng) if roll < 0.8 else _question(rng)
+            user_id = rng.randint(1000, 1000 + count)  # Cuentas nuevas
+        elif scenario == "code":
+            text = _code_paste(rng) if roll < 0.6 else _question(rng)
+            user_id = rng.randint(1, 300)
+        elif scenario == "chatty":
+            text = rng.choice(_GREETINGS) if roll < 0.5 else _question(rng) if roll < 0.97 else _spam(rng)
+            # 60%: el mismo usuario sigue escribiendo (en el mismo chat)
+            if messages and rng.random() < 0.6:
+                messages.append({**messages[-1], "text": text})
+                continue
+            user_id = rng.randint(1, 300)
+        elif scenario == "flood":
+            text = rng.choice(_GREETINGS) if roll < 0.5 else _question(rng) if roll < 0.9 else _spam(rng)
+            user_id = rng.randint(2000, 2004) if roll < 0.7 else rng.randint(1, 300)  # 5 flooders
+        else:
+            raise ValueError(f"Escenario desconocido: {scenario}")
+        chat_id = -1001234567890 - chat_rng.randrange(chats)
+        messages.append({"user_id": user_id, "chat_id": chat_id, "text": text})
+    return messages
+
+
+# =============================================================================
+# 🤖 TELEGRAM SIMULADO
+# =============================================================================
+
+class MockBot:
+    """
+    Bot de Telegram simulado: cualquier método de la API (delete_message,
+    send_message, ban_chat_member...) es una corutina que espera `latency`
+    segundos y cuenta la llamada.
+
+    Una fracción `unreachable` de los usuarios nunca inició el bot: el
+    send_message privado a ellos falla con Forbidden, como en Telegram.
+    Los usuarios 1..`admins` son administradores de todos los grupos.
+    """
+
+    def __init__(self, latency: float, unreachable: float = 0.0, admins: int = 0):
+        self.latency = latency
+        self.unreachable = unreachable
+        self.admins = admins
+        self.calls: Counter = Counter()
+        self.time_total = 0.0
+        self._message_ids = itertools.count(1_000_000)
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        async def api_call(*args: Any, **kwargs: Any) -> Any:
+            self.calls[method] += 1
+            started = time.perf_counter()
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self.time_total += time.perf_counter() - started
+            if method == "send_message":
+                chat_id = kwargs["chat_id"]
+                if chat_id > 0 and zlib.crc32(str(chat_id).encode()) % 1000 < self.unreachable * 1000:
+                    from telegram.error import Forbidden
+
+                    self.calls["send_message_forbidden"] += 1
+                    raise Forbidden("Forbidden: bot can't initiate conversation with a user")
+                return SimpleNamespace(message_id=next(self._message_ids))
+            if method == "get_chat_administrators":
+                return [SimpleNamespace(user=SimpleNamespace(id=user_id)) for user_id in range(1, self.admins + 1)]
+            return True
+
+        return api_call
+
+
+def build_update(bot: MockBot, update_id: int, item: Dict[str, Any]) -> Any:
+    from telegram import Chat, Message, Update, User
+
+    user = User(id=item["user_id"], first_name=f"usuario{item['user_id']}", is_bot=False)
+    chat = Chat(id=item["chat_id"], type=Chat.SUPERGROUP, title="Python CDMX")
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(timezone.utc),
+        chat=chat,
+        from_user=user,
+        text=item["text"],
+    )
+    message.set_bot(bot)
+    update = Update(update_id=update_id, message=message)
+    update.set_bot(bot)
+    return update
+
+
+# =============================================================================
+# 🏃 EJECUCIÓN DE UN ESCENARIO (proceso hijo)
+# =============================================================================
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "mean": round(statistics.fmean(ordered) * 1000, 2)}
+
+
+async def run_scenario(args: argparse.Namespace) -> Dict[str, Any]:
+    """Corre UN escenario en este proceso y devuelve sus métricas"""
+
+    from benchmarks.fake_gemini import FakeGemini, FakeGeminiServer
+    from src.bot.moderator.ai_analyzer import moderator
+    from src.bot.moderator.backends import LLMBackend, LLMResponse
+    from src.bot.services.telegram_client import TelegramBot
+    from src.bot.services.update_processor import ChatOrderedUpdateProcessor
+
+    fake = FakeGemini(args.llm_latency, args.llm_error_rate, rules=FAKE_RULES, seed=args.seed)
+    server: Optional[FakeGeminiServer] = None
+
+    if args.http:
+        # 🌐 Backend real (settings.ai_backend) contra el servidor HTTP falso
+        server = FakeGeminiServer(fake)
+        await server.start()
+        moderator.settings.gemini_base_url = server.base_url
+    else:
+        # ⚡ Mismo Gemini falso, en proceso (sin HTTP)
+        class InProcessGemini(LLMBackend):
+            name = "fake_gemini"
+
+            async def ainvoke(self, messages):
+                latency, fails = fake.next_outcome()
+                fake.latency_total += latency
+                await asyncio.sleep(latency)
+                if fails:
+                    fake.requests["errors"] += 1
+                    raise RuntimeError("503 Simulated failure")
+                fake.requests["generate"] += 1
+                user = "\n\n".join(text for role, text in messages if role != "system")
+                text = fake.answer(user)
+                chars = sum(len(t) for _, t in messages)
+                usage = {"input_tokens": chars // 4, "output_tokens": len(text) // 4,
+                         "total_tokens": chars // 4 + len(text) // 4}
+                return LLMResponse(text, usage)
+
+        settings = moderator.settings
+        backend = InProcessGemini()
+        for model, tokens in (
+            (settings.ai_model, settings.ai_max_tokens),
+            (settings.ai_model, settings.ai_classify_max_tokens),
+            (settings.ai_cascade_fast_model, settings.ai_max_tokens),
+        ):
+            moderator.models.register(model, tokens, backend)
+
+    await moderator.initialize()
+
+    # 🔬 Fuente y tiempo de análisis de cada mensaje (vía el log de decisiones)
+    current: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("bench_message")
+    original_log_decision = moderator._log_decision
+
+    def traced_log_decision(result, source, user_id=None):
+        record = current.get(None)
+        if record is not None and "source" not in record:
+            record["source"] = source
+            record["analysis"] = result.processing_time
+            record["action"] = result.action.value
+        original_log_decision(result, source, user_id)
+
+    moderator._log_decision = traced_log_decision
+
+    bot = MockBot(args.telegram_latency / 1000, args.dm_unreachable, args.chat_admins)
+    context = SimpleNamespace(bot=bot)
+    telegram_bot = TelegramBot()
+
+    items = generate_messages(args.scenario, args.messages, args.seed, args.chats)
+    rng = random.Random(args.seed + 1)
+    records: List[Dict[str, Any]] = []
+    order_violations = 0
+    last_started: Dict[Any, int] = {}
+
+    # 🔀 Mismo procesador que TelegramBot (con 1 también: orden de llegada)
+    processor = ChatOrderedUpdateProcessor(args.concurrency)
+    await processor.initialize()
+
+    async def handle(update: Any, arrived: float) -> None:
+        nonlocal order_violations
+        for key in (("chat", update.effective_chat.id), ("user", update.effective_user.id)):
+            if last_started.get(key, 0) > update.update_id:
+                order_violations += 1
+            last_started[key] = update.update_id
+        record: Dict[str, Any] = {}
+        token = current.set(record)
+        started = time.perf_counter()
+        try:
+            await telegram_bot._handle_message(update, context)
+        finally:
+            current.reset(token)
+        finished = time.perf_counter()
+        record.update(latency=finished - arrived, service=finished - started, queued=started - arrived)
+        records.append(record)
+
+    tasks: List[asyncio.Task] = []
+    wall_start = time.perf_counter()
+    # Llegadas de Poisson a `rate` mensajes/s (carga abierta)
+    for update_id, item in enumerate(items, start=1):
+        update = build_update(bot, update_id, item)
+        tasks.append(asyncio.create_task(
+            processor.process_update(update, handle(update, time.perf_counter()))
+        ))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - wall_start
+    # ✂️📤 Ráfagas abiertas y acciones encoladas: esperar a que lleguen al bot simulado
+    if telegram_bot.bursts is not None:
+        await telegram_bot.bursts.drain()
+    await telegram_bot.actions.drain()
+
+    # Dejar terminar tareas de fondo (razones en dos etapas, streams)
+    await asyncio.sleep(0.05)
+    if server is not None:
+        await server.stop()
+
+    by_source: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        by_source[record.get("source", "none")].append(record)
+
+    latencies = [r["latency"] for r in records]
+    return {
+        "scenario": args.scenario,
+        "messages": len(records),
+        "wall_seconds": round(wall, 3),
+        "throughput": round(len(records) / wall, 2) if wall else 0.0,
+        **{f"latency_{k}": v for k, v in _percentiles(latencies).items()},
+        "stages": {
+            "queue_ms": _percentiles([r["queued"] for r in records]),
+            "analysis_ms": _percentiles([r["analysis"] for r in records if "analysis" in r]),
+            "actions_ms": _percentiles([
+                r["service"] - r["analysis"] for r in records if "analysis" in r
+            ]),
+        },
+        "by_source": {
+            source: {"count": len(group), **_percentiles([r["service"] for r in group])}
+            for source, group in sorted(by_source.items())
+        },
+        "actions": dict(Counter(r.get("action", "none") for r in records)),
+        "updates": {**processor.get_stats(), "order_violations": order_violations},
+        "telegram_calls": dict(bot.calls),
+        "telegram_actions": telegram_bot.actions.get_stats(),
+        "warnings": telegram_bot.notifier.get_stats(),
+        "admins": telegram_bot.admins.get_stats(),
+        "reputation": telegram_bot.reputation.get_stats() if telegram_bot.reputation else None,
+        "flood": telegram_bot.flood.get_stats() if telegram_bot.flood else None,
+        "bursts": telegram_bot.bursts.get_stats() if telegram_bot.bursts else None,
+        "fake_gemini": fake.get_stats(),
+        "moderator": moderator.get_stats(),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+# =============================================================================
+# 🧭 ORQUESTACIÓN (proceso padre)
+# =============================================================================
+
+def _child_env(args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("TELEGRAM_BOT_TOKEN", "123456:benchmark")
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    env.setdefault("AI_BACKEND", "fake" if not args.http else "genai")
+    env["LOG_LEVEL"] = args.log_level
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    for assignment in args.set or []:
+        key, _, value = assignment.partition("=")
+        env[key.strip().upper()] = value
+    return env
+
+
+def run_child(args: argparse.Namespace, scenario: str) -> Dict[str, Any]:
+    """Lanza el escenario en un proceso nuevo dentro de un directorio temporal"""
+    forwarded = [
+        "--messages", str(args.messages), "--rate", str(args.rate), "--concurrency", str(args.concurrency),
+        "--chats", str(args.chats),
+        "--llm-latency", args.llm_latency, "--llm-error-rate", str(args.llm_error_rate),
+        "--telegram-latency", str(args.telegram_latency), "--seed", str(args.seed),
+        "--dm-unreachable", str(args.dm_unreachable), "--chat-admins", str(args.chat_admins),
+    ] + (["--http"] if args.http else [])
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.e2e", "--child", scenario, *forwarded],
+            cwd=workdir, env=_child_env(args), capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"El escenario {scenario} falló:\n{proc.stderr[-3000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_revision() -> Optional[str]:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Lista de regresiones (métrica peor que la línea base más allá de la tolerancia)"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name}.{metric}: {old} → {new} ({change:+.1%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="🏁 Benchmark de punta a punta de _handle_message")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--messages", type=int, default=200, help="Mensajes por escenario")
+    parser.add_argument("--rate", type=float, default=5.0, help="Mensajes por segundo que llegan")
+    parser.add_argument("--concurrency", type=int, default=1, help="Updates procesados a la vez (1 = como PTB por defecto)")
+    parser.add_argument("--chats", type=int, default=1, help="Grupos entre los que se reparte el tráfico")
+    parser.add_argument("--llm-latency", default="lognormal:400,0.5", help="Latencia del Gemini falso")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=30.0, help="ms por llamada a la API de Telegram")
+    parser.add_argument("--dm-unreachable", type=float, default=0.8,
+                        help="Fracción de usuarios que nunca iniciaron el bot (privado → Forbidden)")
+    parser.add_argument("--chat-admins", type=int, default=3, help="Administradores por grupo (usuarios 1..N)")
+    parser.add_argument("--http", action="store_true", help="Pasar por HTTP (servidor falso + AI_BACKEND real)")
+    parser.add_argument("--set", action="append", metavar="CLAVE=VALOR", help="Sobrescribe un setting (env var)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--out", help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Empeoramiento tolerado (0.10 = 10%%)")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        args.scenario = args.child
+        print(json.dumps(asyncio.run(run_scenario(args)), ensure_ascii=False, default=str))
+        return
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_revision(),
+            "python": sys.version.split()[0],
+            "args": {k: v for k, v in vars(args).items() if k not in ("child", "out", "baseline")},
+        },
+        "scenarios": {},
+    }
+    for scenario in args.scenarios:
+        print(f"🏁 {scenario}...", file=sys.stderr)
+        summary = run_child(args, scenario)
+        results["scenarios"][scenario] = summary
+        print(
+            f"   {summary['throughput']} msg/s  p50 {summary['latency_p50']}ms  "
+            f"p95 {summary['latency_p95']}ms  p99 {summary['latency_p99']}ms  RSS {summary['peak_rss_mb']}MB",
+            file=sys.stderr,
+        )
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"📉 Regresión: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+🧪 SERVIDOR FALSO DE GEMINI (HTTP LOCAL)
+
+Imita los endpoints REST de Gemini que usa el bot para hacer pruebas de
+carga sin gastar cuota:
+
+- POST /v1beta/models/{modelo}:generateContent
+- POST /v1beta/models/{modelo}:streamGenerateContent?alt=sse
+- GET  /stats  (peticiones atendidas, errores, latencias simuladas)
+
+Todo es DETERMINISTA con --seed: la misma corrida produce las mismas
+latencias, los mismos errores y los mismos veredictos.
+
+- ⏱️ Latencia: fixed:200 | uniform:100,400 | lognormal:250,0.6 (mediana ms, sigma)
+- 💥 Errores: --error-rate 0.02 responde --error-status (503 por defecto)
+- 📜 Veredictos: --script reglas.json con [{"pattern": "regex", "action": "DELETE",
+  "reason": "...", "confidence": 0.9}, ...]; sin coincidencia → APPROVE
+
+El servidor entiende los prompts del moderador: responde JSON, lote JSON,
+"ACCION CONFIANZA" (clasificación compacta) o una frase (razón) según lo pedido.
+
+Uso (desde la raíz del repo):
+    uv run python -m benchmarks.fake_gemini --port 8089 --latency lognormal:300,0.5 --seed 42
+    GEMINI_BASE_URL=http://127.0.0.1:8089 AI_BACKEND=genai uv run python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_VERDICT = {"action": "APPROVE", "reason": "Conversación normal de la comunidad", "confidence": 0.97}
+
+# Marcas de los prompts del moderador (ver ContentModerator._setup_moderation_prompt)
+_BATCH_MARK = "array JSON"
+_CLASSIFY_MARK = "Ejemplo: APPROVE 0.97"
+_REASON_MARK = "Explica en UNA frase"
+_BATCH_ITEM_RE = re.compile(r"^\[(\d+)\]\n", re.MULTILINE)
+
+
+class LatencyModel:
+    """⏱️ Distribución de latencia simulada (en segundos)"""
+
+    def __init__(self, spec: str, rng: random.Random):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self._rng = rng
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Latencia desconocida: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0] / 1000
+        if self.kind == "uniform":
+            low, high = self.params
+            return self._rng.uniform(low, high) / 1000
+        median, sigma = self.params
+        return self._rng.lognormvariate(0.0, sigma) * median / 1000
+
+
+class FakeGemini:
+    """
+    🧪 LÓGICA DEL SERVIDOR FALSO (sin red, para poder usarla desde benchmarks)
+    """
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        rules: Optional[List[Dict[str, Any]]] = None,
+        seed: int = 0,
+        stream_chunks: int = 4,
+    ):
+        self._rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self._rng)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_chunks = stream_chunks
+        self.rules: List[Tuple[re.Pattern, Dict[str, Any]]] = [
+            (re.compile(rule["pattern"], re.IGNORECASE), {**DEFAULT_VERDICT, **rule})
+            for rule in (rules or [])
+        ]
+
+        # 📊 Métricas
+        self.requests: Counter = Counter()
+        self.latency_total = 0.0
+
+    def verdict_for(self, text: str) -> Dict[str, Any]:
+        for pattern, rule in self.rules:
+            if pattern.search(text):
+                return {k: rule[k] for k in ("action", "reason", "confidence")}
+        return dict(DEFAULT_VERDICT)
+
+    def answer(self, prompt: str) -> str:
+        """Texto que respondería Gemini al prompt del moderador"""
+        if _BATCH_MARK in prompt:
+            parts = _BATCH_ITEM_RE.split(prompt)
+            items = [
+                {"index": int(parts[i]), **self.verdict_for(parts[i + 1])}
+                for i in range(1, len(parts) - 1, 2)
+            ]
+            return json.dumps(items, ensure_ascii=False)
+
+        verdict = self.verdict_for(prompt.split("\n\n", 1)[-1])
+        if _CLASSIFY_MARK in prompt:
+            return f"{verdict['action']} {verdict['confidence']}"
+        if _REASON_MARK in prompt:
+            return verdict["reason"]
+        return json.dumps(verdict, ensure_ascii=False)
+
+    def next_outcome(self) -> Tuple[float, bool]:
+        """(latencia, ¿falla?) de la siguiente petición"""
+        return self.latency.sample(), self._rng.random() < self.error_rate
+
+    @staticmethod
+    def prompt_text(body: Dict[str, Any]) -> Tuple[str, str]:
+        """(sistema, usuario) del cuerpo de una petición generateContent"""
+        def texts(content: Optional[Dict[str, Any]]) -> str:
+            return "\n\n".join(p.get("text", "") for p in (content or {}).get("parts", []))
+
+        system = texts(body.get("systemInstruction") or body.get("system_instruction"))
+        user = "\n\n".join(texts(c) for c in body.get("contents", []))
+        return system, user
+
+    @staticmethod
+    def response_body(text: str, prompt_chars: int, final: bool = True) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+        body: Dict[str, Any] = {"candidates": [candidate]}
+        if final:
+            candidate["finishReason"] = "STOP"
+            prompt_tokens, output_tokens = prompt_chars // 4, max(1, len(text) // 4)
+            body["usageMetadata"] = {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            }
+        return body
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = sum(self.requests.values())
+        return {
+            **dict(self.requests),
+            "avg_latency": round(self.latency_total / total, 4) if total else 0.0,
+        }
+
+
+class FakeGeminiServer:
+    """
+    🌐 SERVIDOR HTTP/1.1 MÍNIMO SOBRE asyncio (sin dependencias)
+
+    Uso desde código:
+        server = FakeGeminiServer(FakeGemini(latency="lognormal:300,0.5", seed=1))
+        await server.start()          # server.base_url → http://127.0.0.1:<puerto>
+        ...
+        await server.stop()
+    """
+
+    def __init__(self, fake: FakeGemini, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()  # Conexiones keep-alive abiertas por los clientes
+            await self._server.wait_closed()
+            await asyncio.sleep(0)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:  # keep-alive: varias peticiones por conexión
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                keep_alive = await self._route(method, target, body, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter) -> bool:
+        path = urlsplit(target).path
+        if method == "GET" and path == "/stats":
+            self._send_json(writer, 200, self.fake.get_stats())
+            return True
+
+        streaming = path.endswith(":streamGenerateContent")
+        if method != "POST" or not (streaming or path.endswith(":generateContent")):
+            self._send_json(writer, 404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return True
+
+        latency, fails = self.fake.next_outcome()
+        self.fake.latency_total += latency
+        system, user = self.fake.prompt_text(json.loads(body or b"{}"))
+
+        if fails:
+            self.fake.requests["errors"] += 1
+            await asyncio.sleep(latency)
+            self._send_json(writer, self.fake.error_status, {
+                "error": {"code": self.fake.error_status, "message": "Simulated failure", "status": "UNAVAILABLE"}
+            })
+            return True
+
+        text = self.fake.answer(user)
+        prompt_chars = len(system) + len(user)
+
+        if not streaming:
+            self.fake.requests["generate"] += 1
+            await asyncio.sleep(latency)
+            self._send_json(writer, 200, self.fake.response_body(text, prompt_chars))
+            return True
+
+        # ⚡ Streaming SSE: la latencia se reparte entre los fragmentos
+        self.fake.requests["stream"] += 1
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n"
+        )
+        size = max(1, -(-len(text) // self.fake.stream_chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        for index, piece in enumerate(pieces):
+            await asyncio.sleep(latency / len(pieces))
+            event = self.fake.response_body(piece, prompt_chars, final=index == len(pieces) - 1)
+            writer.write(b"data: " + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\r\n\r\n")
+            await writer.drain()
+        return False
+
+    @staticmethod
+    def _send_json(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json; charset=UTF-8\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+        )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    rules = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            rules = json.load(f)
+
+    server = FakeGeminiServer(
+        FakeGemini(args.latency, args.error_rate, args.error_status, rules, args.seed),
+        args.host,
+        args.port,
+    )
+    await server.start()
+    print(f"🧪 Gemini falso escuchando en {server.base_url} (latencia {args.latency}, errores {args.error_rate:.1%})")
+    await asyncio.Event().wait()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="🧪 Servidor falso de Gemini para pruebas de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="lognormal:300,0.5", help="fixed:MS | uniform:MIN,MAX | lognormal:MEDIANA,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones que fallan")
+    parser.add_argument("--error-status", type=int, default=503, help="Código HTTP de las fallas (503, 429...)")
+    parser.add_argument("--script", help="JSON con reglas de veredictos por regex")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla para resultados repetibles")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
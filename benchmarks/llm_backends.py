@@ -0,0 +1,146 @@
+"""
+⏱️ MICROBENCHMARK DE BACKENDS DE LLM
+
+Compara, SIN red, lo que cuesta cada backend por encima de Gemini:
+
+1. 📦 Tiempo de import (proceso nuevo por repetición)
+2. 🔁 Overhead por llamada con un transporte de latencia cero:
+   - langchain_chain: `ChatPromptTemplate | llm` armado en cada llamada (camino anterior)
+   - langchain:       LangChainBackend (mensajes directos, sin Runnables)
+   - genai:           GenAIBackend con el SDK real y un transporte HTTP simulado
+   - fake:            FakeBackend en proceso
+
+Uso (desde la raíz del repo):
+    uv run python -m benchmarks.llm_backends
+    uv run python -m benchmarks.llm_backends --calls 2000 --json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.bot.moderator.backends import FakeBackend, GenAIBackend, LangChainBackend, render_prompt
+
+SYSTEM_PROMPT = "Eres un moderador experto. Responde SOLO con un JSON válido: {{\"action\": \"APPROVE\"}}"
+TEMPLATE = [("system", SYSTEM_PROMPT), ("human", "Analiza este mensaje:\n\n{message}")]
+RESPONSE = '{"action": "APPROVE", "reason": "Pregunta técnica", "confidence": 0.97}'
+
+IMPORTS = {
+    "langchain": "from langchain_google_genai import ChatGoogleGenerativeAI",
+    "genai": "from google import genai",
+    "fake": "from src.bot.moderator.backends import FakeBackend",
+}
+
+
+def measure_import(statement: str, repeat: int) -> Optional[float]:
+    """Mediana (ms) del tiempo de import en un intérprete nuevo"""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if proc.returncode != 0:
+            return None  # Paquete no instalado
+        samples.append(float(proc.stdout.strip()) * 1000)
+    return statistics.median(samples)
+
+
+def _genai_backend() -> Optional[GenAIBackend]:
+    """GenAIBackend real con un transporte httpx que responde al instante"""
+    try:
+        import httpx
+        from google import genai
+        from google.genai import types
+    except ImportError:
+        return None
+
+    body = {
+        "candidates": [{"content": {"parts": [{"text": RESPONSE}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 120, "candidatesTokenCount": 20, "totalTokenCount": 140},
+    }
+    client = genai.Client(
+        api_key="benchmark",
+        http_options=types.HttpOptions(
+            async_client_args={"transport": httpx.MockTransport(lambda request: httpx.Response(200, json=body))}
+        ),
+    )
+    return GenAIBackend("gemini-1.5-flash", "benchmark", 0.3, 1000, client=client)
+
+
+def build_callers() -> Dict[str, Callable[[str], Awaitable[Any]]]:
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.prompts import ChatPromptTemplate
+
+    chat_model = FakeListChatModel(responses=[RESPONSE])
+    langchain = LangChainBackend(chat_model)
+    fake = FakeBackend([RESPONSE])
+
+    async def langchain_chain(message: str) -> Any:
+        chain = ChatPromptTemplate.from_messages(TEMPLATE) | chat_model
+        return await chain.ainvoke({"message": message})
+
+    callers: Dict[str, Callable[[str], Awaitable[Any]]] = {
+        "langchain_chain": langchain_chain,
+        "langchain": lambda message: langchain.ainvoke(render_prompt(TEMPLATE, {"message": message})),
+        "fake": lambda message: fake.ainvoke(render_prompt(TEMPLATE, {"message": message})),
+    }
+    genai_backend = _genai_backend()
+    if genai_backend is not None:
+        callers["genai"] = lambda message: genai_backend.ainvoke(render_prompt(TEMPLATE, {"message": message}))
+    return callers
+
+
+async def measure_calls(call: Callable[[str], Awaitable[Any]], calls: int) -> Dict[str, float]:
+    """Latencia por llamada en microsegundos (p50, p99, media)"""
+    for i in range(min(50, calls)):  # Calentamiento
+        await call(f"mensaje de calentamiento {i}")
+
+    samples: List[float] = []
+    for i in range(calls):
+        started = time.perf_counter()
+        await call(f"¿Cómo instalo Django en Windows? intento {i}")
+        samples.append((time.perf_counter() - started) * 1e6)
+
+    samples.sort()
+    return {
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1),
+        "mean_us": round(statistics.fmean(samples), 1),
+    }
+
+
+async def run(calls: int, import_repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"calls": calls, "import_ms": {}, "per_call": {}}
+    for name, statement in IMPORTS.items():
+        results["import_ms"][name] = measure_import(statement, import_repeat)
+    for name, call in build_callers().items():
+        results["per_call"][name] = await measure_calls(call, calls)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="⏱️ Overhead de los backends de LLM (sin red)")
+    parser.add_argument("--calls", type=int, default=1000, help="Llamadas medidas por backend")
+    parser.add_argument("--import-repeat", type=int, default=5, help="Procesos por medición de import")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.calls, args.import_repeat))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("📦 Import (mediana, ms)")
+    for name, value in results["import_ms"].items():
+        print(f"  {name:<16} {'no instalado' if value is None else f'{value:8.1f}'}")
+    print(f"🔁 Overhead por llamada ({args.calls} llamadas, µs)")
+    for name, stats in results["per_call"].items():
+        print(f"  {name:<16} p50 {stats['p50_us']:8.1f}  p99 {stats['p99_us']:8.1f}  media {stats['mean_us']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+📡 POLLING vs WEBHOOK: LATENCIA DE INGESTA Y CPU CON UN TELEGRAM FALSO
+
+Levanta un Telegram falso local (Bot API mínima: getMe, getUpdates con long
+polling, setWebhook, sendMessage, deleteMessage...) que emite mensajes
+sintéticos a un ritmo de Poisson, y corre el bot REAL (TelegramBot con sus
+handlers, el procesador concurrente y el moderador con AI_BACKEND=fake)
+en cada modo de recepción:
+
+- polling: el bot pide los updates con getUpdates (long polling)
+- webhook: el Telegram falso hace POST de cada update al WebhookServer del
+  bot, con el secret token que el bot registró con setWebhook
+
+Reporta en JSON, por modo:
+
+- ⏱️ ingesta (emisión → inicio del handler) y decisión (emisión → fin del
+  handler), p50/p95/p99 en ms
+- 🔥 CPU del proceso del bot (total y por cada 1000 updates) y del Telegram falso
+
+Cada modo corre en procesos nuevos (bot y Telegram falso separados, así
+la CPU de uno no se mezcla con la del otro) dentro de un directorio temporal.
+
+Uso (desde la raíz del repo):
+    uv run python -m benchmarks.telegram_ingest --messages 500 --rate 50
+    uv run python -m benchmarks.telegram_ingest --modes webhook --chats 10 --out ingest.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.e2e import _percentiles, generate_messages
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("polling", "webhook")
+BOT_TOKEN = "123456:FAKE-telegram-token"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "ViperGuard", "username": "viperguard_bot",
+            "can_join_groups": True, "can_read_all_group_messages": True, "supports_inline_queries": False}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# =============================================================================
+# 📡 TELEGRAM FALSO (proceso "--serve")
+# =============================================================================
+
+class FakeTelegram:
+    """
+    📡 Bot API simulada + emisor de mensajes
+
+    El emisor arranca cuando el bot está listo para recibir: con el primer
+    getUpdates (polling) o con setWebhook (webhook).
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], rate: float, seed: int):
+        self.items = items
+        self.rate = rate
+        self._rng = random.Random(seed)
+        self.updates: List[Dict[str, Any]] = []
+        self.emitted: Dict[int, float] = {}
+        self.calls: Counter = Counter()
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        self.webhook_max_connections = 40
+        self.allowed_updates: Optional[List[str]] = None
+        self.ready = asyncio.Event()
+        self.finished = False
+        self._new_update = asyncio.Event()
+
+    def api(self, method: str, params: Dict[str, Any]) -> Any:
+        """Resultado de un método de la Bot API (getUpdates aparte: es async)"""
+        self.calls[method] += 1
+        if method == "getMe":
+            return BOT_USER
+        if method == "setWebhook":
+            self.webhook_url = params["url"]
+            self.webhook_secret = params.get("secret_token", "")
+            self.webhook_max_connections = int(params.get("max_connections", 40))
+            self.allowed_updates = params.get("allowed_updates")
+            self.ready.set()
+            return True
+        if method == "sendMessage":
+            return {"message_id": self.calls[method], "date": int(time.time()),
+                    "chat": {"id": int(params["chat_id"]), "type": "private"}, "text": params.get("text", "")}
+        if method == "getChatAdministrators":
+            return []  # Sin administradores: todos los mensajes se moderan
+        return True  # deleteMessage, banChatMember, restrictChatMember, deleteWebhook...
+
+    async def get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """⏳ Long polling: responde en cuanto hay updates o al vencer `timeout`"""
+        self.calls["getUpdates"] += 1
+        self.allowed_updates = params.get("allowed_updates")
+        self.ready.set()
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        deadline = time.monotonic() + float(params.get("timeout", 0) or 0)
+
+        self.updates = [u for u in self.updates if u["update_id"] >= offset]  # Confirmados
+        while not self.updates:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.updates[:limit]
+
+    def build_update(self, update_id: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": item["chat_id"], "type": "supergroup", "title": "Python CDMX"},
+                "from": {"id": item["user_id"], "is_bot": False, "first_name": f"usuario{item['user_id']}"},
+                "text": item["text"],
+            },
+        }
+
+    async def run_sender(self) -> None:
+        """📨 Emite los mensajes (Poisson a `rate`/s) por getUpdates o por POST al webhook"""
+        await self.ready.wait()
+        client = None
+        posts: List[asyncio.Task] = []
+        if self.webhook_url:
+            import httpx
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.webhook_max_connections), timeout=30.0
+            )
+
+        for update_id, item in enumerate(self.items, start=1):
+            update = self.build_update(update_id, item)
+            self.emitted[update_id] = time.time()
+            if client is not None:
+                posts.append(asyncio.create_task(client.post(
+                    self.webhook_url, json=update,
+                    headers={"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret},
+                )))
+            else:
+                self.updates.append(update)
+                self._new_update.set()
+            await asyncio.sleep(self._rng.expovariate(self.rate))
+
+        if client is not None:
+            responses = await asyncio.gather(*posts, return_exceptions=True)
+            self.calls["webhook_post"] = len(responses)
+            self.calls["webhook_errors"] = sum(
+                1 for r in responses if isinstance(r, Exception) or r.status_code != 200
+            )
+            await client.aclose()
+        self.finished = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "finished": self.finished,
+            "emitted": self.emitted,
+            "calls": dict(self.calls),
+            "allowed_updates": self.allowed_updates,
+            "cpu_seconds": round(_cpu_seconds(), 3),
+        }
+
+
+class FakeTelegramServer:
+    """🌐 HTTP/1.1 mínimo: POST /bot<token>/<método> y GET /stats"""
+
+    def __init__(self, fake: FakeTelegram, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                path = urlsplit(target).path
+                if method == "GET" and path == "/stats":
+                    payload: Any = self.fake.get_stats()
+                else:
+                    api_method = path.rsplit("/", 1)[-1]
+                    params = self._params(headers.get("content-type", ""), body)
+                    if api_method == "getUpdates":
+                        result = await self.fake.get_updates(params)
+                    else:
+                        result = self.fake.api(api_method, params)
+                    payload = {"ok": True, "result": result}
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def _params(content_type: str, body: bytes) -> Dict[str, Any]:
+        """Parámetros de la Bot API (python-telegram-bot los manda como formulario)"""
+        if not body:
+            return {}
+        if "json" in content_type:
+            return json.loads(body)
+        params: Dict[str, Any] = {}
+        for key, values in parse_qs(body.decode("utf-8")).items():
+            try:
+                params[key] = json.loads(values[0])
+            except ValueError:
+                params[key] = values[0]
+        return params
+
+
+async def serve(args: argparse.Namespace) -> None:
+    items = generate_messages(args.scenario, args.messages, args.seed, args.chats)
+    fake = FakeTelegram(items, args.rate, args.seed)
+    server = FakeTelegramServer(fake, port=args.port)
+    await server.start()
+    print("READY", flush=True)
+    await fake.run_sender()
+    await asyncio.Event().wait()  # El proceso del bot nos termina
+
+
+# =============================================================================
+# 🤖 BOT REAL (proceso "--child")
+# =============================================================================
+
+async def run_mode(args: argparse.Namespace, telegram_port: int) -> Dict[str, Any]:
+    import httpx
+
+    from src.bot.services.telegram_client import TelegramBot
+
+    bot = TelegramBot()
+    started_at: Dict[int, float] = {}
+    finished_at: Dict[int, float] = {}
+    all_done = asyncio.Event()
+    original_handle = bot._handle_message
+
+    async def traced_handle(update, context):
+        started_at[update.update_id] = time.time()
+        try:
+            await original_handle(update, context)
+        finally:
+            finished_at[update.update_id] = time.time()
+            if len(finished_at) >= args.messages:
+                all_done.set()
+
+    bot._handle_message = traced_handle  # Antes de registrar los handlers
+
+    await bot.initialize()
+    await asyncio.gather(bot.application.initialize(), bot._prepare_moderator())
+    await bot.application.start()
+    await bot._start_receiving()
+
+    cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+    try:
+        await asyncio.wait_for(all_done.wait(), timeout=args.messages / args.rate * 3 + 60)
+    except asyncio.TimeoutError:
+        print(f"⚠️ Solo se procesaron {len(finished_at)}/{args.messages} updates", file=sys.stderr)
+    cpu = _cpu_seconds() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    async with httpx.AsyncClient() as client:
+        fake_stats = (await client.get(f"http://127.0.0.1:{telegram_port}/stats")).json()
+    webhook_stats = bot.webhook_server.get_stats() if bot.webhook_server else None
+    await bot.stop()
+
+    emitted = {int(k): v for k, v in fake_stats.pop("emitted").items()}
+    ingest = [started_at[i] - emitted[i] for i in started_at if i in emitted]
+    decision = [finished_at[i] - emitted[i] for i in finished_at if i in emitted]
+    return {
+        "mode": args.child,
+        "messages": len(finished_at),
+        "wall_seconds": round(wall, 3),
+        **{f"ingest_{k}": v for k, v in _percentiles(ingest).items()},
+        **{f"decision_{k}": v for k, v in _percentiles(decision).items()},
+        "bot_cpu_seconds": round(cpu, 3),
+        "bot_cpu_ms_per_1k_updates": round(cpu / max(1, len(finished_at)) * 1000 * 1000, 1),
+        "fake_telegram": fake_stats,
+        "webhook": webhook_stats,
+    }
+
+
+def child_main(args: argparse.Namespace) -> None:
+    telegram_port, webhook_port = _free_port(), _free_port()
+    serve_cmd = [
+        sys.executable, "-m", "benchmarks.telegram_ingest", "--serve", "--port", str(telegram_port),
+        "--scenario", args.scenario, "--messages", str(args.messages), "--rate", str(args.rate),
+        "--chats", str(args.chats), "--seed", str(args.seed),
+    ]
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    fake = subprocess.Popen(serve_cmd, stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        fake.stdout.readline()  # "READY"
+
+        # La configuración se lee al importar settings: variables ANTES de importar el bot
+        os.environ.update({
+            "TELEGRAM_BOT_TOKEN": BOT_TOKEN,
+            "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "fake"),
+            "TELEGRAM_BASE_URL": f"http://127.0.0.1:{telegram_port}",
+            "TELEGRAM_MODE": args.child,
+            "WEBHOOK_URL": f"http://127.0.0.1:{webhook_port}/telegram",
+            "WEBHOOK_PORT": str(webhook_port),
+            "AI_BACKEND": "fake",
+            "AI_FAKE_LATENCY_MS": str(args.llm_latency_ms),
+            "AI_WARMUP_PROBE": "false",
+            "LOG_LEVEL": args.log_level,
+        })
+        for assignment in args.set or []:
+            key, _, value = assignment.partition("=")
+            os.environ[key.strip().upper()] = value
+        sys.path.insert(0, REPO_ROOT)
+
+        result = asyncio.run(run_mode(args, telegram_port))
+    finally:
+        fake.kill()
+    print(json.dumps(result, ensure_ascii=False))
+
+
+# =============================================================================
+# 🏁 ORQUESTADOR
+# =============================================================================
+
+def run_child(args: argparse.Namespace, mode: str) -> Dict[str, Any]:
+    forwarded = [
+        "--scenario", args.scenario, "--messages", str(args.messages), "--rate", str(args.rate),
+        "--chats", str(args.chats), "--seed", str(args.seed), "--llm-latency-ms", str(args.llm_latency_ms),
+        "--log-level", args.log_level,
+    ]
+    for assignment in args.set or []:
+        forwarded += ["--set", assignment]
+
+    with tempfile.TemporaryDirectory(prefix="ingest_") as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.telegram_ingest", "--child", mode, *forwarded],
+            cwd=workdir, env={**os.environ, "PYTHONPATH": REPO_ROOT}, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"El modo {mode} falló:\n{proc.stderr[-3000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="📡 Polling vs webhook con un Telegram falso local")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--scenario", default="baseline", choices=("baseline", "raid", "code"))
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=30.0, help="Mensajes por segundo que emite Telegram")
+    parser.add_argument("--chats", type=int, default=5, help="Grupos entre los que se reparte el tráfico")
+    parser.add_argument("--llm-latency-ms", type=int, default=50, help="Latencia del backend fake de Gemini")
+    parser.add_argument("--set", action="append", metavar="CLAVE=VALOR", help="Sobrescribe un setting (env var)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--out", help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        asyncio.run(serve(args))
+        return
+    if args.child:
+        child_main(args)
+        return
+
+    results = {}
+    for mode in args.modes:
+        print(f"📡 {mode}...", file=sys.stderr)
+        results[mode] = result = run_child(args, mode)
+        print(
+            f"   ingesta p50 {result['ingest_p50']}ms p95 {result['ingest_p95']}ms · "
+            f"decisión p95 {result['decision_p95']}ms · CPU {result['bot_cpu_ms_per_1k_updates']}ms/1k updates",
+            file=sys.stderr,
+        )
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
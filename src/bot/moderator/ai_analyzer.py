@@ -13,25 +13,48 @@ COMPONENTES PRINCIPALES:
 - ModerationResult: El resultado completo del análisis
 - ContentModerator: La clase principal que hace todo el trabajo
 - analyze_message(): Función simple para usar desde otros archivos
+- PreFilter (prefilter.py): Decide localmente los casos obvios (saludos, spam)
+- ClassifierPreFilter (classifier.py): Modelo local entrenado con moderation.log
+- VerdictCache (cache.py): Reutiliza veredictos de mensajes repetidos
+- LLMScheduler (scheduler.py): Limita las llamadas simultáneas a Gemini
+- GeminiQuotaLimiter (rate_limiter.py): Reparte la cuota RPM/TPM de la API key
+- CircuitBreaker (circuit_breaker.py): Deja de llamar a Gemini mientras esté caído
+- ModelRegistry (model_registry.py): Clientes por modelo para la cascada rápido → fuerte
+- LLMBackend (backends.py): LangChain, google-genai directo o simulado (settings.ai_backend)
+- RecordingBackend (recording.py): Graba respuestas reales y las reproduce sin red
+- MessageBatcher: Agrupa mensajes simultáneos en una sola llamada a Gemini
+- PendingModeration: Resultado "en dos tiempos" (acción primero, razón después)
+- analyze_message_streaming(): Versión con streaming para borrar spam antes
+- analyze_message_two_stage(): Clasificación compacta primero, razón solo si hace falta
 
 FLUJO DE TRABAJO:
-mensaje → Gemini API → análisis → decisión → acción
+mensaje → pre-filtro → caché → Gemini API → análisis → decisión → acción
 """
 
 import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any, Union
+import os
+import re
+import time
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable, Awaitable, Coroutine
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
 
-# LangChain imports
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate
-
 # Configuración local
 from ...settings import settings
+from ..services.metrics import DECISIONS_TOTAL, LLM_CALLS_TOTAL, STAGE_SECONDS
+from .backends import LLMBackend, PromptMessages, create_backend, render_prompt
+from .recording import RecordingBackend
+from .cache import VerdictCache, build_cache_namespace, normalize_message
+from .prefilter import PreFilter, RuleBasedPreFilter
+from .classifier import DECISION_LOG_MARKER, ClassifierPreFilter, NaiveBayesClassifier
+from .scheduler import LLMScheduler, SchedulerOverflowError
+from .rate_limiter import GeminiQuotaLimiter
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from .model_registry import ModelRegistry, TierMetrics, should_escalate
+from .singleflight import SingleFlight
 
 class ModerationAction(Enum):
     """
@@ -68,6 +91,7 @@ class ModerationResult:
     - message_analyzed: El mensaje original que se analizó
     - timestamp: Cuándo se hizo el análisis
     - processing_time: Cuántos segundos tardó en analizarlo
+    - source: Quién decidió (llm, cache, rules, classifier, error...); lo fija _log_decision
     
     Ejemplo de uso:
     if result.action == ModerationAction.DELETE and result.confidence > 0.8:
@@ -79,10 +103,15 @@ class ModerationResult:
     message_analyzed: str      # El mensaje original
     timestamp: datetime        # Cuándo se analizó
     processing_time: float     # Segundos que tardó 
+    source: str = ""           # Quién decidió (ver _log_decision)
 
 # Configurar logging específico para moderación
 logger = logging.getLogger(__name__)
 
+# 🧾 Las decisiones (datos de entrenamiento del clasificador) tienen su propio
+# logger: se escriben SIEMPRE, aunque LOG_LEVEL=WARNING silencie lo demás
+decision_logger = logging.getLogger(f"{__name__}.decisions")
+
 # Configurar formato de logging más detallado para moderación
 def setup_moderation_logging():
     """Configura logging específico para moderación"""
@@ -91,16 +120,162 @@ def setup_moderation_logging():
     )
     
     # Handler para archivo de moderación
-    file_handler = logging.FileHandler('moderation.log')
+    file_handler = logging.FileHandler(settings.decision_log_path)
     file_handler.setFormatter(formatter)
     
     logger.addHandler(file_handler)
     # Arreglar el problema del FieldInfo
     logger.setLevel(getattr(logging, str(settings.log_level).upper()))
+    
+    # Mismo archivo, pero independiente de LOG_LEVEL (y sin duplicar la línea vía el padre)
+    decision_logger.addHandler(file_handler)
+    decision_logger.setLevel(logging.INFO)
+    decision_logger.propagate = False
 
 # Inicializar logging
 setup_moderation_logging()
 
+class MessageBatcher:
+    """
+    📦 AGRUPADOR DE MENSAJES (MICRO-BATCHING)
+    
+    En momentos de mucho tráfico (anuncios de meetups, raids de spam) llegan
+    decenas de mensajes por segundo. Enviar cada uno por separado repite el
+    prompt del sistema (~1.5k tokens) en cada llamada.
+    
+    Este componente junta los mensajes que llegan dentro de una ventana corta
+    (o hasta llenar un lote) y los manda a Gemini en UNA sola petición.
+    Cada llamador recibe su propio ModerationResult.
+    
+    FLUJO:
+    submit() → cola pendiente → (ventana vence o lote lleno) → flush() → resultados
+    """
+    
+    def __init__(
+        self,
+        analyze_batch: Callable[[List[Tuple[str, float]]], Awaitable[List["ModerationResult"]]],
+        max_batch_size: int,
+        window_seconds: float,
+    ):
+        self._analyze_batch = analyze_batch
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        # (mensaje, start_time del llamador, future donde espera el resultado)
+        self._pending: List[Tuple[str, float, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        
+        # 📊 Métricas
+        self.batches_sent = 0
+        self.messages_batched = 0
+    
+    async def submit(self, message: str, start_time: float) -> "ModerationResult":
+        """Encola un mensaje y espera su veredicto"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, start_time, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            # Lote lleno: enviar ya
+            self._schedule_flush(loop)
+        elif self._timer is None:
+            # Primer mensaje del lote: abrir la ventana de espera
+            self._timer = loop.call_later(self.window_seconds, self._schedule_flush, loop)
+        
+        return await future
+    
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            loop.create_task(self._flush(batch))
+    
+    async def _flush(self, batch: List[Tuple[str, float, asyncio.Future]]) -> None:
+        """Envía un lote a Gemini y reparte los resultados"""
+        self.batches_sent += 1
+        self.messages_batched += len(batch)
+        logger.debug(f"📦 Enviando lote de {len(batch)} mensajes a Gemini")
+        
+        try:
+            results = await self._analyze_batch([(msg, start) for msg, start, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        avg = self.messages_batched / self.batches_sent if self.batches_sent else 0.0
+        return {
+            "batches_sent": self.batches_sent,
+            "messages_batched": self.messages_batched,
+            "avg_batch_size": round(avg, 2),
+            "pending": len(self._pending),
+        }
+
+# Detecta la acción en cuanto aparece completa en el JSON parcial del stream
+_STREAM_ACTION_RE = re.compile(r'"action"\s*:\s*"([A-Za-z]+)"')
+
+# Respuesta compacta del modo en dos etapas: "DELETE 0.92"
+_COMPACT_VERDICT_RE = re.compile(
+    r'\b(APPROVE|WARN|DELETE|BAN|TIMEOUT)\b\s*[,:;|]?\s*([01](?:\.\d+)?)?',
+    re.IGNORECASE
+)
+
+class PendingModeration:
+    """
+    ⏳ RESULTADO DE MODERACIÓN "EN DOS TIEMPOS"
+    
+    Con streaming, Gemini escribe primero el campo "action" y después la
+    explicación ("reason"). No tiene sentido esperar la explicación para
+    borrar un mensaje de spam:
+    
+    - await pending.action()  → la acción, en cuanto se conoce
+    - await pending.result()  → el ModerationResult completo (con reason)
+    
+    Uso:
+        pending = await analyze_message_streaming(texto, user_id)
+        if await pending.action() == ModerationAction.DELETE:
+            await message.delete()          # ¡ya!
+        result = await pending.result()     # la razón llega después
+    """
+    
+    def __init__(self):
+        loop = asyncio.get_running_loop()
+        self._action: asyncio.Future = loop.create_future()
+        self._result: asyncio.Future = loop.create_future()
+    
+    @classmethod
+    def resolved(cls, result: "ModerationResult") -> "PendingModeration":
+        """Crea un pendiente ya resuelto (veredictos locales o de caché)"""
+        pending = cls()
+        pending.set_result(result)
+        return pending
+    
+    def set_action(self, action: "ModerationAction") -> None:
+        if not self._action.done():
+            self._action.set_result(action)
+    
+    def set_result(self, result: "ModerationResult") -> None:
+        self.set_action(result.action)
+        if not self._result.done():
+            self._result.set_result(result)
+    
+    def published_action(self) -> Optional["ModerationAction"]:
+        """La acción ya publicada (el handler pudo haber actuado con ella), o None"""
+        return self._action.result() if self._action.done() else None
+    
+    async def action(self) -> "ModerationAction":
+        return await asyncio.shield(self._action)
+    
+    async def result(self) -> "ModerationResult":
+        return await asyncio.shield(self._result)
+
 class ContentModerator:
     """
     🧠 CEREBRO PRINCIPAL DEL BOT MODERADOR
@@ -126,13 +301,136 @@ class ContentModerator:
     def __init__(self):
         """Inicializa el moderador con configuración desde settings"""
         self.settings = settings
-        self.llm: Optional[ChatGoogleGenerativeAI] = None
-        self.prompt_template: Optional[ChatPromptTemplate] = None
+        self.llm: Optional[LLMBackend] = None
+        self.prompt_template: Optional[PromptMessages] = None
+        self.system_prompt: Optional[str] = None
+        self.batch_prompt_template: Optional[PromptMessages] = None
+        
+        # 🧭 Un cliente por modelo, creado una vez y reutilizado
+        self.models = ModelRegistry(self._build_client)
+        
+        # 🔒 initialize() corre UNA sola vez aunque lleguen varios mensajes a la vez
+        self._init_lock = asyncio.Lock()
+        
+        # 🐇 Cascada: modelo rápido primero, el fuerte solo para casos difíciles
+        self.fast_llm: Optional[LLMBackend] = None
+        self.cascade_tiers: Dict[str, TierMetrics] = {}
+        
+        # 🎯 Modo en dos etapas: cliente con pocos tokens de salida + prompts propios
+        self.classify_llm: Optional[LLMBackend] = None
+        self.classify_prompt_template: Optional[PromptMessages] = None
+        self.reason_prompt_template: Optional[PromptMessages] = None
+        
+        # 🪙 Tokens consumidos por tipo de llamada (single, batch, stream, classify, reason)
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+        self.two_stage_calls = 0
+        self.two_stage_reason_calls = 0
+        self.two_stage_action_latency_total = 0.0
+        
+        # 🧵 Tareas en segundo plano (stream, razón, prueba del breaker): el loop solo guarda referencias débiles
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # ⚡ Métricas de streaming: cuánto antes llega la acción vs la respuesta completa
+        self.stream_calls = 0
+        self.stream_action_latency_total = 0.0
+        self.stream_total_latency_total = 0.0
+        
+        # 🚦 Pre-filtros locales (se ejecutan en orden antes de Gemini)
+        self.prefilters: List[PreFilter] = []
+        if self.settings.prefilter_enabled:
+            self.add_prefilter(RuleBasedPreFilter(
+                max_safe_length=self.settings.prefilter_max_safe_length,
+                check_spam=self.settings.filter_spam,
+                min_spam_signals=self.settings.prefilter_min_spam_signals,
+            ))
+        if self.settings.classifier_enabled:
+            self._load_classifier()
+        
+        # 💾 Caché de veredictos (el namespace se fija al configurar el prompt)
+        self.cache: Optional[VerdictCache] = None
+        if self.settings.verdict_cache_enabled:
+            self.cache = VerdictCache(
+                max_size=self.settings.verdict_cache_size,
+                ttl_seconds=self.settings.verdict_cache_ttl,
+            )
+        
+        # 🛫 Copias idénticas que llegan a la vez comparten una sola llamada
+        self.singleflight: Optional[SingleFlight[ModerationResult]] = None
+        if self.settings.singleflight_enabled:
+            self.singleflight = SingleFlight()
+        
+        # 🚥 Límite de llamadas simultáneas a Gemini (con cola acotada)
+        self.scheduler = LLMScheduler(
+            max_in_flight=self.settings.llm_max_in_flight,
+            max_queue=self.settings.llm_max_queue,
+            overflow_policy=self.settings.llm_overflow_policy,
+        )
+        
+        # 🪣 Cuota RPM/TPM de Gemini medida del lado del cliente
+        self.quota = GeminiQuotaLimiter(
+            rpm=self.settings.gemini_rpm_limit,
+            tpm=self.settings.gemini_tpm_limit,
+            safety=self.settings.gemini_quota_safety,
+        )
+        
+        # 🔌 Circuit breaker: si Gemini falla o va lento, usar solo veredictos locales
+        self.breaker: Optional[CircuitBreaker] = None
+        self.probe_prompt_template: Optional[PromptMessages] = None
+        self._probe_timer: Optional[asyncio.TimerHandle] = None
+        if self.settings.circuit_breaker_enabled:
+            self.breaker = CircuitBreaker(
+                failure_rate_threshold=self.settings.circuit_breaker_failure_rate,
+                slow_call_seconds=self.settings.circuit_breaker_slow_call_seconds,
+                slow_rate_threshold=self.settings.circuit_breaker_slow_rate,
+                window_size=self.settings.circuit_breaker_window,
+                min_calls=self.settings.circuit_breaker_min_calls,
+                open_seconds=self.settings.circuit_breaker_open_seconds,
+            )
+            self.breaker.add_listener(self._on_circuit_change)
+        
+        # 📦 Micro-batching de llamadas a Gemini (opcional)
+        self.batcher: Optional[MessageBatcher] = None
+        if self.settings.ai_batch_enabled:
+            self.batcher = MessageBatcher(
+                self._analyze_batch,
+                max_batch_size=self.settings.ai_batch_max_size,
+                window_seconds=self.settings.ai_batch_window_ms / 1000,
+            )
         
         logger.info("🛡️ Inicializando ContentModerator")
         logger.info(f"📊 Modelo: {self.settings.ai_model}")
         logger.info(f"🔧 Moderación habilitada: {self.settings.moderation_enabled}") 
 
+    def add_prefilter(self, prefilter: PreFilter) -> None:
+        """🔌 Agrega un pre-filtro al final de la cadena local"""
+        self.prefilters.append(prefilter)
+        logger.info(f"🚦 Pre-filtro registrado: {prefilter.name}")
+
+    def _load_classifier(self) -> None:
+        """🧮 Carga el clasificador entrenado (si existe el archivo del modelo)"""
+        path = self.settings.classifier_model_path
+        if not os.path.exists(path):
+            logger.info(f"🧮 Sin modelo local en {path} (entrénalo con: python -m src.bot.moderator.classifier train)")
+            return
+        
+        try:
+            model = NaiveBayesClassifier.load(path)
+        except Exception as e:
+            logger.error(f"❌ Error cargando clasificador local {path}: {e}")
+            return
+        
+        if len(model.classes) < 2:
+            logger.error(f"❌ El modelo {path} solo conoce la acción {model.classes}: no se usa (reentrénalo)")
+            return
+        
+        self.add_prefilter(ClassifierPreFilter(
+            model,
+            approve_threshold=self.settings.classifier_approve_threshold,
+            action_threshold=self.settings.classifier_action_threshold,
+            min_known_fraction=self.settings.classifier_min_known_fraction,
+        ))
+        logger.info(f"🧮 Clasificador local cargado: {path} (clases: {model.classes})")
+
     async def initialize(self) -> None:
         """
         Inicializa la conexión con Gemini y configura las chains.
@@ -140,25 +438,123 @@ class ContentModerator:
         try:
             logger.info("🔧 Inicializando conexión con Gemini...")
             
-            # Inicializar ChatGoogleGenerativeAI con LangChain
-            self.llm = ChatGoogleGenerativeAI(
-                model=self.settings.ai_model,
-                google_api_key=self.settings.google_api_key,
-                temperature=self.settings.ai_temperature,
-                max_output_tokens=self.settings.ai_max_tokens,
-                max_retries=3,  # Valor por defecto
-                timeout=30      # Valor por defecto
-            )
+            # Backend de Gemini (LangChain, google-genai o simulado) desde el registro
+            self.llm = self.models.get(self.settings.ai_model, self.settings.ai_max_tokens)
+            
+            # 🎯 Cliente para la clasificación compacta (solo "ACCION CONFIANZA")
+            if self.settings.ai_two_stage_enabled:
+                self.classify_llm = self.models.get(
+                    self.settings.ai_model, self.settings.ai_classify_max_tokens
+                )
+            
+            # 🐇 Modelo rápido de la cascada
+            if self.settings.ai_cascade_enabled:
+                self.fast_llm = self.models.get(
+                    self.settings.ai_cascade_fast_model, self.settings.ai_max_tokens
+                )
+                self.cascade_tiers = {
+                    "fast": TierMetrics(self.settings.ai_cascade_fast_model),
+                    "strong": TierMetrics(self.settings.ai_model),
+                }
+                logger.info(
+                    f"🐇 Cascada activa: {self.settings.ai_cascade_fast_model} → {self.settings.ai_model}"
+                )
             
             # Configurar el prompt template para moderación
             await self._setup_moderation_prompt()
             
+            # Modelo, temperatura y prompt forman parte de la llave del caché:
+            # si cualquiera cambia, los veredictos anteriores dejan de valer
+            if self.cache is not None:
+                self.cache.set_namespace(build_cache_namespace(
+                    self._model_signature(),
+                    self.settings.ai_temperature,
+                    self.system_prompt,
+                ))
+            
             logger.info("✅ Gemini inicializado correctamente")
             
         except Exception as e:
             logger.error(f"❌ Error al inicializar Gemini: {e}")
             raise 
 
+    @property
+    def is_ready(self) -> bool:
+        """True si ya hay backend y prompt (initialize() terminó)"""
+        return self.llm is not None and self.prompt_template is not None
+
+    async def ensure_initialized(self) -> bool:
+        """
+        🔒 Inicializa el moderador una sola vez (seguro ante llamadas concurrentes).
+        
+        Devuelve True si esta llamada hizo la inicialización. Si initialize()
+        falla, la siguiente llamada lo vuelve a intentar.
+        """
+        if self.is_ready:
+            return False
+        async with self._init_lock:
+            if self.is_ready:
+                return False  # Otra tarea inicializó mientras esperábamos
+            await self.initialize()
+            return True
+
+    async def warm_up(self) -> float:
+        """
+        🔥 Llamada mínima a cada cliente de Gemini para abrir la conexión
+        HTTP (DNS + TLS) antes del primer mensaje real.
+        
+        Devuelve los segundos que tardó. Un fallo solo se registra: el bot
+        arranca igual y el primer mensaje pagará la conexión.
+        """
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        clients: Dict[int, LLMBackend] = {}
+        for backend in (self.llm, self.classify_llm, self.fast_llm):
+            if backend is not None:
+                clients.setdefault(id(backend), backend)
+        
+        for backend in clients.values():
+            try:
+                await self._call_llm("warmup", backend, self.probe_prompt_template, {"message": "Responde solo: OK"})
+            except Exception as e:
+                logger.warning(f"🔥 Warm-up de {backend.model} fallido: {e}")
+        
+        elapsed = loop.time() - started
+        logger.info(f"🔥 Warm-up de {len(clients)} cliente(s) de Gemini en {elapsed:.3f}s")
+        return elapsed
+
+    def _build_client(self, model: str, max_output_tokens: int) -> LLMBackend:
+        """🏭 Crea un backend de Gemini con la configuración común (lo usa el registro)"""
+        record_mode = self.settings.ai_record_mode
+        if record_mode == "replay":
+            # ▶️ Solo grabaciones: ni red ni API key
+            return RecordingBackend(
+                None, self.settings.ai_record_path, "replay",
+                model=model, replay_latency=self.settings.ai_replay_latency,
+            )
+        
+        backend = create_backend(
+            self.settings.ai_backend,
+            model=model,
+            api_key=self.settings.google_api_key,
+            temperature=self.settings.ai_temperature,
+            max_output_tokens=max_output_tokens,
+            max_retries=self.settings.ai_max_retries,
+            timeout=self.settings.ai_timeout_seconds,
+            fake_latency=self.settings.ai_fake_latency_ms / 1000,
+            base_url=self.settings.gemini_base_url,
+        )
+        if record_mode == "record":
+            backend = RecordingBackend(backend, self.settings.ai_record_path, "record", model=model)
+        return backend
+
+    def _model_signature(self) -> str:
+        """Modelos que pueden producir un veredicto (parte de la llave del caché)"""
+        models = self.settings.ai_model
+        if self.settings.ai_cascade_enabled:
+            models = f"{self.settings.ai_cascade_fast_model}>{models}"
+        return f"{self.settings.ai_backend}:{models}"
+
     async def _setup_moderation_prompt(self) -> None:
         """
         🧠 CONFIGURACIÓN DEL PROMPT - EL ALMA DEL MODERADOR
@@ -228,12 +624,46 @@ class ContentModerator:
         }}
         """
         
+        self.system_prompt = system_prompt
+        
         # 🔗 CREAR EL TEMPLATE DE CONVERSACIÓN
         # Esto combina las instrucciones del sistema con el mensaje del usuario
-        self.prompt_template = ChatPromptTemplate.from_messages([
+        self.prompt_template = [
             ("system", system_prompt),  # Las instrucciones para la IA
             ("human", "Analiza este mensaje:\n\n{message}")  # El mensaje a analizar
-        ]) 
+        ]
+        
+        # 📦 TEMPLATE PARA LOTES: mismas reglas, varios mensajes numerados
+        self.batch_prompt_template = [
+            ("system", system_prompt),
+            ("human",
+             "Analiza cada uno de estos {count} mensajes de forma independiente.\n"
+             "Responde SOLO con un array JSON con un objeto por mensaje, en el mismo orden:\n"
+             '[{{"index": 0, "action": "APPROVE|WARN|DELETE|BAN|TIMEOUT", '
+             '"reason": "Explicación breve en español", "confidence": 0.95}}]\n\n'
+             "{messages}")
+        ]
+        
+        # 🔌 TEMPLATE DE PRUEBA del circuit breaker (mínimo, sin prompt del sistema)
+        self.probe_prompt_template = [
+            ("human", "{message}")
+        ]
+        
+        # 🎯 TEMPLATES DEL MODO EN DOS ETAPAS
+        # Etapa 1: solo la acción y la confianza (pocos tokens de salida)
+        self.classify_prompt_template = [
+            ("system", system_prompt),
+            ("human",
+             "Clasifica este mensaje. Responde SOLO con una línea con la acción y la "
+             "confianza, sin explicación ni JSON. Ejemplo: APPROVE 0.97\n\n{message}")
+        ]
+        # Etapa 2: la explicación, solo cuando la acción NO es APPROVE
+        self.reason_prompt_template = [
+            ("system", system_prompt),
+            ("human",
+             "Este mensaje fue clasificado como {action}. Explica en UNA frase breve "
+             "en español por qué, sin JSON:\n\n{message}")
+        ]
 
     async def analyze_message(self, message: str, user_id: Optional[int] = None) -> ModerationResult:
         """
@@ -244,8 +674,11 @@ class ContentModerator:
         PROCESO PASO A PASO:
         1. 📥 Recibe el mensaje de texto
         2. ⏱️ Inicia el cronómetro para medir velocidad
+        2b. 🚦 Si un pre-filtro local está seguro, devuelve su veredicto
         3. 🔍 Verifica que todo esté inicializado
-        4. 🤖 Crea la "chain" (prompt + IA) usando LangChain
+        3b. 💾 Si el mensaje ya está en caché, devuelve ese veredicto
+        3c. 🛫 Si el mismo texto ya se está analizando, espera ese resultado
+        4. 🤖 Arma el prompt (instrucciones + mensaje) para el backend
         5. 📤 Envía el mensaje a Gemini para análisis
         6. 📥 Recibe la respuesta JSON de Gemini
         7. 🔧 Parsea y valida la respuesta
@@ -271,27 +704,38 @@ class ContentModerator:
             logger.info(f"🔍 Analizando mensaje de usuario {user_id}")
             logger.debug(f"📝 Mensaje: {message[:100]}...")
             
+            # 🚦 Casos obvios se deciden localmente, sin Gemini
+            local = self._run_prefilters(message, start_time)
+            if local is not None:
+                return local
+            
             # Verificar que el moderador esté inicializado
             if not self.llm or not self.prompt_template:
                 raise ValueError("Moderador no inicializado. Llama a initialize() primero.")
             
-            # Crear la chain: prompt + LLM
-            moderation_chain = self.prompt_template | self.llm
+            # 💾 Buscar en caché antes de llamar a Gemini
+            cached = self._get_cached_result(message, start_time)
+            if cached is not None:
+                return cached
             
-            # Ejecutar la chain
-            logger.debug("🤖 Enviando mensaje a Gemini...")
-            response = await moderation_chain.ainvoke({
-                "message": message
-            })
+            # 🛫 Una sola llamada por texto a la vez: las copias esperan al líder
+            if self.singleflight is not None:
+                result, shared = await self.singleflight.do(
+                    normalize_message(message), lambda: self._analyze_uncached(message, start_time)
+                )
+                if shared:
+                    result = replace(
+                        result,
+                        message_analyzed=message,
+                        processing_time=asyncio.get_event_loop().time() - start_time,
+                    )
+                    # Un fallo del líder (aprobado por seguridad, confianza 0.0) sigue siendo "error"
+                    self._log_decision(result, "singleflight" if result.confidence > 0.0 else "error", user_id)
+                    return result
+            else:
+                result = await self._analyze_uncached(message, start_time)
             
-            logger.debug(f"📨 Respuesta de Gemini: {response.content}")
-            
-            # Parsear la respuesta JSON
-            result = await self._parse_moderation_response(
-                response.content, 
-                message, 
-                start_time
-            )
+            self._log_decision(result, "llm" if result.confidence > 0.0 else "error", user_id)
             
             logger.info(f"✅ Análisis completado: {result.action.value} ({result.confidence:.2f})")
             return result
@@ -299,14 +743,791 @@ class ContentModerator:
         except Exception as e:
             logger.error(f"❌ Error en análisis: {e}")
             # Devolver resultado de error
-            return ModerationResult(
-                action=ModerationAction.APPROVE,  # En caso de error, aprobar
-                reason=f"Error en análisis: {str(e)}",
+            return self._error_result(message, start_time, e)
+
+    async def _analyze_uncached(self, message: str, start_time: float) -> ModerationResult:
+        """🤖 Llama a Gemini (en lote si el batching está activo) y guarda el veredicto en caché"""
+        if self.batcher is not None:
+            result = await self.batcher.submit(message, start_time)
+        else:
+            result = await self._invoke_llm(message, start_time)
+        self._store_cached_result(message, result)
+        return result
+
+    def _early_result(self, message: str, start_time: float) -> Optional[ModerationResult]:
+        """
+        Pasos previos a Gemini compartidos por los modos streaming y dos etapas:
+        pre-filtros → verificación de inicialización → caché.
+        """
+        local = self._run_prefilters(message, start_time)
+        if local is not None:
+            return local
+        
+        if not self.llm or not self.prompt_template:
+            return self._error_result(
+                message, start_time, ValueError("Moderador no inicializado. Llama a initialize() primero.")
+            )
+        
+        return self._get_cached_result(message, start_time)
+
+    def analyze_message_locally(self, message: str, user_id: Optional[int] = None) -> ModerationResult:
+        """
+        🤝 Solo veredictos locales (pre-filtros y caché), SIN llamar a Gemini.
+        
+        Para usuarios de confianza fuera de la muestra de auditoría: el spam
+        obvio se sigue detectando gratis; lo demás se aprueba sin análisis.
+        """
+        start_time = asyncio.get_event_loop().time()
+        result = self._run_prefilters(message, start_time) or self._get_cached_result(message, start_time)
+        if result is None:
+            result = ModerationResult(
+                action=ModerationAction.APPROVE,
+                reason="Usuario de confianza: aprobado sin análisis de IA",
                 confidence=0.0,
                 message_analyzed=message,
                 timestamp=datetime.now(),
                 processing_time=asyncio.get_event_loop().time() - start_time
             )
+            self._log_decision(result, "trusted", user_id)
+        return result
+
+    async def analyze_message_two_stage(
+        self,
+        message: str,
+        user_id: Optional[int] = None
+    ) -> PendingModeration:
+        """
+        🎯 MODERACIÓN EN DOS ETAPAS
+        
+        El ~95% de los mensajes se aprueba, pero el prompt normal pide una
+        explicación en español para TODOS. Aquí:
+        
+        1. Etapa 1: Gemini responde solo "ACCION CONFIANZA" (pocos tokens)
+        2. Si es APPROVE → listo, sin segunda llamada
+        3. Si es WARN/DELETE/TIMEOUT/BAN → la acción se publica de inmediato y
+           la razón se pide en una segunda llamada EN PARALELO (mientras el
+           handler ya está borrando el mensaje)
+        
+        Returns:
+            PendingModeration: await .action() para actuar ya, await .result() para todo
+        """
+        start_time = asyncio.get_event_loop().time()
+        logger.info(f"🔍 Analizando mensaje de usuario {user_id} (dos etapas)")
+        
+        early = self._early_result(message, start_time)
+        if early is not None:
+            return PendingModeration.resolved(early)
+        
+        try:
+            action, confidence, full_result = await self._classify_compact(message, start_time)
+        except Exception as e:
+            logger.error(f"❌ Error en clasificación rápida: {e}")
+            return PendingModeration.resolved(self._error_result(message, start_time, e))
+        
+        self.two_stage_calls += 1
+        self.two_stage_action_latency_total += asyncio.get_event_loop().time() - start_time
+        
+        # Gemini respondió el JSON completo de todos modos: no hace falta etapa 2
+        if full_result is not None:
+            self._finish_result(full_result, "llm", user_id)
+            return PendingModeration.resolved(full_result)
+        
+        if action == ModerationAction.APPROVE:
+            result = ModerationResult(
+                action=action,
+                reason="Mensaje apropiado (clasificación rápida)",
+                confidence=confidence,
+                message_analyzed=message,
+                timestamp=datetime.now(),
+                processing_time=asyncio.get_event_loop().time() - start_time
+            )
+            self._finish_result(result, "llm", user_id)
+            return PendingModeration.resolved(result)
+        
+        pending = PendingModeration()
+        pending.set_action(action)
+        self._spawn(self._explain_verdict(message, action, confidence, user_id, start_time, pending))
+        return pending
+
+    async def _classify_compact(
+        self,
+        message: str,
+        start_time: float
+    ) -> Tuple[ModerationAction, float, Optional[ModerationResult]]:
+        """
+        Etapa 1: pide solo "ACCION CONFIANZA".
+        
+        Returns:
+            (acción, confianza, resultado completo si Gemini respondió JSON igualmente)
+        """
+        response = await self._call_llm(
+            "classify", self.classify_llm or self.llm, self.classify_prompt_template, {"message": message}
+        )
+        content = response.content.strip()
+        logger.debug(f"📨 Clasificación rápida de Gemini: {content}")
+        
+        match = _COMPACT_VERDICT_RE.search(content)
+        if match is None or '{' in content[:match.start()]:
+            # No siguió el formato compacto: intentar como JSON normal
+            result = await self._parse_moderation_response(content, message, start_time)
+            return result.action, result.confidence, result
+        
+        action = ModerationAction(match.group(1).lower())
+        confidence = float(match.group(2)) if match.group(2) else 0.5
+        return action, min(max(confidence, 0.0), 1.0), None
+
+    async def _explain_verdict(
+        self,
+        message: str,
+        action: ModerationAction,
+        confidence: float,
+        user_id: Optional[int],
+        start_time: float,
+        pending: PendingModeration
+    ) -> None:
+        """
+        Etapa 2: pide la explicación y completa el PendingModeration.
+        
+        La acción ya se publicó: si la razón falla (o se cancela), el
+        resultado conserva esa acción y lo dice en la razón.
+        """
+        self.two_stage_reason_calls += 1
+        reason = "Sin razón especificada"
+        try:
+            response = await self._call_llm(
+                "reason", self.llm, self.reason_prompt_template, {"message": message, "action": action.name}
+            )
+            reason = response.content.strip() or reason
+        except asyncio.CancelledError:
+            reason = "Sin razón especificada (cancelado)"
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando la razón: {e}")
+            reason = f"Sin razón especificada (error: {e})"
+        finally:
+            result = ModerationResult(
+                action=action,
+                reason=reason,
+                confidence=confidence,
+                message_analyzed=message,
+                timestamp=datetime.now(),
+                processing_time=asyncio.get_event_loop().time() - start_time
+            )
+            self._finish_result(result, "llm", user_id)
+            pending.set_result(result)
+
+    def _finish_result(self, result: ModerationResult, source: str, user_id: Optional[int]) -> None:
+        """Guarda en caché y registra un veredicto recién calculado"""
+        self._store_cached_result(result.message_analyzed, result)
+        self._log_decision(result, source if result.confidence > 0.0 else "error", user_id)
+        logger.info(f"✅ Análisis completado: {result.action.value} ({result.confidence:.2f})")
+
+    def _record_usage(self, kind: str, usage: Optional[Dict[str, Any]]) -> None:
+        """🪙 Acumula los tokens reportados por Gemini (usage_metadata de la respuesta)"""
+        if not usage:
+            return
+        totals = self.token_usage.setdefault(kind, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+        totals["calls"] += 1
+        totals["input_tokens"] += usage.get("input_tokens", 0)
+        totals["output_tokens"] += usage.get("output_tokens", 0)
+
+    async def analyze_message_streaming(
+        self,
+        message: str,
+        user_id: Optional[int] = None
+    ) -> PendingModeration:
+        """
+        ⚡ VERSIÓN CON STREAMING DE analyze_message()
+        
+        Mismo flujo (pre-filtros → caché → Gemini), pero la llamada a Gemini
+        usa astream() y la acción se publica en cuanto el campo "action" del
+        JSON llega completo, mientras "reason" se sigue generando.
+        
+        Los veredictos locales y de caché se devuelven ya resueltos.
+        El streaming no pasa por el MessageBatcher.
+        
+        Returns:
+            PendingModeration: await .action() para actuar ya, await .result() para todo
+        """
+        start_time = asyncio.get_event_loop().time()
+        logger.info(f"🔍 Analizando mensaje de usuario {user_id} (streaming)")
+        
+        early = self._early_result(message, start_time)
+        if early is not None:
+            return PendingModeration.resolved(early)
+        
+        pending = PendingModeration()
+        self._spawn(self._stream_llm(message, user_id, start_time, pending))
+        return pending
+
+    async def stop(self) -> None:
+        """🛑 Cancela la prueba agendada del circuit breaker y las tareas en segundo plano"""
+        if self._probe_timer is not None:
+            self._probe_timer.cancel()
+            self._probe_timer = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+        """🧵 Lanza una tarea en segundo plano guardando la referencia hasta que termine"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _stream_llm(
+        self,
+        message: str,
+        user_id: Optional[int],
+        start_time: float,
+        pending: PendingModeration
+    ) -> None:
+        """Consume el stream de Gemini y va resolviendo el PendingModeration"""
+        loop = asyncio.get_event_loop()
+        action_latency: Optional[float] = None
+        
+        messages = render_prompt(self.prompt_template, {"message": message})
+        
+        async def read_stream() -> Tuple[Tuple[str, Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+            nonlocal action_latency
+            buffer = ""
+            usage = None
+            
+            async for chunk in self.llm.astream(messages):
+                buffer += chunk.content
+                usage = chunk.usage_metadata or usage
+                
+                if action_latency is None:
+                    match = _STREAM_ACTION_RE.search(buffer)
+                    if match:
+                        try:
+                            pending.set_action(ModerationAction(match.group(1).lower()))
+                            action_latency = loop.time() - start_time
+                            logger.debug(f"⚡ Acción '{match.group(1)}' disponible en {action_latency:.3f}s")
+                        except ValueError:
+                            pass  # Acción desconocida: se resuelve con el JSON completo
+            return (buffer, usage), usage
+        
+        prompt_chars = self._prompt_chars(messages)
+        result: Optional[ModerationResult] = None
+        
+        try:
+            # El stream completo ocupa un lugar en el planificador
+            buffer, usage = await self._run_scheduled(
+                lambda: self._protected_request("stream", prompt_chars, read_stream)
+            )
+            
+            logger.debug(f"📨 Respuesta de Gemini (stream): {buffer}")
+            self._record_usage("stream", usage)
+            result = self._keep_published_action(
+                await self._parse_moderation_response(buffer, message, start_time), pending
+            )
+            
+            self._store_cached_result(message, result)
+            self._log_decision(result, "llm" if result.confidence > 0.0 else "error", user_id)
+            
+            self.stream_calls += 1
+            self.stream_action_latency_total += action_latency if action_latency is not None else result.processing_time
+            self.stream_total_latency_total += result.processing_time
+            
+            logger.info(
+                f"✅ Análisis completado (stream): {result.action.value} ({result.confidence:.2f}) - "
+                f"acción en {action_latency or result.processing_time:.3f}s, total {result.processing_time:.3f}s"
+            )
+            
+        except asyncio.CancelledError:
+            # Quien espera pending.result() no puede quedarse colgado
+            result = self._keep_published_action(
+                self._error_result(message, start_time, RuntimeError("análisis cancelado")), pending
+            )
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error en análisis (stream): {e}")
+            result = self._keep_published_action(self._error_result(message, start_time, e), pending)
+        finally:
+            pending.set_result(result)
+
+    def _keep_published_action(self, result: ModerationResult, pending: PendingModeration) -> ModerationResult:
+        """
+        Si la acción ya se publicó, el handler pudo haber borrado el mensaje:
+        el resultado final la conserva aunque el resto del stream haya fallado
+        (con la razón del error), para que el DM, las métricas y la reputación
+        correspondan a lo que de verdad se hizo.
+        """
+        published = pending.published_action()
+        if published is None or published == result.action:
+            return result
+        logger.warning(f"⚡ La acción {published.value} ya se publicó; el análisis terminó en: {result.reason}")
+        return replace(result, action=published)
+
+    async def _call_llm(
+        self,
+        kind: str,
+        backend: LLMBackend,
+        template: PromptMessages,
+        inputs: Dict[str, Any]
+    ) -> Any:
+        """
+        📞 Punto ÚNICO de llamada a Gemini.
+        
+        1. Espera lugar en el planificador (límite de llamadas simultáneas)
+        2. Reserva cuota RPM/TPM (espera si la cubeta no alcanza)
+        3. Llama a Gemini y ajusta la cuota con los tokens reales
+        4. Acumula los tokens usados bajo `kind` (single, batch, classify, reason)
+        """
+        messages = render_prompt(template, inputs)
+        prompt_chars = self._prompt_chars(messages)
+        
+        async def invoke() -> Tuple[Any, Optional[Dict[str, Any]]]:
+            response = await backend.ainvoke(messages)
+            return response, response.usage_metadata
+        
+        response = await self._run_scheduled(
+            lambda: self._protected_request(kind, prompt_chars, invoke)
+        )
+        self._record_usage(kind, response.usage_metadata)
+        return response
+
+    async def _run_scheduled(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Pasa call() por el planificador midiendo la espera en cola (⏱️ queue_wait)"""
+        queued_at = time.perf_counter()
+        
+        async def started() -> Any:
+            STAGE_SECONDS.observe(time.perf_counter() - queued_at, stage="queue_wait")
+            return await call()
+        
+        return await self.scheduler.run(started)
+
+    async def _protected_request(
+        self,
+        kind: str,
+        prompt_chars: int,
+        request: Callable[[], Awaitable[Tuple[Any, Optional[Dict[str, Any]]]]]
+    ) -> Any:
+        """
+        Una petición a Gemini protegida por el circuit breaker y la cuota.
+        
+        `request` devuelve (respuesta, usage_metadata). Si el circuito está
+        abierto se lanza CircuitOpenError SIN tocar la red.
+        """
+        if self.breaker is not None and not self.breaker.allow_request():
+            LLM_CALLS_TOTAL.inc(kind=kind, outcome="circuit_open")
+            raise CircuitOpenError(
+                f"Circuito abierto: Gemini no se usa por {self.breaker.seconds_until_probe:.0f}s más"
+            )
+        
+        loop = asyncio.get_event_loop()
+        reserved: Optional[int] = None
+        try:
+            with STAGE_SECONDS.time(stage="quota_wait"):
+                reserved = await self.quota.acquire(prompt_chars, kind)
+            started = loop.time()
+            with STAGE_SECONDS.time(stage="llm"):
+                response, usage = await request()
+        except asyncio.CancelledError:
+            LLM_CALLS_TOTAL.inc(kind=kind, outcome="cancelled")
+            if self.breaker is not None:
+                self.breaker.record_cancelled()
+            if reserved is not None:
+                self.quota.release(reserved)
+            raise
+        except Exception:
+            LLM_CALLS_TOTAL.inc(kind=kind, outcome="error")
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            if reserved is not None:
+                self.quota.release(reserved)  # Sin usage: la reserva vuelve a la cubeta
+            raise
+        
+        LLM_CALLS_TOTAL.inc(kind=kind, outcome="ok")
+        if self.breaker is not None:
+            self.breaker.record_success(loop.time() - started)
+        self.quota.settle(reserved, usage, kind, prompt_chars)
+        return response
+
+    def _on_circuit_change(self, previous: CircuitState, new_state: CircuitState) -> None:
+        """📣 Registra el cambio de estado y agenda la prueba si el circuito se abrió"""
+        log = logger.info if new_state == CircuitState.CLOSED else logger.warning
+        log(f"🔌 Circuit breaker: {previous.value} → {new_state.value} ({self.breaker.get_stats()})")
+        
+        if new_state == CircuitState.OPEN:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            if self._probe_timer is not None:
+                self._probe_timer.cancel()  # Se reabrió: solo vale la prueba más reciente
+            self._probe_timer = loop.call_later(self.breaker.open_seconds, self._start_probe)
+
+    def _start_probe(self) -> None:
+        self._probe_timer = None
+        self._spawn(self._probe_gemini())
+
+    async def _probe_gemini(self) -> None:
+        """🩺 Llamada mínima de prueba para cerrar el circuito si Gemini volvió"""
+        if self.breaker is None or self.breaker.state == CircuitState.CLOSED:
+            return
+        try:
+            await self._call_llm("probe", self.llm, self.probe_prompt_template, {"message": "Responde solo: OK"})
+            logger.info("🩺 Prueba a Gemini exitosa")
+        except CircuitOpenError:
+            pass  # Otra llamada ya está probando
+        except Exception as e:
+            logger.warning(f"🩺 Prueba a Gemini fallida: {e}")
+
+    def _prompt_chars(self, messages: PromptMessages) -> int:
+        """Caracteres del prompt ya armado (sistema + mensaje + instrucciones)"""
+        return sum(len(text) for _, text in messages)
+
+    def _local_fallback(self, message: str, start_time: float, why: str) -> ModerationResult:
+        """
+        🛟 Veredicto local cuando Gemini no está disponible (saturado, caído...)
+        
+        Usa el clasificador local si está cargado (sin aplicar la banda de
+        confianza, pero sin acciones destructivas dudosas); si no, aprueba.
+        """
+        for prefilter in self.prefilters:
+            if isinstance(prefilter, ClassifierPreFilter):
+                label, probability = prefilter.model.predict(message)
+                if label and (label == "approve" or probability >= prefilter.action_threshold):
+                    action = ModerationAction(label)
+                    confidence = probability
+                else:
+                    action, confidence = ModerationAction.APPROVE, 1.0 - probability
+                return ModerationResult(
+                    action=action,
+                    reason=f"Veredicto local ({why})",
+                    confidence=confidence,
+                    message_analyzed=message,
+                    timestamp=datetime.now(),
+                    processing_time=asyncio.get_event_loop().time() - start_time
+                )
+        
+        return ModerationResult(
+            action=ModerationAction.APPROVE,
+            reason=f"Aprobado sin análisis ({why})",
+            confidence=0.0,
+            message_analyzed=message,
+            timestamp=datetime.now(),
+            processing_time=asyncio.get_event_loop().time() - start_time
+        )
+
+    def _error_result(self, message: str, start_time: float, error: Exception) -> ModerationResult:
+        """Resultado de error: se aprueba por seguridad con confianza 0.0"""
+        if isinstance(error, CircuitOpenError):
+            # 🔌 Gemini caído: veredicto local sin esperar a la red
+            result = self._local_fallback(message, start_time, "Gemini no disponible")
+            self._log_decision(result, "fallback")
+            return result
+        
+        if isinstance(error, SchedulerOverflowError):
+            # 🚨 Cola llena: aplicar la política de desborde
+            logger.warning(f"🚨 {error} - política: {self.scheduler.overflow_policy}")
+            if self.scheduler.overflow_policy == "fallback":
+                result = self._local_fallback(message, start_time, "IA saturada")
+                self._log_decision(result, "fallback")
+                return result
+        
+        return ModerationResult(
+            action=ModerationAction.APPROVE,  # En caso de error, aprobar
+            reason=f"Error en análisis: {str(error)}",
+            confidence=0.0,
+            message_analyzed=message,
+            timestamp=datetime.now(),
+            processing_time=asyncio.get_event_loop().time() - start_time
+        )
+
+    async def _invoke_llm(
+        self,
+        message: str,
+        start_time: float,
+        llm: Optional[LLMBackend] = None,
+        kind: str = "single"
+    ) -> ModerationResult:
+        """Envía UN mensaje a Gemini y parsea su respuesta"""
+        if llm is None and self.fast_llm is not None:
+            return await self._invoke_cascade(message, start_time)
+        
+        # Enviar prompt + mensaje al backend
+        logger.debug("🤖 Enviando mensaje a Gemini...")
+        response = await self._call_llm(kind, llm or self.llm, self.prompt_template, {
+            "message": message
+        })
+        
+        logger.debug(f"📨 Respuesta de Gemini: {response.content}")
+        
+        # Parsear la respuesta JSON
+        return await self._parse_moderation_response(
+            response.content, 
+            message, 
+            start_time
+        )
+
+    async def _invoke_cascade(self, message: str, start_time: float) -> ModerationResult:
+        """
+        🐇→🦉 Cascada: el modelo rápido decide; solo se escala al fuerte si
+        la confianza es baja o la acción es destructiva (borrar/banear).
+        """
+        loop = asyncio.get_event_loop()
+        tier_start = loop.time()
+        try:
+            fast = await self._invoke_llm(message, start_time, self.fast_llm, "fast")
+            escalate = self._needs_strong_model(fast)
+        except (CircuitOpenError, SchedulerOverflowError):
+            raise  # Gemini caído o saturado: el fuerte tampoco respondería
+        except Exception as e:
+            logger.warning(f"🐇 Modelo rápido falló, escalando: {e}")
+            fast, escalate = None, True
+        self.cascade_tiers["fast"].record(loop.time() - tier_start, escalate)
+        
+        if not escalate:
+            return fast
+        
+        logger.debug(
+            f"🦉 Escalando al modelo fuerte "
+            f"({fast.action.value if fast else 'error'} {fast.confidence if fast else 0.0:.2f})"
+        )
+        tier_start = loop.time()
+        strong = await self._invoke_llm(message, start_time, self.llm, "single")
+        self.cascade_tiers["strong"].record(loop.time() - tier_start)
+        return strong
+
+    def _needs_strong_model(self, result: ModerationResult) -> bool:
+        """¿El veredicto del modelo rápido debe confirmarlo el fuerte? (ver should_escalate)"""
+        return should_escalate(
+            result.action.value,
+            result.confidence,
+            self.settings.ai_cascade_escalate_below,
+            self.settings.ai_cascade_escalate_destructive,
+        )
+
+    async def _analyze_batch(self, items: List[Tuple[str, float]]) -> List[ModerationResult]:
+        """
+        📦 Analiza varios mensajes en UNA sola llamada a Gemini.
+        
+        Los mensajes se numeran en el prompt y Gemini responde un array JSON
+        con un objeto por índice. Si un índice falta o viene mal formado,
+        ese mensaje se analiza por separado con _invoke_llm().
+        
+        Con la cascada activa, el lote va primero al modelo rápido y solo los
+        veredictos que escalan se reenvían (en otro lote) al modelo fuerte.
+        
+        Args:
+            items: Lista de (mensaje, start_time del llamador)
+        
+        Returns:
+            List[ModerationResult]: Un resultado por mensaje, en el mismo orden
+        """
+        if len(items) == 1:
+            message, start_time = items[0]
+            return [await self._invoke_llm(message, start_time)]
+        
+        if self.fast_llm is None:
+            return await self._invoke_batch(items, self.llm, "batch", "single")
+        
+        # 🐇→🦉 Cascada por mensaje dentro del lote
+        loop = asyncio.get_event_loop()
+        tier_start = loop.time()
+        try:
+            fast = await self._invoke_batch(items, self.fast_llm, "fast_batch", "fast")
+            escalate = [i for i, result in enumerate(fast) if self._needs_strong_model(result)]
+        except (CircuitOpenError, SchedulerOverflowError):
+            raise  # Gemini caído o saturado: el fuerte tampoco respondería
+        except Exception as e:
+            logger.warning(f"🐇 Modelo rápido falló con el lote, escalando todo: {e}")
+            fast, escalate = [], list(range(len(items)))
+        fast_latency = loop.time() - tier_start
+        for index in range(len(items)):
+            self.cascade_tiers["fast"].record(fast_latency, index in escalate)
+        
+        if not escalate:
+            return fast
+        
+        logger.debug(f"🦉 Escalando {len(escalate)} de {len(items)} mensajes del lote al modelo fuerte")
+        tier_start = loop.time()
+        strong = await self._invoke_batch([items[i] for i in escalate], self.llm, "batch", "single")
+        strong_latency = loop.time() - tier_start
+        results = fast or [None] * len(items)
+        for index, result in zip(escalate, strong):
+            results[index] = result
+            self.cascade_tiers["strong"].record(strong_latency)
+        return results
+
+    async def _invoke_batch(
+        self,
+        items: List[Tuple[str, float]],
+        llm: LLMBackend,
+        kind: str,
+        single_kind: str
+    ) -> List[ModerationResult]:
+        """Un lote contra UN modelo; lo que Gemini no respondió se reintenta por separado"""
+        if len(items) == 1:
+            message, start_time = items[0]
+            return [await self._invoke_llm(message, start_time, llm, single_kind)]
+        
+        numbered = "\n\n".join(
+            f"[{index}]\n{message}" for index, (message, _) in enumerate(items)
+        )
+        response = await self._call_llm(kind, llm, self.batch_prompt_template, {
+            "count": len(items),
+            "messages": numbered
+        })
+        logger.debug(f"📨 Respuesta de Gemini (lote de {len(items)}): {response.content}")
+        
+        payloads = self._parse_batch_response(response.content)
+        
+        results: List[Optional[ModerationResult]] = []
+        for index, (message, start_time) in enumerate(items):
+            payload = payloads.get(index)
+            results.append(
+                self._result_from_payload(payload, message, start_time) if payload else None
+            )
+        
+        # Reintentar individualmente lo que Gemini no respondió
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            logger.warning(f"⚠️ Lote incompleto: {len(missing)} mensajes se analizan por separado")
+            retried = await asyncio.gather(
+                *(self._invoke_llm(*items[i], llm, single_kind) for i in missing)
+            )
+            for i, result in zip(missing, retried):
+                results[i] = result
+        
+        return results
+
+    def _parse_batch_response(self, response_content: str) -> Dict[int, Dict[str, Any]]:
+        """Extrae el array JSON de un lote → {index: objeto}"""
+        try:
+            response_content = response_content.strip()
+            start_idx = response_content.find('[')
+            end_idx = response_content.rfind(']') + 1
+            if start_idx == -1 or end_idx == 0:
+                raise ValueError("No se encontró un array JSON en la respuesta")
+            
+            parsed = json.loads(response_content[start_idx:end_idx])
+            payloads: Dict[int, Dict[str, Any]] = {}
+            for position, item in enumerate(parsed):
+                if isinstance(item, dict):
+                    payloads[int(item.get('index', position))] = item
+            return payloads
+            
+        except Exception as e:
+            logger.error(f"❌ Error parseando respuesta de lote: {e}")
+            return {}
+
+    def _run_prefilters(self, message: str, start_time: float) -> Optional[ModerationResult]:
+        """Ejecuta los pre-filtros en orden; el primero con veredicto gana"""
+        with STAGE_SECONDS.time(stage="prefilter"):
+            for prefilter in self.prefilters:
+                verdict = prefilter.check(message)
+                if verdict is None:
+                    continue
+            
+                result = ModerationResult(
+                    action=ModerationAction(verdict.action),
+                    reason=verdict.reason,
+                    confidence=verdict.confidence,
+                    message_analyzed=message,
+                    timestamp=datetime.now(),
+                    processing_time=asyncio.get_event_loop().time() - start_time
+                )
+                logger.info(
+                    f"🚦 Veredicto local ({prefilter.name}/{verdict.rule}): "
+                    f"{result.action.value} ({result.confidence:.2f})"
+                )
+                self._log_decision(result, prefilter.name)
+                return result
+            return None
+
+    def _get_cached_result(self, message: str, start_time: float) -> Optional[ModerationResult]:
+        """
+        Devuelve el veredicto en caché para este mensaje, o None.
+        
+        El resultado es una copia con timestamp y processing_time propios
+        (el tiempo de la búsqueda, no el de la llamada original a Gemini).
+        """
+        if self.cache is None:
+            return None
+        
+        with STAGE_SECONDS.time(stage="cache"):
+            cached = self.cache.get(message)
+        if cached is None:
+            return None
+        
+        result = replace(
+            cached,
+            message_analyzed=message,
+            timestamp=datetime.now(),
+            processing_time=asyncio.get_event_loop().time() - start_time
+        )
+        logger.info(f"💾 Veredicto desde caché: {result.action.value} ({result.confidence:.2f})")
+        self._log_decision(result, "cache")
+        return result
+
+    def _store_cached_result(self, message: str, result: ModerationResult) -> None:
+        """Guarda un veredicto en caché (los de error, confianza 0.0, no se guardan)"""
+        if self.cache is not None and result.confidence > 0.0:
+            self.cache.set(message, result)
+
+    def _log_decision(self, result: ModerationResult, source: str, user_id: Optional[int] = None) -> None:
+        """
+        🧾 Registra la decisión en moderation.log como una línea JSON.
+        
+        Va por decision_logger, que escribe aunque LOG_LEVEL sea WARNING.
+        
+        Estas líneas son los datos de entrenamiento del clasificador local
+        (python -m src.bot.moderator.classifier train). "source" indica quién
+        decidió: llm, cache, rules, classifier, error...
+        """
+        record = {
+            "source": source,
+            "action": result.action.value,
+            "confidence": round(result.confidence, 4),
+            "user_id": user_id,
+            "message": result.message_analyzed,
+        }
+        result.source = source
+        DECISIONS_TOTAL.inc(source=source, action=result.action.value)
+        decision_logger.info(DECISION_LOG_MARKER + json.dumps(record, ensure_ascii=False))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """📊 Métricas internas del moderador (caché, etc.)"""
+        stats: Dict[str, Any] = {}
+        if self.prefilters:
+            stats["prefilters"] = {f.name: f.get_stats() for f in self.prefilters}
+        if self.cache is not None:
+            stats["cache"] = {**self.cache.stats.as_dict(), "size": len(self.cache)}
+        if self.singleflight is not None:
+            stats["singleflight"] = self.singleflight.get_stats()
+        stats["scheduler"] = self.scheduler.get_stats()
+        if self.quota.enabled:
+            stats["quota"] = self.quota.get_stats()
+        if self.breaker is not None:
+            stats["circuit_breaker"] = self.breaker.get_stats()
+        if self.batcher is not None:
+            stats["batching"] = self.batcher.get_stats()
+        if self.cascade_tiers:
+            stats["cascade"] = {tier: m.as_dict() for tier, m in self.cascade_tiers.items()}
+            stats["cascade"]["models"] = self.models.get_stats()["clients"]
+        if isinstance(self.llm, RecordingBackend):
+            stats["recording"] = self.llm.get_stats()
+        if self.stream_calls:
+            stats["streaming"] = {
+                "calls": self.stream_calls,
+                "avg_action_latency": round(self.stream_action_latency_total / self.stream_calls, 4),
+                "avg_total_latency": round(self.stream_total_latency_total / self.stream_calls, 4),
+            }
+        if self.two_stage_calls:
+            stats["two_stage"] = {
+                "calls": self.two_stage_calls,
+                "reason_calls": self.two_stage_reason_calls,
+                "avg_action_latency": round(self.two_stage_action_latency_total / self.two_stage_calls, 4),
+            }
+        if self.token_usage:
+            stats["tokens"] = self.token_usage
+        return stats
 
     async def _parse_moderation_response(
         self, 
@@ -317,8 +1538,16 @@ class ContentModerator:
         """
         Parsea la respuesta JSON de Gemini y la convierte en ModerationResult.
         """
-        import json
-        
+        with STAGE_SECONDS.time(stage="parse"):
+            return self._parse_json_verdict(response_content, original_message, start_time)
+
+    def _parse_json_verdict(
+        self,
+        response_content: str,
+        original_message: str,
+        start_time: float
+    ) -> ModerationResult:
+        """Cuerpo de _parse_moderation_response (JSON suelto → ModerationResult)"""
         try:
             # Limpiar la respuesta (a veces Gemini agrega texto extra)
             response_content = response_content.strip()
@@ -333,27 +1562,7 @@ class ContentModerator:
             json_str = response_content[start_idx:end_idx]
             parsed_response = json.loads(json_str)
             
-            # Validar campos requeridos
-            action_str = parsed_response.get('action', '').upper()
-            reason = parsed_response.get('reason', 'Sin razón especificada')
-            confidence = float(parsed_response.get('confidence', 0.5))
-            
-            # Convertir string a enum
-            try:
-                action = ModerationAction(action_str.lower())
-            except ValueError:
-                logger.warning(f"⚠️ Acción desconocida: {action_str}, usando APPROVE")
-                action = ModerationAction.APPROVE
-            
-            # Crear resultado
-            result = ModerationResult(
-                action=action,
-                reason=reason,
-                confidence=min(max(confidence, 0.0), 1.0),  # Clamp entre 0 y 1
-                message_analyzed=original_message,
-                timestamp=datetime.now(),
-                processing_time=asyncio.get_event_loop().time() - start_time
-            )
+            result = self._result_from_payload(parsed_response, original_message, start_time)
             
             logger.debug(f"📊 Resultado parseado: {result}")
             return result
@@ -370,6 +1579,35 @@ class ContentModerator:
                 processing_time=asyncio.get_event_loop().time() - start_time
             ) 
 
+    def _result_from_payload(
+        self,
+        payload: Dict[str, Any],
+        original_message: str,
+        start_time: float
+    ) -> ModerationResult:
+        """Convierte el objeto JSON de Gemini (action/reason/confidence) en ModerationResult"""
+        # Validar campos requeridos
+        action_str = str(payload.get('action', '')).upper()
+        reason = payload.get('reason', 'Sin razón especificada')
+        confidence = float(payload.get('confidence', 0.5))
+        
+        # Convertir string a enum
+        try:
+            action = ModerationAction(action_str.lower())
+        except ValueError:
+            logger.warning(f"⚠️ Acción desconocida: {action_str}, usando APPROVE")
+            action = ModerationAction.APPROVE
+        
+        # Crear resultado
+        return ModerationResult(
+            action=action,
+            reason=reason,
+            confidence=min(max(confidence, 0.0), 1.0),  # Clamp entre 0 y 1
+            message_analyzed=original_message,
+            timestamp=datetime.now(),
+            processing_time=asyncio.get_event_loop().time() - start_time
+        )
+
 
 
 # =============================================================================
@@ -410,10 +1648,59 @@ async def analyze_message(message: str, user_id: Optional[int] = None) -> Modera
         elif result.action == ModerationAction.WARN:
             await context.bot.send_message(chat_id=user_id, text="⚠️ Advertencia...")
     """
-    # Si el moderador no está inicializado, lo inicializamos automáticamente
-    if not moderator.llm:
-        logger.info("🔧 Inicializando moderador automáticamente...")
-        await moderator.initialize()
+    # Si el moderador no está inicializado (TelegramBot.start lo hace al
+    # arrancar), lo inicializamos aquí una sola vez
+    if await moderator.ensure_initialized():
+        logger.info("🔧 Moderador inicializado automáticamente en el primer mensaje")
     
     # Llamar al método de análisis de la instancia global
-    return await moderator.analyze_message(message, user_id) 
\ No newline at end of file
+    return await moderator.analyze_message(message, user_id)
+
+async def analyze_message_streaming(message: str, user_id: Optional[int] = None) -> PendingModeration:
+    """
+    ⚡ VERSIÓN CON STREAMING DE analyze_message()
+    
+    Devuelve un PendingModeration: la acción está disponible en cuanto
+    Gemini la escribe, sin esperar la explicación completa.
+    
+    Ejemplo de uso:
+        pending = await analyze_message_streaming(texto, user_id)
+        if await pending.action() == ModerationAction.DELETE:
+            await message.delete()
+        result = await pending.result()  # razón completa para el DM y el log
+    """
+    if await moderator.ensure_initialized():
+        logger.info("🔧 Moderador inicializado automáticamente en el primer mensaje")
+    
+    return await moderator.analyze_message_streaming(message, user_id)
+
+async def analyze_message_locally(message: str, user_id: Optional[int] = None) -> ModerationResult:
+    """
+    🤝 PRE-FILTROS Y CACHÉ, SIN GEMINI
+    
+    Para usuarios de confianza: el spam obvio se sigue borrando, lo demás
+    se aprueba sin gastar cuota (result.source == "trusted").
+    """
+    if await moderator.ensure_initialized():
+        logger.info("🔧 Moderador inicializado automáticamente en el primer mensaje")
+    
+    return moderator.analyze_message_locally(message, user_id)
+
+async def analyze_message_two_stage(message: str, user_id: Optional[int] = None) -> PendingModeration:
+    """
+    🎯 MODERACIÓN EN DOS ETAPAS
+    
+    Primero una clasificación compacta ("DELETE 0.92"); la explicación se
+    pide en una segunda llamada solo si la acción no es APPROVE, y corre en
+    paralelo con la acción del handler.
+    
+    Ejemplo de uso:
+        pending = await analyze_message_two_stage(texto, user_id)
+        if await pending.action() == ModerationAction.DELETE:
+            await message.delete()
+        result = await pending.result()  # razón para el DM y el log
+    """
+    if await moderator.ensure_initialized():
+        logger.info("🔧 Moderador inicializado automáticamente en el primer mensaje")
+    
+    return await moderator.analyze_message_two_stage(message, user_id)
@@ -0,0 +1,330 @@
+"""
+🔌 BACKENDS DE LLM INTERCAMBIABLES
+
+Antes cada llamada armaba una chain de LangChain (`prompt_template | llm`)
+y el solo hecho de importar langchain_google_genai dominaba el arranque del
+bot. Ahora ContentModerator habla con una interfaz mínima, LLMBackend, y la
+implementación se elige con settings.ai_backend:
+
+- 🦜 "langchain": ChatGoogleGenerativeAI de LangChain (comportamiento original)
+- ⚡ "genai":     SDK oficial google-genai directo, sin capas intermedias
+- 🧪 "fake":      respuestas simuladas en proceso (pruebas, benchmarks, demos)
+
+Los prompts son listas simples de (rol, texto) con variables {así}:
+
+    template = [("system", "Eres un moderador..."), ("human", "Analiza:\\n\\n{message}")]
+    messages = render_prompt(template, {"message": "hola"})
+    response = await backend.ainvoke(messages)
+    response.content, response.usage_metadata
+
+Las dependencias de cada backend se importan SOLO al crearlo.
+"""
+
+import asyncio
+import itertools
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+# [("system", "..."), ("human", "...")]
+PromptMessages = List[Tuple[str, str]]
+
+# Respuesta por defecto del backend simulado (mismo formato que pide el prompt)
+DEFAULT_FAKE_RESPONSE = '{"action": "APPROVE", "reason": "Respuesta simulada", "confidence": 0.99}'
+
+BACKENDS = ("langchain", "genai", "fake")
+
+
+def render_prompt(template: PromptMessages, inputs: Dict[str, Any]) -> PromptMessages:
+    """Sustituye las variables {nombre} de cada mensaje ({{ y }} son llaves literales)"""
+    return [(role, text.format(**inputs)) for role, text in template]
+
+
+@dataclass
+class LLMResponse:
+    """
+    📨 RESPUESTA DE UN BACKEND
+
+    - content: texto generado (en streaming, solo el fragmento nuevo)
+    - usage_metadata: {"input_tokens", "output_tokens", "total_tokens"} si se conoce
+    """
+    content: str
+    usage_metadata: Optional[Dict[str, int]] = None
+
+
+class LLMBackend:
+    """
+    🔌 INTERFAZ BASE DE UN BACKEND
+
+    Implementa ainvoke(); astream() por defecto devuelve la respuesta
+    completa en un solo fragmento.
+    """
+
+    name = "backend"
+    model = ""
+
+    async def ainvoke(self, messages: PromptMessages) -> LLMResponse:
+        raise NotImplementedError
+
+    async def astream(self, messages: PromptMessages) -> AsyncIterator[LLMResponse]:
+        yield await self.ainvoke(messages)
+
+
+# =============================================================================
+# 🦜 LANGCHAIN
+# =============================================================================
+
+def _langchain_text(content: Any) -> str:
+    """El contenido de un AIMessage puede ser texto o lista de bloques"""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in content
+        if isinstance(block, (str, dict))
+    )
+
+
+class LangChainBackend(LLMBackend):
+    """
+    🦜 BACKEND LANGCHAIN
+
+    Envuelve cualquier chat model de LangChain (ChatGoogleGenerativeAI en
+    producción, FakeListChatModel en pruebas). Los mensajes se convierten
+    directamente a SystemMessage/HumanMessage, sin componer Runnables.
+    """
+
+    name = "langchain"
+
+    def __init__(self, chat_model: Any):
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        self.chat_model = chat_model
+        self.model = str(getattr(chat_model, "model", "") or type(chat_model).__name__)
+        self._roles = {"system": SystemMessage, "human": HumanMessage}
+
+    @classmethod
+    def for_gemini(
+        cls,
+        model: str,
+        api_key: str,
+        temperature: float,
+        max_output_tokens: int,
+        max_retries: int,
+        timeout: float,
+        base_url: str = "",
+    ) -> "LangChainBackend":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        endpoint: Dict[str, Any] = {}
+        if base_url:
+            if "base_url" in ChatGoogleGenerativeAI.model_fields:
+                endpoint["base_url"] = base_url  # langchain-google-genai >= 3 (SDK google-genai)
+            else:
+                endpoint = {"client_options": {"api_endpoint": base_url}, "transport": "rest"}
+
+        return cls(ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=api_key,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            max_retries=max_retries,
+            timeout=timeout,
+            **endpoint,
+        ))
+
+    def _to_langchain(self, messages: PromptMessages) -> List[Any]:
+        return [self._roles[role](content=text) for role, text in messages]
+
+    async def ainvoke(self, messages: PromptMessages) -> LLMResponse:
+        response = await self.chat_model.ainvoke(self._to_langchain(messages))
+        return LLMResponse(
+            _langchain_text(response.content),
+            getattr(response, "usage_metadata", None),
+        )
+
+    async def astream(self, messages: PromptMessages) -> AsyncIterator[LLMResponse]:
+        async for chunk in self.chat_model.astream(self._to_langchain(messages)):
+            yield LLMResponse(
+                _langchain_text(chunk.content),
+                getattr(chunk, "usage_metadata", None),
+            )
+
+
+# =============================================================================
+# ⚡ GOOGLE-GENAI DIRECTO
+# =============================================================================
+
+class GenAIBackend(LLMBackend):
+    """
+    ⚡ BACKEND DIRECTO CON EL SDK google-genai
+
+    Requiere el paquete opcional: uv add google-genai
+
+    La configuración de generación (temperatura, tokens, prompt del sistema)
+    se construye una vez por prompt del sistema y se reutiliza.
+    """
+
+    name = "genai"
+
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        temperature: float,
+        max_output_tokens: int,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+        client: Any = None,
+        base_url: str = "",
+    ):
+        try:
+            from google import genai
+            from google.genai import types
+        except ImportError as e:
+            raise ImportError(
+                "El backend 'genai' necesita el paquete google-genai (uv add google-genai)"
+            ) from e
+
+        self.model = model
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self._types = types
+        self._client = client or genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                base_url=base_url or None,
+                timeout=int(timeout * 1000),  # milisegundos
+                retry_options=types.HttpRetryOptions(attempts=max_retries + 1),
+            ),
+        )
+        self._configs: Dict[str, Any] = {}
+
+    def _config(self, system: str) -> Any:
+        config = self._configs.get(system)
+        if config is None:
+            config = self._types.GenerateContentConfig(
+                system_instruction=system or None,
+                temperature=self.temperature,
+                max_output_tokens=self.max_output_tokens,
+            )
+            self._configs[system] = config
+        return config
+
+    @staticmethod
+    def _split(messages: PromptMessages) -> Tuple[str, str]:
+        system = "\n\n".join(text for role, text in messages if role == "system")
+        contents = "\n\n".join(text for role, text in messages if role != "system")
+        return system, contents
+
+    @staticmethod
+    def _usage(metadata: Any) -> Optional[Dict[str, int]]:
+        if metadata is None:
+            return None
+        input_tokens = metadata.prompt_token_count or 0
+        output_tokens = metadata.candidates_token_count or 0
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": metadata.total_token_count or input_tokens + output_tokens,
+        }
+
+    async def ainvoke(self, messages: PromptMessages) -> LLMResponse:
+        system, contents = self._split(messages)
+        response = await self._client.aio.models.generate_content(
+            model=self.model, contents=contents, config=self._config(system)
+        )
+        return LLMResponse(response.text or "", self._usage(response.usage_metadata))
+
+    async def astream(self, messages: PromptMessages) -> AsyncIterator[LLMResponse]:
+        system, contents = self._split(messages)
+        stream = await self._client.aio.models.generate_content_stream(
+            model=self.model, contents=contents, config=self._config(system)
+        )
+        async for chunk in stream:
+            yield LLMResponse(chunk.text or "", self._usage(chunk.usage_metadata))
+
+
+# =============================================================================
+# 🧪 SIMULADO EN PROCESO
+# =============================================================================
+
+class FakeBackend(LLMBackend):
+    """
+    🧪 BACKEND SIMULADO
+
+    Devuelve las respuestas dadas en ciclo, tras `latency` segundos. Reporta
+    tokens aproximados (4 caracteres ≈ 1 token) para ejercitar la cuota.
+
+    Uso:
+        backend = FakeBackend(['{"action": "DELETE", ...}'], latency=0.2)
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        responses: Optional[Sequence[str]] = None,
+        latency: float = 0.0,
+        model: str = "fake",
+        chunk_size: int = 8,
+    ):
+        self.model = model
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self._responses = itertools.cycle(list(responses or [DEFAULT_FAKE_RESPONSE]))
+        self.calls = 0
+
+    def _usage(self, messages: PromptMessages, content: str) -> Dict[str, int]:
+        input_tokens = sum(len(text) for _, text in messages) // 4
+        output_tokens = len(content) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    async def ainvoke(self, messages: PromptMessages) -> LLMResponse:
+        self.calls += 1
+        content = next(self._responses)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return LLMResponse(content, self._usage(messages, content))
+
+    async def astream(self, messages: PromptMessages) -> AsyncIterator[LLMResponse]:
+        self.calls += 1
+        content = next(self._responses)
+        pieces = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)] or [""]
+        for index, piece in enumerate(pieces):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(pieces))
+            last = index == len(pieces) - 1
+            yield LLMResponse(piece, self._usage(messages, content) if last else None)
+
+
+def create_backend(
+    kind: str,
+    model: str,
+    api_key: str = "",
+    temperature: float = 0.3,
+    max_output_tokens: int = 1000,
+    max_retries: int = 3,
+    timeout: float = 30.0,
+    fake_latency: float = 0.0,
+    base_url: str = "",
+) -> LLMBackend:
+    """
+    🏭 Crea el backend indicado por settings.ai_backend
+
+    base_url apunta los backends reales a otro servidor (ej: benchmarks/fake_gemini.py)
+    """
+    if kind == "langchain":
+        return LangChainBackend.for_gemini(
+            model, api_key, temperature, max_output_tokens, max_retries, timeout, base_url
+        )
+    if kind == "genai":
+        return GenAIBackend(
+            model, api_key, temperature, max_output_tokens, max_retries, timeout, base_url=base_url
+        )
+    if kind == "fake":
+        return FakeBackend(latency=fake_latency, model=model)
+    raise ValueError(f"Backend de LLM desconocido: {kind} (opciones: {', '.join(BACKENDS)})")
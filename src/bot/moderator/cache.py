@@ -0,0 +1,166 @@
+"""
+💾 CACHÉ DE VEREDICTOS DEL MODERADOR
+
+Muchos mensajes del grupo se repiten textualmente ("gracias", "hola a todos",
+"👍"...). Cada uno de ellos costaba una llamada completa a Gemini (~0.6-1s).
+
+Este módulo guarda los veredictos ya calculados para no volver a preguntarle
+a la IA lo mismo:
+
+1. 🧹 Normaliza el texto (mayúsculas, espacios, unicode)
+2. 🔑 Construye una llave que incluye modelo, temperatura y hash del prompt
+3. ⏳ Expira entradas viejas (TTL) y descarta las menos usadas (LRU)
+4. 📊 Cuenta hits, misses y evictions para poder ajustar el tamaño
+
+Si cambias el prompt del sistema, el modelo o la temperatura, la llave cambia
+y todo el caché anterior queda invalidado automáticamente.
+"""
+
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Espacios repetidos, tabs y saltos de línea se colapsan en uno solo
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """
+    🧹 Normaliza un mensaje para compararlo con otros
+
+    - Unicode NFKC (letras "raras" → su forma estándar)
+    - casefold (HOLA == hola)
+    - Espacios colapsados y recortados
+
+    Ejemplo:
+        normalize_message("  Hola   A TODOS ") → "hola a todos"
+    """
+    text = unicodedata.normalize("NFKC", message or "")
+    text = _WHITESPACE_RE.sub(" ", text.casefold())
+    return text.strip()
+
+
+def build_cache_namespace(model: str, temperature: float, system_prompt: str) -> str:
+    """
+    🔑 Construye el prefijo de las llaves del caché
+
+    Incluye todo lo que puede cambiar la respuesta de la IA para el mismo
+    texto: modelo, temperatura y el prompt del sistema (como hash).
+    """
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+    return f"{model}|{temperature:.3f}|{prompt_hash}"
+
+
+@dataclass
+class CacheStats:
+    """📊 Contadores del caché (se reportan en get_stats())"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0     # Entradas descartadas por falta de espacio (LRU)
+    expirations: int = 0   # Entradas descartadas por viejas (TTL)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class VerdictCache:
+    """
+    🗃️ CACHÉ LRU + TTL DE VEREDICTOS
+
+    Guarda el último veredicto de la IA para cada texto normalizado.
+
+    CARACTERÍSTICAS:
+    - Acotado: nunca guarda más de `max_size` entradas (descarta las menos usadas)
+    - Con caducidad: cada entrada vive `ttl_seconds` segundos
+    - Con namespace: modelo + temperatura + hash del prompt forman parte de la llave
+
+    Uso:
+        cache = VerdictCache(max_size=10000, ttl_seconds=3600, namespace=ns)
+        cached = cache.get("gracias")
+        if cached is None:
+            result = await llamar_a_gemini(...)
+            cache.set("gracias", result)
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        namespace: str = "",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.stats = CacheStats()
+        self._clock = clock
+        # llave → (momento de expiración, valor)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_namespace(self, namespace: str) -> None:
+        """Cambia el namespace (p.ej. nuevo prompt) y vacía el caché"""
+        if namespace != self.namespace:
+            self.namespace = namespace
+            self._entries.clear()
+
+    def make_key(self, message: str) -> str:
+        """Llave compacta: hash de namespace + texto normalizado"""
+        raw = f"{self.namespace}\x00{normalize_message(message)}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, message: str) -> Optional[Any]:
+        """Devuelve el veredicto guardado o None si no existe / expiró"""
+        key = self.make_key(message)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            # Entrada vieja: se descarta y cuenta como miss
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        # Marcar como usada recientemente
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, message: str, value: Any) -> None:
+        """Guarda un veredicto, descartando los menos usados si no hay espacio"""
+        if self.max_size <= 0:
+            return
+
+        key = self.make_key(message)
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Vacía el caché (los contadores se conservan)"""
+        self._entries.clear()
@@ -0,0 +1,189 @@
+"""
+🔌 CIRCUIT BREAKER ALREDEDOR DE GEMINI
+
+Cuando Gemini está lento o caído, cada mensaje esperaba hasta el timeout
+(30s) con 3 reintentos antes de aprobarse "por seguridad". Durante una caída
+eso bloquea el handler MINUTOS por mensaje.
+
+El circuit breaker ("disyuntor") funciona como el de tu casa:
+
+    CLOSED ──(muchos errores o llamadas lentas)──▶ OPEN
+      ▲                                              │
+      │                                    (pasa open_seconds)
+      │                                              ▼
+      └────────(la prueba sale bien)────────── HALF_OPEN
+                                                     │
+                         OPEN ◀──(la prueba falla)───┘
+
+- 🟢 CLOSED: todo normal, las llamadas pasan
+- 🔴 OPEN: NINGUNA llamada pasa; se usa el veredicto local sin esperar red
+- 🟡 HALF_OPEN: se deja pasar una llamada de prueba para ver si Gemini volvió
+
+Las decisiones se toman sobre una ventana deslizante de las últimas N
+llamadas: tasa de errores y tasa de llamadas lentas.
+"""
+
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"         # 🟢 Normal
+    OPEN = "open"             # 🔴 Gemini no se usa
+    HALF_OPEN = "half_open"   # 🟡 Probando si Gemini volvió
+
+
+class CircuitOpenError(RuntimeError):
+    """El circuito está abierto: no se llama a Gemini"""
+
+
+class CircuitBreaker:
+    """
+    🔌 DISYUNTOR CON VENTANA DESLIZANTE
+
+    Uso:
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, open_seconds=30)
+        if not breaker.allow_request():
+            raise CircuitOpenError()
+        try:
+            response = await llamar_a_gemini()
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(latencia)
+
+    Args:
+        failure_rate_threshold: fracción de errores que abre el circuito
+        slow_call_seconds: una llamada más lenta que esto cuenta como "lenta"
+        slow_rate_threshold: fracción de llamadas lentas que abre el circuito
+        window_size: cuántas llamadas recientes se consideran
+        min_calls: mínimo de llamadas en la ventana antes de evaluar
+        open_seconds: tiempo en OPEN antes de permitir una prueba
+        half_open_max_calls: llamadas de prueba simultáneas en HALF_OPEN
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self.state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        # Ventana: (falló, fue lenta)
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._listeners: List[Callable[[CircuitState, CircuitState], Any]] = []
+
+        # 📊 Métricas
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+
+    def add_listener(self, listener: Callable[[CircuitState, CircuitState], Any]) -> None:
+        """Registra un callback(anterior, nuevo) para cada cambio de estado"""
+        self._listeners.append(listener)
+
+    @property
+    def seconds_until_probe(self) -> float:
+        """Segundos que faltan para permitir una prueba (solo en OPEN)"""
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - self._clock())
+
+    def allow_request(self) -> bool:
+        """¿Se puede llamar a Gemini ahora?"""
+        if self.state == CircuitState.OPEN and self.seconds_until_probe <= 0:
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self, latency: float) -> None:
+        slow = latency >= self.slow_call_seconds
+        if self.state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if slow:
+                self._open()
+            else:
+                self._transition(CircuitState.CLOSED)
+            return
+        self._record(False, slow)
+
+    def record_failure(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            self._open()
+            return
+        self._record(True, False)
+
+    def record_cancelled(self) -> None:
+        """La llamada se canceló (no es culpa de Gemini): solo libera la prueba"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        self._window.append((failed, slow))
+        if self.state != CircuitState.CLOSED or len(self._window) < self.min_calls:
+            return
+        if (
+            self.failure_rate >= self.failure_rate_threshold
+            or self.slow_rate >= self.slow_rate_threshold
+        ):
+            self._open()
+
+    @property
+    def failure_rate(self) -> float:
+        return sum(f for f, _ in self._window) / len(self._window) if self._window else 0.0
+
+    @property
+    def slow_rate(self) -> float:
+        return sum(s for _, s in self._window) / len(self._window) if self._window else 0.0
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._transition(CircuitState.OPEN)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        previous = self.state
+        self.state = new_state
+        if new_state == CircuitState.CLOSED:
+            self._window.clear()
+        if new_state != CircuitState.HALF_OPEN:
+            self._half_open_in_flight = 0
+
+        key = f"{previous.value}->{new_state.value}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        for listener in self._listeners:
+            listener(previous, new_state)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failure_rate": round(self.failure_rate, 3),
+            "slow_rate": round(self.slow_rate, 3),
+            "window_calls": len(self._window),
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
@@ -0,0 +1,397 @@
+"""
+🧮 CLASIFICADOR LOCAL ENTRENABLE (PRIMERA ETAPA ANTES DE GEMINI)
+
+Cada decisión de Gemini queda registrada en moderation.log. Este módulo usa
+ese historial para entrenar un clasificador ligero (Naive Bayes multinomial
+con n-gramas "hasheados", en Python puro) que responde localmente los
+mensajes en los que está MUY seguro y deja a Gemini solo la banda dudosa.
+
+PIEZAS:
+- extract_features(): texto → índices de n-gramas (palabras y caracteres)
+- NaiveBayesClassifier: entrenar, predecir, guardar/cargar en JSON
+- ClassifierPreFilter: el clasificador enchufado como PreFilter
+- load_training_data(): lee las decisiones "🧾 Decisión:" de moderation.log
+- CLI: entrenar y evaluar desde la terminal
+
+USO DESDE LA TERMINAL:
+    python -m src.bot.moderator.classifier train --log moderation.log --out moderation_model.json
+    python -m src.bot.moderator.classifier evaluate --model moderation_model.json --log moderation.log
+
+HOLDOUT: cada mensaje cae en entrenamiento o en prueba según un hash de su
+texto normalizado (no del orden del log). El modelo guardado se entrena SOLO
+con la parte de entrenamiento, y `evaluate` mide por defecto solo la parte
+de prueba: aunque el log crezca, un mensaje (o sus copias) nunca está en
+ambos lados.
+"""
+
+import argparse
+import json
+import math
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import normalize_message
+from .prefilter import PreFilter, PreFilterVerdict
+
+# Marca que ai_analyzer.py escribe en el log por cada decisión de Gemini
+DECISION_LOG_MARKER = "🧾 Decisión: "
+
+DEFAULT_BUCKETS = 2 ** 18
+
+
+def extract_features(message: str, n_buckets: int = DEFAULT_BUCKETS) -> List[int]:
+    """
+    🔢 Convierte un mensaje en una lista de índices de features
+
+    Features:
+    - Palabras sueltas y pares de palabras (unigramas y bigramas)
+    - Trigramas de caracteres de cada palabra (robusto a typos: "grasias")
+
+    Cada feature se "hashea" (crc32, estable entre ejecuciones) a uno de
+    n_buckets casilleros, así el modelo tiene tamaño acotado sin vocabulario.
+    """
+    words = normalize_message(message).split()
+    grams: List[str] = []
+
+    grams.extend(f"w:{w}" for w in words)
+    grams.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        grams.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+
+    if not words:
+        grams.append("empty")
+
+    return [zlib.crc32(g.encode("utf-8")) % n_buckets for g in grams]
+
+
+class NaiveBayesClassifier:
+    """
+    📊 NAIVE BAYES MULTINOMIAL SOBRE N-GRAMAS HASHEADOS
+
+    Aprende P(acción | mensaje) contando qué features aparecen con cada
+    acción en el historial. Es rápido de entrenar (segundos con miles de
+    mensajes) y de evaluar (microsegundos por mensaje).
+
+    Uso:
+        model = NaiveBayesClassifier()
+        model.fit(textos, acciones)
+        action, probability = model.predict("hola a todos")
+        model.save("moderation_model.json")
+    """
+
+    def __init__(self, n_buckets: int = DEFAULT_BUCKETS, alpha: float = 0.5):
+        self.n_buckets = n_buckets
+        self.alpha = alpha                                   # Suavizado de Laplace
+        self.classes: List[str] = []
+        self.holdout_ratio = 0.0                             # Fracción reservada para evaluar (0 = ninguna)
+        self.class_counts: Dict[str, int] = {}               # Mensajes por acción
+        self.feature_counts: Dict[str, Dict[int, int]] = {}  # acción → {bucket: conteo}
+        self._prepare()
+
+    def _prepare(self) -> None:
+        """Precalcula logaritmos para que predict() sea barato"""
+        total_docs = sum(self.class_counts.values())
+        self._log_prior: Dict[str, float] = {}
+        self._log_denominator: Dict[str, float] = {}
+        self._known_buckets = set()
+        for label in self.classes:
+            self._log_prior[label] = math.log(self.class_counts[label] / total_docs)
+            total_features = sum(self.feature_counts[label].values())
+            self._log_denominator[label] = math.log(total_features + self.alpha * self.n_buckets)
+            self._known_buckets.update(self.feature_counts[label])
+
+    def fit(self, texts: Iterable[str], labels: Iterable[str]) -> "NaiveBayesClassifier":
+        """Entrena desde cero con pares (texto, acción)"""
+        class_counts: Counter = Counter()
+        feature_counts: Dict[str, Counter] = defaultdict(Counter)
+
+        for text, label in zip(texts, labels):
+            class_counts[label] += 1
+            feature_counts[label].update(extract_features(text, self.n_buckets))
+
+        self.classes = sorted(class_counts)
+        self.class_counts = dict(class_counts)
+        self.feature_counts = {label: dict(feature_counts[label]) for label in self.classes}
+        self._prepare()
+        return self
+
+    def predict_proba(self, message: str) -> Dict[str, float]:
+        """Probabilidad de cada acción para este mensaje"""
+        if not self.classes:
+            return {}
+
+        features = Counter(extract_features(message, self.n_buckets))
+        scores: Dict[str, float] = {}
+        for label in self.classes:
+            counts = self.feature_counts[label]
+            denominator = self._log_denominator[label]
+            score = self._log_prior[label]
+            for bucket, times in features.items():
+                score += times * (math.log(counts.get(bucket, 0) + self.alpha) - denominator)
+            scores[label] = score
+
+        # Softmax estable (log-sum-exp)
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def known_fraction(self, message: str) -> float:
+        """
+        Fracción de features del mensaje que aparecieron en el entrenamiento.
+
+        Naive Bayes es muy "confiado" con textos que nunca vio; con pocas
+        features conocidas su probabilidad no significa nada.
+        """
+        features = extract_features(message, self.n_buckets)
+        return sum(bucket in self._known_buckets for bucket in features) / len(features)
+
+    def predict(self, message: str) -> Tuple[Optional[str], float]:
+        """Devuelve (acción más probable, probabilidad)"""
+        proba = self.predict_proba(message)
+        if not proba:
+            return None, 0.0
+        label = max(proba, key=proba.get)
+        return label, proba[label]
+
+    # === SERIALIZACIÓN (JSON, sin pickle) ===
+
+    def save(self, path: str) -> None:
+        data = {
+            "version": 1,
+            "n_buckets": self.n_buckets,
+            "alpha": self.alpha,
+            "holdout_ratio": self.holdout_ratio,
+            "class_counts": self.class_counts,
+            "feature_counts": {
+                label: {str(bucket): count for bucket, count in counts.items()}
+                for label, counts in self.feature_counts.items()
+            },
+        }
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesClassifier":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        model = cls(n_buckets=data["n_buckets"], alpha=data["alpha"])
+        model.holdout_ratio = data.get("holdout_ratio", 0.0)
+        model.class_counts = data["class_counts"]
+        model.classes = sorted(model.class_counts)
+        model.feature_counts = {
+            label: {int(bucket): count for bucket, count in counts.items()}
+            for label, counts in data["feature_counts"].items()
+        }
+        model._prepare()
+        return model
+
+
+class ClassifierPreFilter(PreFilter):
+    """
+    🚪 EL CLASIFICADOR COMO COMPUERTA ANTES DE GEMINI
+
+    - Predice "approve" con probabilidad ≥ approve_threshold → APPROVE local
+    - Predice otra acción con probabilidad ≥ action_threshold → esa acción local
+    - Cualquier otra cosa (la banda dudosa) → None, decide Gemini
+    - Mensajes con pocas features conocidas (< min_known_fraction) → None
+
+    El umbral para acciones destructivas suele ser más alto: borrar por
+    error es peor que aprobar por error.
+    """
+
+    name = "classifier"
+
+    def __init__(
+        self,
+        model: NaiveBayesClassifier,
+        approve_threshold: float = 0.97,
+        action_threshold: float = 0.995,
+        min_known_fraction: float = 0.6,
+    ):
+        self.model = model
+        self.approve_threshold = approve_threshold
+        self.action_threshold = action_threshold
+        self.min_known_fraction = min_known_fraction
+        self.hits: Counter = Counter()
+        self.forwarded = 0
+
+    def check(self, message: str) -> Optional[PreFilterVerdict]:
+        if self.model.known_fraction(message) < self.min_known_fraction:
+            self.forwarded += 1
+            return None
+
+        label, probability = self.model.predict(message)
+        threshold = self.approve_threshold if label == "approve" else self.action_threshold
+
+        if label is None or probability < threshold:
+            self.forwarded += 1
+            return None
+
+        self.hits[label] += 1
+        return PreFilterVerdict(
+            label,
+            f"Clasificador local ({probability:.0%} de certeza)",
+            probability,
+            f"nb_{label}",
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**dict(self.hits), "forwarded": self.forwarded}
+
+
+# =============================================================================
+# 📚 DATOS DE ENTRENAMIENTO Y EVALUACIÓN
+# =============================================================================
+
+def load_training_data(log_path: str, sources: Tuple[str, ...] = ("llm",)) -> Tuple[List[str], List[str]]:
+    """
+    📖 Lee las decisiones registradas en moderation.log
+
+    Solo usa por defecto las decisiones de Gemini (source="llm"): entrenar
+    con veredictos del propio clasificador o del pre-filtro solo reforzaría
+    sus errores.
+    """
+    texts: List[str] = []
+    labels: List[str] = []
+
+    with open(log_path, encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            idx = line.find(DECISION_LOG_MARKER)
+            if idx == -1:
+                continue
+            try:
+                record = json.loads(line[idx + len(DECISION_LOG_MARKER):])
+            except json.JSONDecodeError:
+                continue
+            if record.get("source") not in sources or not record.get("message"):
+                continue
+            texts.append(record["message"])
+            labels.append(record["action"])
+
+    return texts, labels
+
+
+def evaluate(
+    model: NaiveBayesClassifier,
+    texts: List[str],
+    labels: List[str],
+    approve_threshold: float,
+    action_threshold: float,
+    min_known_fraction: float = 0.6,
+) -> Dict[str, float]:
+    """
+    📏 Mide el clasificador como compuerta
+
+    - accuracy: aciertos sobre TODOS los mensajes (sin compuerta)
+    - coverage: fracción que se respondería localmente (sin Gemini)
+    - gated_accuracy: aciertos SOLO sobre los respondidos localmente
+    """
+    gate = ClassifierPreFilter(model, approve_threshold, action_threshold, min_known_fraction)
+    correct = covered = covered_correct = 0
+
+    for text, label in zip(texts, labels):
+        predicted, _ = model.predict(text)
+        correct += predicted == label
+        verdict = gate.check(text)
+        if verdict is not None:
+            covered += 1
+            covered_correct += verdict.action == label
+
+    total = len(texts) or 1
+    return {
+        "samples": len(texts),
+        "accuracy": round(correct / total, 4),
+        "coverage": round(covered / total, 4),
+        "gated_accuracy": round(covered_correct / covered, 4) if covered else 0.0,
+    }
+
+
+def in_holdout(text: str, ratio: float) -> bool:
+    """¿El mensaje pertenece a la parte de prueba? (estable: depende solo del texto normalizado)"""
+    return zlib.crc32(normalize_message(text).encode("utf-8")) % 10_000 < ratio * 10_000
+
+
+def split_holdout(
+    texts: List[str], labels: List[str], ratio: float
+) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """(textos y acciones de entrenamiento, textos y acciones de prueba)"""
+    train_x: List[str] = []
+    train_y: List[str] = []
+    test_x: List[str] = []
+    test_y: List[str] = []
+    for text, label in zip(texts, labels):
+        if in_holdout(text, ratio):
+            test_x.append(text)
+            test_y.append(label)
+        else:
+            train_x.append(text)
+            train_y.append(label)
+    return train_x, train_y, test_x, test_y
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """🖥️ CLI: train / evaluate"""
+    parser = argparse.ArgumentParser(description="Clasificador local de moderación")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="Entrenar desde moderation.log")
+    train.add_argument("--log", default="moderation.log")
+    train.add_argument("--out", default="moderation_model.json")
+    train.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS)
+    train.add_argument("--alpha", type=float, default=0.5)
+    train.add_argument("--test-ratio", type=float, default=0.2, help="Fracción reservada para evaluar")
+
+    ev = sub.add_parser("evaluate", help="Evaluar un modelo guardado")
+    ev.add_argument("--model", default="moderation_model.json")
+    ev.add_argument("--log", default="moderation.log")
+    ev.add_argument(
+        "--split", choices=("holdout", "all"), default="holdout",
+        help="holdout: solo mensajes que el modelo no vio al entrenar; all: todo el log",
+    )
+
+    for p in (train, ev):
+        p.add_argument("--approve-threshold", type=float, default=0.97)
+        p.add_argument("--action-threshold", type=float, default=0.995)
+        p.add_argument("--min-known-fraction", type=float, default=0.6)
+
+    args = parser.parse_args(argv)
+    texts, labels = load_training_data(args.log)
+    if not texts:
+        raise SystemExit(f"❌ No hay decisiones '{DECISION_LOG_MARKER.strip()}' en {args.log}")
+
+    print(f"📚 {len(texts)} decisiones: {dict(Counter(labels))}")
+
+    thresholds = (args.approve_threshold, args.action_threshold, args.min_known_fraction)
+
+    if args.command == "train":
+        train_x, train_y, test_x, test_y = split_holdout(texts, labels, args.test_ratio)
+        if len(set(train_y)) < 2:
+            # Con una sola clase el modelo aprobaría (o borraría) TODO localmente
+            raise SystemExit(
+                f"❌ Se necesitan al menos dos acciones distintas para entrenar "
+                f"(hay: {dict(Counter(train_y))}); no se guarda el modelo"
+            )
+        model = NaiveBayesClassifier(n_buckets=args.buckets, alpha=args.alpha).fit(train_x, train_y)
+        model.holdout_ratio = args.test_ratio
+        if test_x:
+            report = evaluate(model, test_x, test_y, *thresholds)
+            print(f"📏 Holdout ({args.test_ratio:.0%}): {report}")
+        # El modelo guardado NO ve el holdout: así `evaluate` puede seguir midiéndolo
+        model.save(args.out)
+        print(f"✅ Modelo guardado en {args.out}")
+    else:
+        model = NaiveBayesClassifier.load(args.model)
+        if args.split == "holdout":
+            if not model.holdout_ratio:
+                raise SystemExit("❌ El modelo no reservó holdout al entrenar; usa --split all o reentrénalo")
+            _, _, texts, labels = split_holdout(texts, labels, model.holdout_ratio)
+            if not texts:
+                raise SystemExit(f"❌ Ninguna decisión de {args.log} cae en el holdout")
+        report = evaluate(model, texts, labels, *thresholds)
+        print(f"📏 Evaluación ({args.split}): {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+🌊 LIMITADOR DE FLOOD (VENTANA DESLIZANTE POR USUARIO Y CHAT)
+
+`rate_limit_enabled` y `max_messages_per_minute` existían en Settings pero
+nadie los aplicaba: un flooder mandaba 100 mensajes y los 100 iban a Gemini.
+
+Este limitador cuenta los mensajes de cada (chat, usuario) en una ventana
+deslizante aproximada de 60 s con DOS contadores (ventana anterior y actual):
+
+    estimado = anterior × (parte de la ventana anterior que aún cae en los últimos 60 s) + actual
+
+- ⚡ O(1) por mensaje y O(1) de memoria por usuario (sin guardar timestamps)
+- 📦 Acotado: como máximo `max_keys` usuarios (LRU)
+- 🧹 Los usuarios inactivos por más de dos ventanas se desalojan solos
+
+Quien pasa el límite recibe una acción local (borrar o silenciar) sin
+llamar a la IA. Con action="log" solo queda registrado (para observar el
+tráfico antes de activarlo).
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+
+from ..services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_KEYS = 100_000
+EVICTIONS_PER_HIT = 2  # Desalojos de inactivos por mensaje (costo amortizado O(1))
+
+FLOOD_TOTAL = metrics.counter(
+    "viperguard_flood_messages_total",
+    "Mensajes por encima del límite de flood, por chat y acción tomada",
+    ("chat", "action"),
+)
+
+
+class SlidingWindowCounter:
+    """
+    🌊 CONTADOR DE VENTANA DESLIZANTE POR LLAVE
+
+    Uso:
+        counter = SlidingWindowCounter(limit=10, window=60)
+        excess = counter.hit((chat_id, user_id))
+        if excess:  # 1 = acaba de pasar el límite, 2+ = sigue pasándolo
+            ...
+
+    Args:
+        limit: Mensajes permitidos por ventana
+        window: Tamaño de la ventana en segundos
+        max_keys: Llaves recordadas como máximo (se olvidan las menos recientes)
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float = 60.0,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._clock = clock
+        # llave → [índice de ventana, conteo ventana anterior, conteo ventana actual]
+        self._entries: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+
+        # 📊 Métricas
+        self.hits = 0
+        self.exceeded = 0
+        self.evicted_idle = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def hit(self, key: Hashable) -> int:
+        """Cuenta un mensaje de `key`; devuelve cuántos mensajes lleva por encima del límite (0 = dentro)"""
+        now = self._clock()
+        index = int(now // self.window)
+        self.hits += 1
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [index, 0, 0]
+        elif entry[0] != index:
+            # Ventana nueva: la actual pasa a anterior (si era la inmediata anterior)
+            entry[1] = entry[2] if entry[0] == index - 1 else 0
+            entry[0], entry[2] = index, 0
+        entry[2] += 1
+        self._entries.move_to_end(key)
+        self._evict(index)
+
+        elapsed_fraction = (now - index * self.window) / self.window
+        estimate = entry[1] * (1.0 - elapsed_fraction) + entry[2]
+        excess = max(0, int(estimate) - self.limit)
+        if excess:
+            self.exceeded += 1
+        return excess
+
+    def _evict(self, index: int) -> None:
+        """🧹 Quita las llaves más antiguas si sobran o si llevan dos ventanas inactivas"""
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+        for _ in range(EVICTIONS_PER_HIT):
+            oldest_key = next(iter(self._entries))
+            if self._entries[oldest_key][0] >= index - 1:
+                break  # Orden LRU: si la más vieja sigue viva, las demás también
+            del self._entries[oldest_key]
+            self.evicted_idle += 1
+
+
+class FloodLimiter:
+    """
+    🌊 DETECTOR DE FLOOD POR (CHAT, USUARIO) CON MÉTRICAS POR CHAT
+
+    Args:
+        max_per_minute: Mensajes por minuto permitidos a cada usuario en cada chat
+        action: "delete" (borrar lo que pase el límite), "timeout" (además silenciar) o "log" (solo contar)
+    """
+
+    def __init__(self, max_per_minute: int, action: str = "delete", max_keys: int = DEFAULT_MAX_KEYS):
+        self.action = action
+        self.counter = SlidingWindowCounter(max_per_minute, 60.0, max_keys)
+        self.flooded_by_chat: Dict[int, int] = {}
+
+    def check(self, chat_id: int, user_id: int) -> int:
+        """Registra el mensaje; devuelve los mensajes por encima del límite (0 = no es flood)"""
+        excess = self.counter.hit((chat_id, user_id))
+        if excess:
+            self.flooded_by_chat[chat_id] = self.flooded_by_chat.get(chat_id, 0) + 1
+            FLOOD_TOTAL.inc(chat=chat_id, action=self.action)
+            if excess == 1:
+                logger.warning(
+                    f"🌊 Flood de usuario {user_id} en chat {chat_id}: "
+                    f"más de {self.counter.limit} mensajes por minuto ({self.action})"
+                )
+        return excess
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit_per_minute": self.counter.limit,
+            "action": self.action,
+            "tracked_users": len(self.counter),
+            "messages": self.counter.hits,
+            "flooded": self.counter.exceeded,
+            "evicted_idle": self.counter.evicted_idle,
+            "flooded_by_chat": dict(self.flooded_by_chat),
+        }
@@ -0,0 +1,108 @@
+"""
+🧭 REGISTRO DE MODELOS Y CASCADA RÁPIDO → FUERTE
+
+Antes el moderador usaba UN solo modelo (settings.ai_model) para todo. Con
+la cascada, un modelo barato y rápido responde primero y solo los casos
+difíciles se vuelven a revisar con el modelo fuerte:
+
+    mensaje → 🐇 modelo rápido → ¿confianza alta y acción no destructiva?
+                                     │ sí → veredicto final
+                                     │ no ▼
+                               🦉 modelo fuerte → veredicto final
+
+Este módulo tiene dos piezas pequeñas:
+
+1. ModelRegistry: un cliente ChatGoogleGenerativeAI por (modelo, max_tokens),
+   creado una vez y reutilizado (mantiene su conexión HTTP abierta)
+2. TierMetrics: llamadas, latencia y escaladas por nivel de la cascada
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ModelRegistry:
+    """
+    🗂️ POOL DE CLIENTES POR NOMBRE DE MODELO
+
+    Uso:
+        registry = ModelRegistry(lambda model, max_tokens: ChatGoogleGenerativeAI(...))
+        fast = registry.get("gemini-1.5-flash-8b", 1000)
+        same = registry.get("gemini-1.5-flash-8b", 1000)   # mismo objeto
+    """
+
+    def __init__(self, factory: Callable[[str, int], Any]):
+        self._factory = factory
+        self._clients: Dict[Tuple[str, int], Any] = {}
+
+    def get(self, model: str, max_output_tokens: int) -> Any:
+        """Devuelve el cliente de ese modelo, creándolo la primera vez"""
+        key = (model, max_output_tokens)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._factory(model, max_output_tokens)
+            self._clients[key] = client
+        return client
+
+    def register(self, model: str, max_output_tokens: int, client: Any) -> None:
+        """Registra un cliente ya construido (útil para clientes falsos en pruebas)"""
+        self._clients[(model, max_output_tokens)] = client
+
+    def clear(self) -> None:
+        self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"clients": [f"{model}:{tokens}" for model, tokens in self._clients]}
+
+
+class TierMetrics:
+    """
+    📊 MÉTRICAS DE UN NIVEL DE LA CASCADA
+
+    - calls / latency: cuántas veces respondió este nivel y cuánto tardó
+    - escalated: cuántas de sus respuestas se mandaron al siguiente nivel
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.calls = 0
+        self.escalated = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, latency: float, escalated: bool = False) -> None:
+        self.calls += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        if escalated:
+            self.escalated += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "calls": self.calls,
+            "avg_latency": round(self.latency_total / self.calls, 4) if self.calls else 0.0,
+            "max_latency": round(self.latency_max, 4),
+            "escalation_rate": round(self.escalated / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+def should_escalate(
+    action: str,
+    confidence: float,
+    threshold: float,
+    escalate_destructive: bool = True,
+    destructive_actions: Optional[Tuple[str, ...]] = ("delete", "ban"),
+) -> bool:
+    """
+    ¿El veredicto del modelo rápido debe revisarlo el modelo fuerte?
+
+    - Veredicto de error (confianza 0.0: timeout, respuesta ilegible) → sí, siempre
+    - Confianza por debajo del umbral → sí
+    - Acción destructiva (borrar/banear) y escalate_destructive → sí
+    """
+    if confidence <= 0.0 or confidence < threshold:
+        return True
+    return bool(escalate_destructive and destructive_actions and action in destructive_actions)
@@ -0,0 +1,239 @@
+"""
+🚦 PRE-FILTRO LOCAL (ANTES DE GEMINI)
+
+El prompt del moderador dice que ~95% de los mensajes se aprueban, pero cada
+uno esperaba una llamada a Gemini. Este módulo decide LOCALMENTE (en
+microsegundos) los casos obvios y solo deja pasar a la IA los dudosos:
+
+1. 🟢 Mensajes trivialmente seguros → APPROVE
+   ("hola", "gracias", "👍", "jajaja", "ok"...)
+2. 🔴 Spam evidente → DELETE, solo si coinciden VARIAS reglas de spam
+   (link de invitación + promesa de dinero, cripto + MLM...)
+3. 🤷 Todo lo demás → None (se envía a Gemini), incluidos los mensajes
+   "sospechosos" con una sola señal: "ingresos pasivos" o un link de
+   discord.gg también aparecen en conversaciones legítimas
+
+Cada regla tiene nombre y contador de hits para poder afinarlas con datos.
+
+DISEÑO "ENCHUFABLE":
+- PreFilter: interfaz base (un método check())
+- RuleBasedPreFilter: implementación con regex y léxico
+- ContentModerator ejecuta su lista de pre-filtros en orden; el primero que
+  devuelve un veredicto gana.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
+
+from .cache import normalize_message
+
+
+@dataclass(frozen=True)
+class PreFilterVerdict:
+    """
+    📋 VEREDICTO LOCAL DE UN PRE-FILTRO
+
+    - action: valor de ModerationAction ("approve", "delete", ...)
+    - reason: explicación en español (se muestra en logs y advertencias)
+    - confidence: qué tan segura es la regla (0.0 a 1.0)
+    - rule: nombre de la regla que decidió (para métricas)
+    """
+    action: str
+    reason: str
+    confidence: float
+    rule: str
+
+
+class PreFilter:
+    """
+    🔌 INTERFAZ BASE DE UN PRE-FILTRO
+
+    Implementa check() devolviendo un PreFilterVerdict si estás seguro,
+    o None para dejar que decida la siguiente etapa (otro filtro o Gemini).
+    """
+
+    name = "prefilter"
+
+    def check(self, message: str) -> Optional[PreFilterVerdict]:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, int]:
+        return {}
+
+
+# =============================================================================
+# 🔴 REGLAS DE SPAM EVIDENTE
+# =============================================================================
+# (nombre de la regla, regex, razón que se muestra al usuario)
+# Son conservadoras a propósito: una pregunta técnica sobre la API de Binance
+# NO debe caer aquí, solo las promesas de dinero y los links de invitación.
+# Cada regla es UNA señal; se borra localmente con `min_spam_signals` señales.
+
+SPAM_RULES: List[Tuple[str, str, str]] = [
+    (
+        "invite_link",
+        r"(?:t\.me|telegram\.(?:me|dog))/(?:joinchat/|\+)[\w-]+"
+        r"|chat\.whatsapp\.com/\w+"
+        r"|discord(?:\.gg|(?:app)?\.com/invite)/\w+",
+        "Link de invitación a otro grupo (spam)",
+    ),
+    (
+        "crypto_profit",
+        # Mención de cripto/trading Y promesa de dinero, en cualquier orden
+        r"^(?=.*\b(?:bitcoin|btc|usdt|cripto\w*|crypto\w*|forex|binance|trading)\b)"
+        r"(?=.*\b(?:ganancias? (?:diarias|garantizadas|seguras)|ganar? dinero|"
+        r"earn money|guaranteed (?:profits?|returns?)|daily profits?|"
+        r"(?:retornos?|rendimientos?) garantizados?|duplica(?:r)? tu (?:dinero|inversi[oó]n)|"
+        r"double your|inversi[oó]n m[ií]nima|minimum (?:deposit|investment)))",
+        "Promoción de criptomonedas/trading con promesa de ganancias",
+    ),
+    (
+        "money_promise",
+        # Con moneda explícita: "make 3 daily commits" no es una promesa de dinero
+        r"\b(?:gana|ganar|earn|make)\s+(?:hasta\s+)?"
+        r"(?:(?:\$|usd)\s*\d[\d.,]*\s*(?:usd|d[oó]lares|pesos|mxn)?|\d[\d.,]*\s*(?:\$|usd|d[oó]lares|pesos|mxn))"
+        r"\s*(?:al d[ií]a|diarios?|por d[ií]a|a la semana|semanales?|per day|daily|weekly)",
+        "Promesa de dinero fácil (estafa)",
+    ),
+    (
+        "mlm",
+        r"\b(?:multinivel|network marketing|marketing multinivel|"
+        r"s[eé] tu propio jefe|be your own boss|ingresos? pasivos?|"
+        r"libertad financiera|financial freedom)\b",
+        "Esquema piramidal / MLM",
+    ),
+    (
+        "dm_solicitation",
+        r"\b(?:escr[ií]beme|m[aá]ndame|env[ií]ame|contact(?:a|ame)|dm me|inbox me)\b"
+        r".{0,40}\b(?:privado|dm|inbox|whatsapp|wa\.me)\b"
+        r".{0,80}\b(?:invers\w*|ganancias?|cripto\w*|crypto\w*|forex|trading)\b",
+        "Solicitud de contacto privado para inversión",
+    ),
+]
+
+# =============================================================================
+# 🟢 LÉXICO DE MENSAJES TRIVIALMENTE SEGUROS
+# =============================================================================
+# Se comparan contra el mensaje normalizado y sin signos de puntuación.
+
+SAFE_PHRASES: FrozenSet[str] = frozenset({
+    # Saludos
+    "hola", "hola a todos", "hola todos", "holi", "hey", "buenas",
+    "buen día", "buen dia", "buenos días", "buenos dias",
+    "buenas tardes", "buenas noches", "saludos", "saludos a todos",
+    "qué tal", "que tal", "hi", "hello",
+    # Agradecimientos
+    "gracias", "muchas gracias", "mil gracias", "gracias a todos",
+    "muchas gracias a todos", "thanks", "thank you", "thx",
+    "de nada", "con gusto",
+    # Respuestas cortas
+    "ok", "okay", "oki", "va", "vale", "sale", "si", "sí", "no", "claro",
+    "claro que sí", "claro que si", "exacto", "correcto", "listo", "perfecto",
+    "de acuerdo", "entiendo", "ya", "ah ok", "ahh ok", "ya veo",
+    # Felicitaciones / bienvenida
+    "bienvenido", "bienvenida", "bienvenidos", "bienvenidas",
+    "felicidades", "felicitaciones", "excelente", "genial", "increíble",
+    "que bien", "qué bien", "muy bien", "buenísimo", "buenisimo", "chido",
+    "nice", "cool", "great",
+})
+
+# Risas y muletillas: jajaja, jejeje, xD, lol...
+SAFE_PATTERNS: List[Tuple[str, str]] = [
+    ("laughter", r"(?:j[aeiou]){2,}j?|(?:h[aeiou]){2,}h?|x+d+|lo+l|lmao+|rofl"),
+    ("plus_one", r"\+1|\+100"),
+]
+
+# Emojis que por sí solos SÍ pueden ser ofensivos (no se aprueban localmente)
+UNSAFE_EMOJIS: FrozenSet[str] = frozenset({"🖕"})
+
+# Signos que se ignoran al comparar con el léxico
+_PUNCTUATION_RE = re.compile(r"[!¡?¿.,;:…~*\"'()]+")
+_URL_RE = re.compile(r"https?://|www\.|\.\w{2,4}/")
+
+
+class RuleBasedPreFilter(PreFilter):
+    """
+    ⚡ PRE-FILTRO BASADO EN REGLAS
+
+    Todas las expresiones se compilan una sola vez al crear la instancia,
+    así que check() cuesta microsegundos.
+
+    ORDEN DE EVALUACIÓN:
+    1. Reglas de spam (si check_spam=True): `min_spam_signals` o más → DELETE;
+       menos (pero alguna) → None, "sospechoso" (decide Gemini)
+    2. Léxico de mensajes seguros → APPROVE
+    3. Mensajes de solo emojis → APPROVE
+    4. Nada coincide → None (decide Gemini)
+
+    Uso:
+        prefilter = RuleBasedPreFilter(max_safe_length=40)
+        verdict = prefilter.check("¡Gracias!")
+        # verdict.action = "approve", verdict.rule = "safe_phrase"
+    """
+
+    name = "rules"
+
+    def __init__(self, max_safe_length: int = 40, check_spam: bool = True, min_spam_signals: int = 2):
+        self.max_safe_length = max_safe_length
+        self.check_spam = check_spam
+        self.min_spam_signals = min_spam_signals
+
+        self._spam_rules: List[Tuple[str, Pattern[str], str]] = [
+            (name, re.compile(pattern, re.IGNORECASE | re.DOTALL), reason)
+            for name, pattern, reason in SPAM_RULES
+        ]
+        self._safe_patterns: List[Tuple[str, Pattern[str]]] = [
+            (name, re.compile(pattern, re.IGNORECASE))
+            for name, pattern in SAFE_PATTERNS
+        ]
+
+        # 📊 Hits por regla + mensajes que se mandaron a Gemini (y cuántos con alguna señal de spam)
+        self.hits: Counter = Counter()
+        self.forwarded = 0
+        self.suspicious = 0
+
+    def check(self, message: str) -> Optional[PreFilterVerdict]:
+        """Devuelve un veredicto local o None si el mensaje es dudoso"""
+        signals = self._spam_signals(message) if self.check_spam else []
+        if len(signals) >= self.min_spam_signals:
+            verdict: Optional[PreFilterVerdict] = PreFilterVerdict("delete", signals[0][1], 0.95, signals[0][0])
+        elif signals:
+            verdict = None  # Sospechoso: una sola señal no basta para borrar sin Gemini
+            self.suspicious += 1
+        else:
+            verdict = self._check_safe(message)
+
+        if verdict is None:
+            self.forwarded += 1
+        else:
+            self.hits[verdict.rule] += 1
+        return verdict
+
+    def _spam_signals(self, message: str) -> List[Tuple[str, str]]:
+        """(regla, razón) de cada regla de spam que coincide, en el orden de SPAM_RULES"""
+        return [(name, reason) for name, pattern, reason in self._spam_rules if pattern.search(message)]
+
+    def _check_safe(self, message: str) -> Optional[PreFilterVerdict]:
+        text = normalize_message(message)
+        if not text or len(text) > self.max_safe_length or _URL_RE.search(text):
+            return None
+
+        bare = _PUNCTUATION_RE.sub("", text).strip()
+
+        if bare in SAFE_PHRASES:
+            return PreFilterVerdict("approve", "Mensaje corto de cortesía", 0.99, "safe_phrase")
+
+        for name, pattern in self._safe_patterns:
+            if pattern.fullmatch(bare.replace(" ", "")):
+                return PreFilterVerdict("approve", "Reacción corta", 0.99, name)
+
+        # Solo emojis / símbolos (sin letras ni números)
+        if not any(ch.isalnum() for ch in text) and not any(e in text for e in UNSAFE_EMOJIS):
+            return PreFilterVerdict("approve", "Mensaje de solo emojis", 0.99, "emoji_only")
+
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**dict(self.hits), "forwarded": self.forwarded, "suspicious": self.suspicious}
@@ -0,0 +1,223 @@
+"""
+🪣 LIMITADOR DE CUOTA DE GEMINI (TOKEN BUCKETS RPM / TPM)
+
+La API key de Gemini tiene límites de peticiones por minuto (RPM) y de
+tokens por minuto (TPM). Antes el bot solo se enteraba por los errores 429,
+y cada error terminaba como APPROVE con confianza 0.0 (¡spam aprobado!).
+
+Este módulo mide la cuota DEL LADO DEL CLIENTE con dos "cubetas":
+
+1. 🪣 Cubeta de peticiones: 1 ficha por llamada (RPM)
+2. 🪣 Cubeta de tokens: fichas = tokens estimados de prompt + respuesta (TPM)
+
+Antes de cada llamada se reservan fichas (esperando si no alcanzan) y al
+recibir la respuesta se AJUSTA la cubeta con los tokens reales que reporta
+Gemini (usage_metadata). Con eso el bot va justo por debajo de la cuota en
+lugar de estrellarse contra ella.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class TokenBucket:
+    """
+    🪣 CUBETA DE FICHAS CLÁSICA
+
+    - capacity: máximo de fichas acumulables (tamaño de ráfaga)
+    - refill_per_second: fichas que se recuperan por segundo
+
+    Las fichas pueden quedar en negativo ("deuda") si al ajustar con datos
+    reales resulta que se gastó más de lo estimado; la deuda se paga
+    esperando más en la siguiente reserva.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._clock = clock
+        self.tokens = capacity
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+
+    def time_until(self, amount: float) -> float:
+        """Segundos que faltan para tener `amount` fichas (0 si ya hay)"""
+        self._refill()
+        amount = min(amount, self.capacity)  # Una reserva enorme no debe bloquear para siempre
+        deficit = amount - self.tokens
+        return max(0.0, deficit / self.refill_per_second)
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """Toma fichas si alcanzan, sin esperar"""
+        if self.time_until(amount) > 0:
+            return False
+        self.tokens -= amount
+        return True
+
+    def adjust(self, delta: float) -> None:
+        """Suma (o resta, si es negativo) fichas: corrección con datos reales"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class GeminiQuotaLimiter:
+    """
+    🚦 DOBLE CUBETA (PETICIONES + TOKENS) FRENTE A GEMINI
+
+    Uso:
+        limiter = GeminiQuotaLimiter(rpm=15, tpm=1_000_000)
+        reserved = await limiter.acquire(prompt_chars=1800, kind="single")
+        response = await chain.ainvoke(...)      # si falla: limiter.release(reserved)
+        limiter.settle(reserved, response.usage_metadata, kind="single")
+
+    La estimación de tokens se calibra sola:
+    - chars_per_token se ajusta comparando caracteres enviados vs input_tokens reales
+    - la salida esperada por tipo de llamada es un promedio móvil de output_tokens
+    """
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        safety: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = asyncio.sleep,
+    ):
+        # 0 = sin límite para esa dimensión
+        self.requests: Optional[TokenBucket] = None
+        self.tokens: Optional[TokenBucket] = None
+        if rpm > 0:
+            self.requests = TokenBucket(rpm * safety, rpm * safety / 60, clock)
+        if tpm > 0:
+            self.tokens = TokenBucket(tpm * safety, tpm * safety / 60, clock)
+
+        self._sleep = sleep
+        self._clock = clock
+        self._lock = asyncio.Lock()  # Reservas en orden de llegada
+
+        # 📐 Calibración de la estimación (se corrige con usage_metadata)
+        self.chars_per_token = 4.0
+        self.expected_output: Dict[str, float] = {}
+        self.default_output = 100.0
+
+        # 📊 Métricas
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_time_total = 0.0
+        self.estimated_tokens_total = 0
+        self.actual_tokens_total = 0
+        self.released = 0  # Reservas devueltas por llamadas fallidas o canceladas
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def estimate(self, prompt_chars: int, kind: str) -> int:
+        """Tokens estimados de una llamada: prompt (por caracteres) + salida típica"""
+        prompt_tokens = prompt_chars / self.chars_per_token
+        return int(prompt_tokens + self.expected_output.get(kind, self.default_output))
+
+    async def acquire(self, prompt_chars: int, kind: str = "single") -> int:
+        """
+        Reserva cuota para una llamada, esperando lo necesario.
+
+        Returns:
+            int: tokens realmente descontados de la cubeta (pásalos a settle() al terminar);
+            puede ser menos que la estimación si esta supera la capacidad
+        """
+        estimated = self.estimate(prompt_chars, kind)
+        if not self.enabled:
+            return estimated
+        reserved = estimated
+
+        async with self._lock:
+            waited = 0.0
+            while True:
+                delay = max(
+                    self.requests.time_until(1) if self.requests else 0.0,
+                    self.tokens.time_until(estimated) if self.tokens else 0.0,
+                )
+                if delay <= 0:
+                    break
+                waited += delay
+                await self._sleep(delay)
+
+            if self.requests:
+                self.requests.adjust(-1)
+            if self.tokens:
+                reserved = int(min(estimated, self.tokens.capacity))
+                self.tokens.adjust(-reserved)
+
+        self.acquired += 1
+        self.estimated_tokens_total += estimated
+        if waited > 0:
+            self.throttled += 1
+            self.wait_time_total += waited
+        return reserved
+
+    def settle(
+        self,
+        reserved: int,
+        usage: Optional[Dict[str, Any]],
+        kind: str = "single",
+        prompt_chars: Optional[int] = None,
+    ) -> None:
+        """
+        Ajusta la cubeta de tokens con lo que Gemini realmente consumió
+        y recalibra la estimación para las próximas llamadas.
+        """
+        if not usage:
+            return
+
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        actual = usage.get("total_tokens") or input_tokens + output_tokens
+        self.actual_tokens_total += actual
+
+        if self.tokens:
+            # reserved - actual: positivo = sobró reserva → se devuelve;
+            # negativo = gastamos más de lo reservado → se descuenta la diferencia (deuda)
+            self.tokens.adjust(reserved - actual)
+
+        # Promedios móviles (EMA) para que la estimación converja a la realidad
+        if prompt_chars and input_tokens:
+            observed = prompt_chars / input_tokens
+            self.chars_per_token = 0.8 * self.chars_per_token + 0.2 * observed
+        previous = self.expected_output.get(kind, self.default_output)
+        self.expected_output[kind] = 0.8 * previous + 0.2 * output_tokens
+
+    def release(self, reserved: int) -> None:
+        """
+        Devuelve los tokens de una llamada que falló o se canceló (sin usage).
+
+        La petición sí cuenta contra RPM; los tokens no se consumieron, y sin
+        devolverlos cada error durante una caída de Gemini vaciaría la cubeta.
+        """
+        if self.tokens:
+            self.tokens.adjust(reserved)
+        self.released += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "wait_time_total": round(self.wait_time_total, 3),
+            "requests_available": round(self.requests.tokens, 2) if self.requests else None,
+            "tokens_available": int(self.tokens.tokens) if self.tokens else None,
+            "estimated_tokens": self.estimated_tokens_total,
+            "actual_tokens": self.actual_tokens_total,
+            "released": self.released,
+            "chars_per_token": round(self.chars_per_token, 2),
+        }
@@ -0,0 +1,136 @@
+"""
+📼 GRABAR Y REPRODUCIR RESPUESTAS DE GEMINI
+
+Para medir el bot sin gastar cuota hace falta que Gemini responda SIEMPRE
+lo mismo. RecordingBackend envuelve cualquier LLMBackend:
+
+- 🔴 "record": llama al backend real y guarda cada (prompt → respuesta) en
+  un archivo JSONL, con la latencia observada
+- ▶️ "replay": responde desde el archivo SIN red ni API key; con
+  replay_latency=True espera la latencia grabada (experimentos de cola)
+
+La llave de cada grabación es un hash del modelo + los mensajes ya armados,
+así que un cambio en el prompt del sistema invalida las grabaciones viejas.
+El modelo entra sin el prefijo "models/" (ChatGoogleGenerativeAI lo agrega
+por su cuenta), así grabar y reproducir dan la misma llave.
+
+    AI_RECORD_MODE=record  → uso normal, graba en AI_RECORD_PATH
+    AI_RECORD_MODE=replay  → repite lo grabado
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from .backends import LLMBackend, LLMResponse, PromptMessages
+
+logger = logging.getLogger(__name__)
+
+RECORD_MODES = ("off", "record", "replay")
+
+
+class ReplayMissError(LookupError):
+    """El prompt no está en las grabaciones (modo replay)"""
+
+
+def prompt_key(model: str, messages: PromptMessages) -> str:
+    """Hash estable del modelo + mensajes (llave de la grabación)"""
+    model = model.removeprefix("models/")  # "models/gemini-1.5-flash" == "gemini-1.5-flash"
+    payload = json.dumps([model, messages], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class RecordingBackend(LLMBackend):
+    """
+    📼 BACKEND QUE GRABA O REPRODUCE
+
+    Uso:
+        backend = RecordingBackend(real_backend, "gemini_recordings.jsonl", "record")
+        backend = RecordingBackend(None, "gemini_recordings.jsonl", "replay", model="gemini-1.5-flash")
+    """
+
+    def __init__(
+        self,
+        inner: Optional[LLMBackend],
+        path: str,
+        mode: str,
+        model: str = "",
+        replay_latency: bool = False,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Modo de grabación desconocido: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("El modo record necesita un backend real")
+
+        self.inner = inner
+        self.path = path
+        self.mode = mode
+        self.model = model or (inner.model if inner else "")
+        self.name = f"{mode}:{inner.name}" if inner else mode
+        self.replay_latency = replay_latency
+        self._recordings: Dict[str, Dict[str, Any]] = self._load()
+
+        # 📊 Métricas
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        recordings: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return recordings
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[entry["key"]] = entry
+        logger.info(f"📼 {len(recordings)} grabaciones cargadas de {self.path}")
+        return recordings
+
+    def _save(self, entry: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def ainvoke(self, messages: PromptMessages) -> LLMResponse:
+        key = prompt_key(self.model, messages)
+
+        if self.mode == "replay":
+            entry = self._recordings.get(key)
+            if entry is None:
+                self.misses += 1
+                raise ReplayMissError(f"Prompt sin grabar ({key}) en {self.path}")
+            self.hits += 1
+            if self.replay_latency and entry.get("latency"):
+                await asyncio.sleep(entry["latency"])
+            return LLMResponse(entry["content"], entry.get("usage"))
+
+        started = time.perf_counter()
+        response = await self.inner.ainvoke(messages)
+        latency = time.perf_counter() - started
+
+        if key not in self._recordings:
+            entry = {
+                "key": key,
+                "model": self.model,
+                "messages": messages,
+                "content": response.content,
+                "usage": response.usage_metadata,
+                "latency": round(latency, 4),
+            }
+            self._recordings[key] = entry
+            self._save(entry)
+            self.recorded += 1
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "recordings": len(self._recordings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
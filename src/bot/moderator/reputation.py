@@ -0,0 +1,184 @@
+"""
+🤝 REPUTACIÓN DE USUARIOS (CONFIANZA GANADA CON MENSAJES APROBADOS)
+
+En un grupo maduro la mayoría de los mensajes vienen de miembros con cientos
+de mensajes aprobados; mandarlos todos a Gemini es gastar cuota en balde.
+
+Cada usuario acumula una RACHA de análisis aprobados:
+
+- ✅ APPROVE de Gemini (source="llm") con confianza suficiente → racha + 1
+  (los aprobados de pre-filtros o caché, como "hola" o "gracias", no cuentan:
+  la confianza se gana con mensajes que Gemini revisó de verdad)
+- ⚠️ WARN / DELETE / TIMEOUT / BAN de cualquier fuente → racha a 0 (y se cuenta la falta)
+
+Con racha >= umbral el usuario es "de confianza": sus mensajes se analizan
+con Gemini solo con probabilidad `sample_rate` (auditoría por muestreo); los
+pre-filtros locales se aplican SIEMPRE. Si una muestra sale mal la racha
+vuelve a 0 y todo se analiza de nuevo. Usuarios nuevos o con una falta
+reciente siempre se analizan.
+
+El almacén está acotado (LRU de `max_users`) y opcionalmente se guarda en un
+JSON para no perder la reputación al reiniciar.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SAVE_EVERY = 200  # Cambios acumulados antes de guardar en disco
+
+
+@dataclass
+class UserReputation:
+    """📇 Lo que se recuerda de cada usuario"""
+    streak: int = 0  # Mensajes aprobados desde la última falta
+    flags: int = 0  # Faltas totales (WARN, DELETE, TIMEOUT, BAN)
+    last_seen: float = 0.0  # time.time() del último veredicto
+
+
+class ReputationStore:
+    """
+    🤝 ALMACÉN DE REPUTACIÓN CON AUDITORÍA POR MUESTREO
+
+    Uso:
+        reputation = ReputationStore(max_users=50000, trust_threshold=50, sample_rate=0.1)
+        if reputation.should_analyze(user_id):
+            result = await analyze_message(text, user_id)
+        else:
+            result = await analyze_message_locally(text, user_id)
+        reputation.record(user_id, result.action.value, result.confidence, result.source)
+
+    Args:
+        max_users: Usuarios recordados como máximo (se olvidan los menos activos)
+        trust_threshold: Racha de aprobados para ser de confianza
+        sample_rate: Fracción de mensajes de confianza que se analizan igual
+        min_confidence: Confianza mínima de un APPROVE para sumar a la racha
+            (los aprobados "por seguridad" ante errores tienen confianza 0.0)
+        path: JSON donde se guarda la reputación (None = solo en memoria)
+    """
+
+    def __init__(
+        self,
+        max_users: int,
+        trust_threshold: int,
+        sample_rate: float,
+        min_confidence: float = 0.5,
+        path: Optional[str] = None,
+        rng: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_users = max_users
+        self.trust_threshold = trust_threshold
+        self.sample_rate = sample_rate
+        self.min_confidence = min_confidence
+        self.path = path
+        self._rng = rng
+        self._clock = clock
+        self._users: "OrderedDict[int, UserReputation]" = OrderedDict()
+        self._dirty = 0
+
+        # 📊 Métricas
+        self.trusted_skipped = 0
+        self.trusted_sampled = 0
+        self.untrusted_analyzed = 0
+        self.audit_flags = 0  # Faltas encontradas al auditar a alguien de confianza
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def is_trusted(self, user_id: int) -> bool:
+        reputation = self._users.get(user_id)
+        return reputation is not None and reputation.streak >= self.trust_threshold
+
+    def should_analyze(self, user_id: int) -> bool:
+        """¿Hay que mandar este análisis a Gemini? (False = solo veredictos locales)"""
+        if not self.is_trusted(user_id):
+            self.untrusted_analyzed += 1
+            return True
+        if self._rng() < self.sample_rate:
+            self.trusted_sampled += 1
+            return True
+        self.trusted_skipped += 1
+        return False
+
+    def record(self, user_id: int, action: str, confidence: float, source: str = "llm") -> None:
+        """📝 Actualiza la reputación con el veredicto de un análisis (una vez por análisis, no por mensaje)"""
+        reputation = self._users.get(user_id)
+        if reputation is None:
+            reputation = self._users[user_id] = UserReputation()
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+        if action == "approve":
+            if source != "llm" or confidence < self.min_confidence:
+                return  # Aprobado local, de caché o por error/fallback: no demuestra nada
+            reputation.streak += 1
+        else:
+            if reputation.streak >= self.trust_threshold:
+                self.audit_flags += 1
+                logger.warning(f"🤝 Usuario de confianza {user_id} marcado ({action}): vuelve a analizarse todo")
+            reputation.streak = 0
+            reputation.flags += 1
+        reputation.last_seen = self._clock()
+
+        self._dirty += 1
+        if self.path and self._dirty >= SAVE_EVERY:
+            self.save()
+
+    # =========================================================================
+    # 💾 PERSISTENCIA
+    # =========================================================================
+
+    def save(self) -> None:
+        """Guarda la reputación en `path` (escritura atómica)"""
+        if not self.path:
+            return
+        data = {
+            "version": 1,
+            "users": {
+                str(user_id): [rep.streak, rep.flags, round(rep.last_seen, 1)]
+                for user_id, rep in self._users.items()
+            },
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            Path(tmp_path).write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            self._dirty = 0
+        except OSError as e:
+            logger.error(f"❌ No se pudo guardar la reputación en {self.path}: {e}")
+
+    def load(self) -> int:
+        """Carga la reputación guardada (si existe); devuelve cuántos usuarios leyó"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            data = json.loads(Path(self.path).read_text(encoding="utf-8"))
+            users = sorted(data["users"].items(), key=lambda item: item[1][2])  # Más viejos primero (LRU)
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            logger.error(f"❌ Reputación ilegible en {self.path}, se empieza de cero: {e}")
+            return 0
+
+        for user_id, (streak, flags, last_seen) in users[-self.max_users:]:
+            self._users[int(user_id)] = UserReputation(streak, flags, last_seen)
+        logger.info(f"🤝 Reputación de {len(self._users)} usuarios cargada desde {self.path}")
+        return len(self._users)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._users),
+            "trusted": sum(1 for rep in self._users.values() if rep.streak >= self.trust_threshold),
+            "trusted_skipped": self.trusted_skipped,
+            "trusted_sampled": self.trusted_sampled,
+            "untrusted_analyzed": self.untrusted_analyzed,
+            "audit_flags": self.audit_flags,
+        }
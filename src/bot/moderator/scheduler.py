@@ -0,0 +1,134 @@
+"""
+🚥 PLANIFICADOR DE LLAMADAS A GEMINI (CONCURRENCIA ACOTADA + BACKPRESSURE)
+
+Sin límite, un raid de spam dispara decenas de llamadas simultáneas a Gemini:
+se agota la cuota, llegan errores 429 y los reintentos de LangChain empeoran
+todo. El resultado es un throughput que oscila entre "todo" y "nada".
+
+Este módulo pone orden:
+
+1. 🎫 Máximo de llamadas EN VUELO al mismo tiempo (max_in_flight)
+2. 🧍 Cola de espera ACOTADA para las que no caben (max_queue)
+3. 🚨 Política de desborde cuando la cola se llena:
+   - "fallback": veredicto local inmediato (sin Gemini)
+   - "drop":     se descarta el análisis (el mensaje se aprueba sin analizar)
+   - "block":    se espera igualmente (la cola deja de estar acotada)
+4. 📊 Métricas: profundidad de cola, tiempos de espera, desbordes
+
+El planificador solo decide CUÁNDO se hace una llamada; qué hacer con un
+desborde lo decide ContentModerator según la política.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+OVERFLOW_POLICIES = ("fallback", "drop", "block")
+
+
+class SchedulerOverflowError(RuntimeError):
+    """La cola de espera está llena y la política no es "block" """
+
+
+class LLMScheduler:
+    """
+    🚥 LIMITADOR DE CONCURRENCIA CON COLA ACOTADA
+
+    Uso:
+        scheduler = LLMScheduler(max_in_flight=8, max_queue=100)
+        try:
+            response = await scheduler.run(lambda: chain.ainvoke(inputs))
+        except SchedulerOverflowError:
+            ...  # aplicar la política de desborde
+
+    Las llamadas en espera se atienden en orden de llegada (FIFO).
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, overflow_policy: str = "fallback"):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desborde desconocida: {overflow_policy}")
+
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+        # 📊 Estado y métricas
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.peak_waiting = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.overflowed = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        """True si una llamada nueva tendría que esperar"""
+        return self.in_flight >= self.max_in_flight
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta call() respetando el límite de concurrencia.
+
+        Raises:
+            SchedulerOverflowError: si la cola está llena (políticas fallback/drop)
+        """
+        if (
+            self.overflow_policy != "block"
+            and self.saturated
+            and self.waiting >= self.max_queue
+        ):
+            self.overflowed += 1
+            raise SchedulerOverflowError(
+                f"Cola de Gemini llena ({self.waiting} en espera, {self.in_flight} en vuelo)"
+            )
+
+        queued_at = time.monotonic()
+        if self._semaphore.locked():
+            # No hay lugar: esperar turno en la cola
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        waited = time.monotonic() - queued_at
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+        self.in_flight += 1
+        self.started += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            result = await call()
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "peak_in_flight": self.peak_in_flight,
+            "peak_queue_depth": self.peak_waiting,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "overflowed": self.overflowed,
+            "avg_wait": round(self.wait_time_total / self.started, 4) if self.started else 0.0,
+            "max_wait": round(self.wait_time_max, 4),
+        }
@@ -0,0 +1,98 @@
+"""
+🛫 SINGLEFLIGHT: UNA SOLA LLAMADA A GEMINI POR TEXTO A LA VEZ
+
+En un raid el mismo texto llega desde muchas cuentas en pocos segundos. El
+caché de veredictos solo ayuda DESPUÉS de la primera respuesta: todas las
+copias que llegan mientras Gemini piensa empiezan su propia llamada.
+
+Con singleflight, la primera copia (el "líder") hace la llamada y las demás
+esperan ese mismo resultado:
+
+    copia 1 ──▶ Gemini ─────────────▶ veredicto ──┬─▶ copia 1
+    copia 2 ──▶ (espera al líder) ────────────────┼─▶ copia 2
+    copia 3 ──▶ (espera al líder) ────────────────┴─▶ copia 3
+
+La llave es el texto normalizado (la misma que usa el caché): mayúsculas y
+espacios no cuentan, así que "GANA  $500   YA" y "gana $500 ya" comparten
+llamada (la puntuación sí cuenta: "gana $500 ya!!" es otro texto).
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+from ..services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_COLLAPSED_TOTAL = metrics.counter(
+    "viperguard_llm_singleflight_collapsed_total",
+    "Análisis que esperaron la llamada en curso de un texto idéntico en lugar de hacer la suya",
+)
+
+
+class SingleFlight(Generic[T]):
+    """
+    🛫 AGRUPA LLAMADAS CONCURRENTES CON LA MISMA LLAVE
+
+    Uso:
+        flights = SingleFlight()
+        result, shared = await flights.do(normalize_message(texto), lambda: llamar_a_gemini(texto))
+        # shared=True: el resultado vino de la llamada de otro
+
+    Si el líder falla, todos los que esperaban reciben la misma excepción.
+    Si el líder es cancelado, los que esperaban reintentan por su cuenta.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+        # 📊 Métricas
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Ejecuta `call` o se une a la llamada en curso de `key`; devuelve (resultado, compartido)"""
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                return await self._lead(key, call), False
+
+            await asyncio.wait([flight])  # wait() no cancela al líder si nos cancelan a nosotros
+            if flight.cancelled():
+                continue  # El líder fue cancelado: se reintenta (quizá como líder)
+
+            self.collapsed += 1
+            SINGLEFLIGHT_COLLAPSED_TOTAL.inc()
+            return flight.result(), True
+
+    async def _lead(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        self.leaders += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()  # Marcada como leída: puede que nadie esperara
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.collapsed
+        return {
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "collapse_rate": round(self.collapsed / total, 4) if total else 0.0,
+            "in_flight": len(self._flights),
+        }
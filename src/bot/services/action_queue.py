@@ -0,0 +1,298 @@
+"""
+📤 COLA DE ACCIONES HACIA TELEGRAM (BORRAR, AVISAR, BANEAR, SILENCIAR)
+
+Antes _handle_message esperaba cada llamada a la API (delete, send_message,
+ban, restrict) una detrás de otra. En un raid eso choca con los límites de
+Telegram y cada RetryAfter terminaba como "aprobado por seguridad".
+
+Ahora el handler solo ENCOLA la acción y sigue; este ejecutor la manda:
+
+    _handle_message ──enqueue()──▶ cola del chat ──▶ trabajador del chat ──▶ Bot API
+                                                     │
+                        🪣 cubeta del chat + 🪣 cubeta global (fichas por llamada)
+
+- 📋 Una cola y un trabajador por chat: el orden dentro del chat se respeta
+- 🪣 Cubetas de fichas por chat (por minuto) y global (por segundo)
+- ⏳ RetryAfter: el chat espera lo que pide Telegram y la acción se reintenta
+- 🗑️ Los borrados seguidos al frente de la cola de un chat se juntan en UNA
+  llamada deleteMessages (hasta 100 mensajes), sin adelantar otras acciones
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from ..moderator.rate_limiter import TokenBucket
+from .metrics import STAGE_SECONDS, TELEGRAM_SECONDS, metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_BULK_DELETE = 100  # Límite de deleteMessages en la Bot API
+NETWORK_RETRY_DELAY = 1.0  # Segundos antes de reintentar tras un error de red
+
+TELEGRAM_ACTIONS_TOTAL = metrics.counter(
+    "viperguard_telegram_actions_total",
+    "Acciones enviadas a Telegram por método y resultado",
+    ("method", "outcome"),
+)
+
+
+@dataclass
+class TelegramAction:
+    """📤 Una llamada pendiente a la Bot API"""
+    bot: Any
+    method: str  # delete_message, send_message, ban_chat_member, restrict_chat_member
+    chat_id: int  # Chat cuya cola la ejecuta (en send_message a un usuario: su id)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    attempts: int = 0
+    # Se llama al terminar: on_done(resultado, None) u on_done(None, error)
+    on_done: Optional[Callable[[Any, Optional[Exception]], None]] = None
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Segundos de espera de un RetryAfter (int o timedelta según la versión de PTB)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class ActionExecutor:
+    """
+    📤 EJECUTOR DE ACCIONES CON LÍMITES DE TELEGRAM
+
+    Uso:
+        actions = ActionExecutor(global_per_second=25, chat_per_minute=20)
+        actions.enqueue(context.bot, "delete_message", chat_id, message_id=42)
+        ...
+        await actions.stop()  # Espera a que se vacíen las colas
+
+    Args:
+        global_per_second: Llamadas por segundo para todo el bot
+        chat_per_minute: Llamadas por minuto a un mismo chat (también es la ráfaga)
+        delete_batch_window: Segundos que se espera a más borrados antes de mandarlos juntos
+        max_retries: Reintentos por acción tras RetryAfter o error de red
+    """
+
+    def __init__(
+        self,
+        global_per_second: float,
+        chat_per_minute: float,
+        delete_batch_window: float = 0.0,
+        max_retries: int = 3,
+    ):
+        self.global_bucket = TokenBucket(global_per_second, global_per_second)
+        self.chat_per_minute = chat_per_minute
+        self.delete_batch_window = delete_batch_window
+        self.max_retries = max_retries
+
+        self._queues: Dict[int, Deque[TelegramAction]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+
+        # 📊 Métricas
+        self.enqueued = 0
+        self.executed = 0
+        self.api_calls = 0
+        self.coalesced_deletes = 0  # Borrados que viajaron dentro de un deleteMessages ajeno
+        self.retry_after = 0
+        self.failed = 0
+
+    # =========================================================================
+    # 📥 ENCOLAR
+    # =========================================================================
+
+    def enqueue(
+        self,
+        bot: Any,
+        method: str,
+        chat_id: int,
+        on_done: Optional[Callable[[Any, Optional[Exception]], None]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Encola una llamada `bot.<method>(chat_id=chat_id, **kwargs)` sin esperarla.
+        
+        `on_done` (opcional) recibe el resultado o el error cuando la acción termina.
+        """
+        queue = self._queues.setdefault(chat_id, deque())
+        queue.append(TelegramAction(bot, method, chat_id, kwargs, on_done=on_done))
+        self.enqueued += 1
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._run_chat(chat_id))
+
+    # =========================================================================
+    # 🔄 TRABAJADOR POR CHAT
+    # =========================================================================
+
+    async def _run_chat(self, chat_id: int) -> None:
+        queue = self._queues[chat_id]
+        try:
+            while queue:
+                # Ficha primero: mientras se espera se juntan más borrados
+                await self._acquire(chat_id)
+                batch = await self._next_batch(queue)
+                await self._execute(chat_id, queue, batch)
+        finally:
+            # Sin awaits entre la cola vacía y el borrado: enqueue() verá que no hay trabajador
+            del self._workers[chat_id]
+            if not queue:
+                del self._queues[chat_id]
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is not None and bucket.time_until(bucket.capacity) == 0:
+                del self._chat_buckets[chat_id]  # Cubeta llena = igual que una nueva
+
+    async def _next_batch(self, queue: Deque[TelegramAction]) -> List[TelegramAction]:
+        """
+        Saca la siguiente acción; si es un borrado, se lleva los borrados que
+        le siguen en la cola hasta la primera acción de otro tipo (un borrado
+        encolado DESPUÉS de un ban o un aviso no se adelanta a ellos).
+        """
+        if queue[0].method != "delete_message":
+            return [queue.popleft()]
+
+        if self.delete_batch_window > 0:
+            await asyncio.sleep(self.delete_batch_window)
+
+        batch: List[TelegramAction] = []
+        while queue and queue[0].method == "delete_message" and len(batch) < MAX_BULK_DELETE:
+            batch.append(queue.popleft())
+        return batch
+
+    async def _acquire(self, chat_id: int) -> None:
+        """🪣 Espera una ficha en la cubeta del chat Y en la global"""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_per_minute, self.chat_per_minute / 60)
+        while True:
+            wait = max(bucket.time_until(1), self.global_bucket.time_until(1))
+            if wait == 0:
+                # Sin await entre la comprobación y el descuento: nadie se cuela
+                bucket.try_acquire()
+                self.global_bucket.try_acquire()
+                return
+            await asyncio.sleep(wait)
+
+    async def _execute(self, chat_id: int, queue: Deque[TelegramAction], batch: List[TelegramAction]) -> None:
+        first = batch[0]
+        if len(batch) > 1:
+            method = "delete_messages"
+            call = first.bot.delete_messages(
+                chat_id=chat_id, message_ids=[action.kwargs["message_id"] for action in batch]
+            )
+        else:
+            method = first.method
+            call = getattr(first.bot, method)(chat_id=chat_id, **first.kwargs)
+
+        self.api_calls += 1
+        try:
+            with TELEGRAM_SECONDS.time(method=method):
+                result = await call
+        except RetryAfter as e:
+            # ⏳ Telegram pide esperar: este chat se detiene y la acción vuelve al frente
+            delay = retry_after_seconds(e)
+            self.retry_after += 1
+            TELEGRAM_ACTIONS_TOTAL.inc(method=method, outcome="retry_after")
+            logger.warning(f"⏳ Límite de Telegram en chat {chat_id}: esperando {delay:.0f}s")
+            self._retry(queue, batch, method, e)
+            await asyncio.sleep(delay)
+            return
+        except (BadRequest, Forbidden) as e:
+            # Mensaje ya borrado, usuario sin chat privado, bot sin permisos: reintentar no sirve
+            self._finish(batch, method, "rejected", error=e)
+            logger.warning(f"⚠️ Telegram rechazó {method} en chat {chat_id}: {e}")
+            return
+        except NetworkError as e:
+            TELEGRAM_ACTIONS_TOTAL.inc(method=method, outcome="network_error")
+            logger.warning(f"🌐 Error de red en {method} (chat {chat_id}): {e}")
+            self._retry(queue, batch, method, e)
+            await asyncio.sleep(NETWORK_RETRY_DELAY)
+            return
+        except Exception as e:
+            self._finish(batch, method, "error", error=e)
+            logger.error(f"❌ Error ejecutando {method} en chat {chat_id}: {e}")
+            return
+
+        self._finish(batch, method, "ok", result=result)
+        if len(batch) > 1:
+            self.coalesced_deletes += len(batch) - 1
+            logger.info(f"🗑️ {len(batch)} mensajes borrados en una llamada (chat {chat_id})")
+
+    def _retry(
+        self, queue: Deque[TelegramAction], batch: List[TelegramAction], method: str, error: Exception
+    ) -> None:
+        """Devuelve al frente de la cola las acciones que aún tienen reintentos"""
+        retry = []
+        for action in batch:
+            action.attempts += 1
+            if action.attempts > self.max_retries:
+                self._finish([action], method, "dropped", error=error)
+                logger.error(f"❌ {action.method} descartada tras {self.max_retries} reintentos")
+            else:
+                retry.append(action)
+        queue.extendleft(reversed(retry))
+
+    def _finish(
+        self,
+        batch: List[TelegramAction],
+        method: str,
+        outcome: str,
+        result: Any = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        now = time.perf_counter()
+        for action in batch:
+            STAGE_SECONDS.observe(now - action.enqueued_at, stage="action_queue")
+            if action.on_done is not None:
+                try:
+                    action.on_done(result, error)
+                except Exception as e:
+                    logger.error(f"❌ Error en on_done de {action.method}: {e}")
+        TELEGRAM_ACTIONS_TOTAL.inc(method=method, outcome=outcome)
+        self.executed += len(batch)
+        if outcome != "ok":
+            self.failed += len(batch)
+
+    # =========================================================================
+    # 🛑 CICLO DE VIDA
+    # =========================================================================
+
+    async def drain(self) -> None:
+        """Espera a que todas las colas se vacíen"""
+        while self._workers:
+            await asyncio.wait(list(self._workers.values()))
+
+    async def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Da `timeout` segundos para vaciar las colas y cancela lo que quede"""
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            pending = self.pending
+            workers = list(self._workers.values())
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.warning(f"⚠️ {pending} acciones de Telegram sin ejecutar al detener el bot")
+
+    @property
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "executed": self.executed,
+            "pending": self.pending,
+            "api_calls": self.api_calls,
+            "coalesced_deletes": self.coalesced_deletes,
+            "retry_after": self.retry_after,
+            "failed": self.failed,
+            "active_chats": len(self._workers),
+        }
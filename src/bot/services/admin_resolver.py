@@ -0,0 +1,148 @@
+"""
+👑 ¿ES ADMINISTRADOR? (SIN PREGUNTARLE A TELEGRAM EN CADA MENSAJE)
+
+Los mensajes de administradores no se moderan: no tiene sentido pagar una
+llamada a Gemini para revisar a quien modera el grupo. Se consideran
+administradores:
+
+1. 🔐 Los IDs de ADMIN_USER_IDS (un frozenset, parseado una sola vez)
+2. 👑 Los administradores del grupo en Telegram (get_chat_administrators),
+   guardados por chat con caducidad (CHAT_ADMINS_CACHE_TTL)
+3. 🕶️ Los administradores anónimos (el mensaje llega "en nombre del grupo")
+
+Cuando Telegram avisa un cambio de administradores (update chat_member) el
+caché de ese chat se invalida y la siguiente consulta lo vuelve a pedir.
+Si varias consultas del mismo chat llegan juntas, se hace UNA sola llamada.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from telegram import Chat, ChatMember, ChatMemberUpdated
+
+from .metrics import TELEGRAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+ERROR_RETRY_SECONDS = 60.0  # Si Telegram falla, no se reintenta con cada mensaje
+
+
+class AdminResolver:
+    """
+    👑 RESUELVE SI UN USUARIO ES ADMINISTRADOR DE UN CHAT
+
+    Uso:
+        admins = AdminResolver(settings.admin_ids, cache_ttl=600)
+        if await admins.is_admin(context.bot, update.effective_chat, user_id):
+            return  # No se modera
+
+    Args:
+        configured_ids: IDs de ADMIN_USER_IDS (administradores en todos los chats)
+        cache_ttl: Segundos que se recuerdan los administradores de un chat (0 = no consultarlos)
+    """
+
+    def __init__(
+        self,
+        configured_ids: FrozenSet[int],
+        cache_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.configured_ids = configured_ids
+        self.cache_ttl = cache_ttl
+        self._clock = clock
+        # chat_id → (momento de expiración, IDs de administradores)
+        self._chat_admins: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+        # chat_id → consulta en curso (las demás la esperan)
+        self._inflight: Dict[int, asyncio.Future] = {}
+
+        # 📊 Métricas
+        self.configured_hits = 0
+        self.chat_admin_hits = 0
+        self.cache_hits = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.invalidations = 0
+
+    async def is_admin(self, bot: Any, chat: Chat, user_id: int, sender_chat: Optional[Chat] = None) -> bool:
+        """¿`user_id` (o el `sender_chat` del mensaje) administra `chat`?"""
+        if user_id in self.configured_ids:
+            self.configured_hits += 1
+            return True
+        if sender_chat is not None and sender_chat.id == chat.id:
+            # 🕶️ Administrador anónimo: publica como el propio grupo
+            self.chat_admin_hits += 1
+            return True
+        if self.cache_ttl <= 0 or chat.type not in (Chat.GROUP, Chat.SUPERGROUP):
+            return False
+
+        if user_id in await self._get_chat_admins(bot, chat.id):
+            self.chat_admin_hits += 1
+            return True
+        return False
+
+    async def _get_chat_admins(self, bot: Any, chat_id: int) -> FrozenSet[int]:
+        entry = self._chat_admins.get(chat_id)
+        if entry is not None and self._clock() < entry[0]:
+            self.cache_hits += 1
+            return entry[1]
+
+        inflight = self._inflight.get(chat_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[chat_id] = future
+        try:
+            admins, ttl = await self._fetch(bot, chat_id)
+            self._chat_admins[chat_id] = (self._clock() + ttl, admins)
+            future.set_result(admins)
+            return admins
+        finally:
+            if not future.done():
+                future.set_result(frozenset())  # Cancelados: los que esperan siguen sin admins
+            del self._inflight[chat_id]
+
+    async def _fetch(self, bot: Any, chat_id: int) -> Tuple[FrozenSet[int], float]:
+        """Pide los administradores a Telegram; devuelve (IDs, segundos de validez)"""
+        self.fetches += 1
+        try:
+            with TELEGRAM_SECONDS.time(method="get_chat_administrators"):
+                members = await bot.get_chat_administrators(chat_id=chat_id)
+        except Exception as e:
+            self.fetch_errors += 1
+            logger.warning(f"⚠️ No se pudieron obtener los administradores del chat {chat_id}: {e}")
+            return frozenset(), min(self.cache_ttl, ERROR_RETRY_SECONDS)
+
+        admins = frozenset(member.user.id for member in members)
+        logger.info(f"👑 Chat {chat_id}: {len(admins)} administradores (caché {self.cache_ttl:.0f}s)")
+        return admins, self.cache_ttl
+
+    def invalidate(self, chat_id: int) -> None:
+        """Olvida los administradores de un chat (se vuelven a pedir en la próxima consulta)"""
+        if self._chat_admins.pop(chat_id, None) is not None:
+            self.invalidations += 1
+
+    def on_chat_member(self, change: ChatMemberUpdated) -> None:
+        """🔄 Invalida el caché si el cambio de miembro toca a un administrador"""
+        if change.old_chat_member.status in ADMIN_STATUSES or change.new_chat_member.status in ADMIN_STATUSES:
+            logger.info(
+                f"👑 Cambio de administradores en chat {change.chat.id} "
+                f"(usuario {change.new_chat_member.user.id}: {change.old_chat_member.status} → "
+                f"{change.new_chat_member.status})"
+            )
+            self.invalidate(change.chat.id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "configured": len(self.configured_ids),
+            "configured_hits": self.configured_hits,
+            "chat_admin_hits": self.chat_admin_hits,
+            "cache_hits": self.cache_hits,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "invalidations": self.invalidations,
+            "cached_chats": len(self._chat_admins),
+        }
@@ -0,0 +1,157 @@
+"""
+✂️ RÁFAGAS: VARIOS MENSAJES SEGUIDOS DEL MISMO USUARIO, UN SOLO ANÁLISIS
+
+Mucha gente escribe una idea en cinco mensajes rápidos ("hola" / "una
+pregunta" / "alguien sabe" / ...). Antes eran cinco llamadas a Gemini.
+
+Este coalescedor junta los mensajes del mismo usuario en el mismo chat que
+llegan con menos de `window` segundos entre sí, y entrega la ráfaga completa
+a `flush()` (que los analiza concatenados y aplica el veredicto a todos):
+
+    msg1 ─┐  < window
+    msg2 ─┤  < window
+    msg3 ─┘ ───── window sin mensajes (o max_wait desde msg1) ──▶ flush([msg1, msg2, msg3])
+
+Límites para que la latencia sea predecible:
+- ⏱️ `max_wait`: la ráfaga se cierra a lo sumo max_wait segundos después
+  de su primer mensaje, aunque el usuario siga escribiendo
+- 📦 `max_messages`: con tantos mensajes se cierra en el acto
+
+Las ráfagas de una misma llave se procesan en orden: la siguiente espera a
+que termine la anterior (así se conserva el orden por usuario del bot).
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from .metrics import STAGE_SECONDS, metrics
+
+logger = logging.getLogger(__name__)
+
+BURST_COALESCED_TOTAL = metrics.counter(
+    "viperguard_burst_coalesced_messages_total",
+    "Mensajes analizados junto con otros de la misma ráfaga (llamadas ahorradas)",
+)
+
+
+@dataclass
+class Burst:
+    """✂️ Una ráfaga abierta (todavía acepta mensajes)"""
+    items: List[Any]
+    started_at: float = field(default_factory=time.perf_counter)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class BurstCoalescer:
+    """
+    ✂️ JUNTA MENSAJES SEGUIDOS POR LLAVE (CHAT, USUARIO)
+
+    Uso:
+        bursts = BurstCoalescer(moderate_burst, window=1.5, max_wait=4.0, max_messages=8)
+        bursts.add((chat_id, user_id), mensaje)  # No espera: flush() corre aparte
+        ...
+        await bursts.drain()  # Cierra las ráfagas abiertas y espera a que terminen
+
+    Args:
+        flush: Corutina que recibe la lista de items de una ráfaga
+        window: Segundos sin mensajes que cierran la ráfaga
+        max_wait: Segundos máximos desde el primer mensaje hasta cerrar la ráfaga
+        max_messages: Mensajes que cierran la ráfaga de inmediato
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], Awaitable[None]],
+        window: float,
+        max_wait: float,
+        max_messages: int,
+    ):
+        self._flush = flush
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.max_messages = max_messages
+        self._open: Dict[Hashable, Burst] = {}
+        # Última ráfaga en proceso de cada llave (la siguiente la espera)
+        self._tails: Dict[Hashable, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        # 📊 Métricas
+        self.messages = 0
+        self.bursts = 0
+        self.largest_burst = 0
+        self.closed_by_max_wait = 0
+        self.closed_by_size = 0
+
+    def add(self, key: Hashable, item: Any) -> None:
+        """Suma `item` a la ráfaga abierta de `key` (o abre una nueva)"""
+        self.messages += 1
+        burst = self._open.get(key)
+        if burst is None:
+            burst = self._open[key] = Burst([item])
+        else:
+            burst.items.append(item)
+            burst.timer.cancel()
+
+        if len(burst.items) >= self.max_messages:
+            self.closed_by_size += 1
+            self._close(key)
+            return
+
+        # Cerrar tras `window` sin mensajes, pero nunca después de `max_wait` desde el primero
+        remaining = burst.started_at + self.max_wait - time.perf_counter()
+        if remaining <= self.window:
+            burst.timer = asyncio.get_running_loop().call_later(max(0.0, remaining), self._close, key, True)
+        else:
+            burst.timer = asyncio.get_running_loop().call_later(self.window, self._close, key)
+
+    def _close(self, key: Hashable, by_max_wait: bool = False) -> None:
+        burst = self._open.pop(key, None)
+        if burst is None:
+            return
+        if burst.timer is not None:
+            burst.timer.cancel()
+        if by_max_wait:
+            self.closed_by_max_wait += 1
+        self.bursts += 1
+        self.largest_burst = max(self.largest_burst, len(burst.items))
+        if len(burst.items) > 1:
+            BURST_COALESCED_TOTAL.inc(len(burst.items) - 1)
+
+        previous = self._tails.get(key)
+        task = asyncio.get_running_loop().create_task(self._run(key, burst, previous))
+        self._tails[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, burst: Burst, previous: Optional[asyncio.Task]) -> None:
+        try:
+            if previous is not None and not previous.done():
+                await asyncio.wait([previous])
+            STAGE_SECONDS.observe(time.perf_counter() - burst.started_at, stage="burst_wait")
+            await self._flush(burst.items)
+        except Exception as e:
+            logger.error(f"❌ Error procesando una ráfaga de {len(burst.items)} mensajes: {e}")
+        finally:
+            if self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
+
+    async def drain(self) -> None:
+        """Cierra todas las ráfagas abiertas y espera a que se procesen"""
+        for key in list(self._open):
+            self._close(key)
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "bursts": self.bursts,
+            "coalesced": self.messages - self.bursts - sum(len(b.items) for b in self._open.values()),
+            "largest_burst": self.largest_burst,
+            "closed_by_max_wait": self.closed_by_max_wait,
+            "closed_by_size": self.closed_by_size,
+            "open_bursts": len(self._open),
+        }
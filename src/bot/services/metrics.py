@@ -0,0 +1,282 @@
+"""
+📈 MÉTRICAS EN FORMATO PROMETHEUS (HISTOGRAMAS POR ETAPA)
+
+ModerationResult.processing_time solo terminaba en una línea de log. Este
+módulo mide CADA etapa de la vida de un mensaje y lo expone en texto
+Prometheus en un endpoint HTTP local (http://127.0.0.1:9464/metrics):
+
+- ⏱️ viperguard_stage_seconds{stage=...}: histograma por etapa
+  receipt (Telegram → bot), prefilter, cache, queue_wait, quota_wait,
+  llm, parse, analysis (todo el moderador), actions, total
+- 📞 viperguard_telegram_seconds{method=...}: cada llamada a la API de Telegram
+- 🔢 viperguard_actions_total{action, chat}: acciones ejecutadas por chat
+  (approve incluido, también la de administradores y la de un error de la IA)
+- 🔢 viperguard_decisions_total{source, action}: quién decidió (rules, cache, llm...)
+- 📊 Gauges del moderador (llamadas en vuelo, cola, circuito) al momento de leer
+
+Sin dependencias: los histogramas usan cubetas fijas y el servidor es un
+HTTP mínimo sobre asyncio. Registrar una observación cuesta ~1 µs.
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Segundos: de medio milisegundo (pre-filtro) a 30s (timeout de Gemini)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+             for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """🔢 Contador que solo crece"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """📊 Valor que sube y baja (se fija al leer las métricas)"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """
+    ⏱️ HISTOGRAMA DE CUBETAS FIJAS
+
+    Uso:
+        STAGE_SECONDS.observe(0.012, stage="prefilter")
+        with STAGE_SECONDS.time(stage="llm"):
+            await llamar_a_gemini()
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiqueta: (conteos por cubeta + cubeta +Inf, suma)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = ([0] * (len(self.buckets) + 1), [0.0])
+            self._series[key] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: object) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """🗂️ Conjunto de métricas + callbacks que actualizan gauges al leerlas"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def on_collect(self, callback: Callable[[], None]) -> None:
+        """Registra un callback que se ejecuta justo antes de exportar"""
+        self._collectors.append(callback)
+
+    def render(self) -> str:
+        """📄 Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+        for callback in self._collectors:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Error actualizando métricas: {e}")
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    🌐 ENDPOINT HTTP MÍNIMO: GET /metrics
+
+    Uso:
+        server = MetricsServer(metrics, "127.0.0.1", 9464)
+        await server.start()
+        ...
+        await server.stop()
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"📈 Métricas en http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Ignorar cabeceras
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"Not found\n", "text/plain"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# =============================================================================
+# 📈 REGISTRO GLOBAL Y MÉTRICAS DEL BOT
+# =============================================================================
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "viperguard_stage_seconds",
+    "Duración de cada etapa del procesamiento de un mensaje",
+    ("stage",),
+)
+TELEGRAM_SECONDS = metrics.histogram(
+    "viperguard_telegram_seconds",
+    "Duración de cada llamada a la API de Telegram",
+    ("method",),
+)
+ACTIONS_TOTAL = metrics.counter(
+    "viperguard_actions_total",
+    "Acciones de moderación ejecutadas (approve incluido), por acción y chat",
+    ("action", "chat"),
+)
+DECISIONS_TOTAL = metrics.counter(
+    "viperguard_decisions_total",
+    "Veredictos por fuente (rules, classifier, cache, llm, fallback, error) y acción",
+    ("source", "action"),
+)
+LLM_CALLS_TOTAL = metrics.counter(
+    "viperguard_llm_calls_total",
+    "Llamadas a Gemini por tipo (single, batch, stream, classify...) y resultado",
+    ("kind", "outcome"),
+)
@@ -26,13 +26,31 @@ CONEXIÓN CON OTROS ARCHIVOS:
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple
 
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.ext import (
+    Application, BaseHandler, ChatMemberHandler, CommandHandler, MessageHandler, filters, ContextTypes
+)
 import telegram
 
 from ...settings import settings
+from ..moderator.ai_analyzer import (
+    analyze_message, analyze_message_locally, analyze_message_streaming, analyze_message_two_stage,
+    ModerationAction, moderator
+)
+from ..moderator.flood_limiter import FloodLimiter
+from ..moderator.reputation import ReputationStore
+from .action_queue import ActionExecutor
+from .admin_resolver import AdminResolver
+from .burst_coalescer import BurstCoalescer
+from .metrics import ACTIONS_TOTAL, DECISIONS_TOTAL, STAGE_SECONDS, MetricsServer, metrics
+from .update_processor import ChatOrderedUpdateProcessor
+from .user_notifier import WarningNotifier
+from .webhook import WebhookServer
 #--------------------------------
 # Configurar logging basado en settings
 
@@ -45,6 +63,10 @@ def get_log_level(level_str: str) -> int:
         # Si el nivel no existe, usar INFO por defecto
         return logging.INFO
 
+def until_utc(minutes: int) -> datetime:
+    """⏰ Fin de una restricción, en UTC (el mismo reloj sin importar la zona horaria del servidor)"""
+    return datetime.now(timezone.utc) + timedelta(minutes=minutes)
+
 log_level = get_log_level(settings.log_level)
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -91,6 +113,50 @@ class TelegramBot:
         """Inicializa el bot con configuración desde settings"""
         self.settings = settings
         self.application: Optional[Application] = None
+        self.metrics_server: Optional[MetricsServer] = None
+        self.update_processor: Optional[ChatOrderedUpdateProcessor] = None
+        self.webhook_server: Optional[WebhookServer] = None
+        # 📡 Tipos de update que pedimos a Telegram (los que algún handler atiende)
+        self.allowed_updates: List[str] = []
+        # 📤 Las acciones (borrar, avisar, banear) se encolan y respetan los límites de Telegram
+        self.actions = ActionExecutor(
+            global_per_second=self.settings.telegram_actions_per_second,
+            chat_per_minute=self.settings.telegram_actions_per_chat_per_minute,
+            delete_batch_window=self.settings.telegram_delete_batch_window_ms / 1000,
+            max_retries=self.settings.telegram_action_max_retries,
+        )
+        # 👑 Administradores (ADMIN_USER_IDS + los de cada grupo): no se moderan
+        self.admins = AdminResolver(self.settings.admin_ids, self.settings.chat_admins_cache_ttl)
+        # 🌊 Flood: quien pasa MAX_MESSAGES_PER_MINUTE se modera localmente, sin IA
+        self.flood: Optional[FloodLimiter] = None
+        if self.settings.rate_limit_enabled:
+            self.flood = FloodLimiter(self.settings.max_messages_per_minute, self.settings.flood_action)
+        # ✂️ Ráfagas: mensajes seguidos del mismo usuario se analizan juntos
+        self.bursts: Optional[BurstCoalescer] = None
+        if self.settings.burst_coalescing_enabled:
+            self.bursts = BurstCoalescer(
+                self._moderate,
+                window=self.settings.burst_window_ms / 1000,
+                max_wait=self.settings.burst_max_wait_ms / 1000,
+                max_messages=self.settings.burst_max_messages,
+            )
+        # 🤝 Reputación: los usuarios de confianza solo se auditan por muestreo
+        self.reputation: Optional[ReputationStore] = None
+        if self.settings.reputation_enabled:
+            self.reputation = ReputationStore(
+                max_users=self.settings.reputation_max_users,
+                trust_threshold=self.settings.reputation_trust_threshold,
+                sample_rate=self.settings.reputation_sample_rate,
+                path=self.settings.reputation_path,
+            )
+        # 📨 Avisos por privado sin repetir ni insistir con quien no acepta privados
+        self.notifier = WarningNotifier(
+            self.actions,
+            dedupe_seconds=self.settings.warning_dedupe_seconds,
+            unreachable_ttl=self.settings.dm_unreachable_ttl,
+            group_fallback=self.settings.warning_group_fallback,
+            group_fallback_ttl=self.settings.warning_group_fallback_ttl,
+        )
         
         logger.info("🏗️ Inicializando TelegramBot")
         # Arreglar el problema del token
@@ -103,9 +169,27 @@ class TelegramBot:
             logger.info("🔧 Creando aplicación de Telegram...")
             
             # Crear aplicación
-            self.application = Application.builder().token(
-                self.settings.telegram_bot_token
-            ).build()
+            builder = (
+                Application.builder()
+                .token(self.settings.telegram_bot_token)
+                # 🔌 Pools separados: las acciones de moderación nunca esperan al long poll
+                .connection_pool_size(self.settings.telegram_connection_pool_size)
+                .pool_timeout(self.settings.telegram_pool_timeout)
+                .read_timeout(self.settings.telegram_read_timeout)
+                .get_updates_connection_pool_size(self.settings.polling_connection_pool_size)
+                .get_updates_read_timeout(self.settings.polling_read_timeout)
+            )
+            if self.settings.telegram_base_url:
+                # 🧪 Bot API alternativa (Telegram simulado en benchmarks)
+                base_url = self.settings.telegram_base_url.rstrip("/")
+                builder = builder.base_url(f"{base_url}/bot").base_file_url(f"{base_url}/file/bot")
+            
+            # 🔀 Varios updates a la vez, en orden dentro de cada chat/usuario
+            if self.settings.telegram_concurrent_updates > 1:
+                self.update_processor = ChatOrderedUpdateProcessor(self.settings.telegram_concurrent_updates)
+                builder = builder.concurrent_updates(self.update_processor)
+            
+            self.application = builder.build()
             
             logger.info("✅ Aplicación de Telegram creada exitosamente")
             
@@ -123,20 +207,46 @@ class TelegramBot:
         logger.info("📋 Registrando handlers...")
         
         # Handler para el comando /start
-        self.application.add_handler(
-            CommandHandler("start", self._handle_start)
+        self._add_handler(
+            CommandHandler("start", self._handle_start, filters=filters.UpdateType.MESSAGE),
+            Update.MESSAGE,
         )
         
-        # Handler para todos los mensajes de texto
-        self.application.add_handler(
-            MessageHandler(filters.TEXT & ~filters.COMMAND, self._handle_message)
+        # Handler para todos los mensajes de texto (nuevos; los editados no traen update.message)
+        self._add_handler(
+            MessageHandler(filters.UpdateType.MESSAGE & filters.TEXT & ~filters.COMMAND, self._handle_message),
+            Update.MESSAGE,
         )
         
-        logger.info("📋 Handlers registrados: /start, mensajes de texto")
+        # Handler para cambios de miembros (invalida el caché de administradores)
+        if self.settings.chat_admins_cache_ttl > 0:
+            self._add_handler(
+                ChatMemberHandler(self._handle_chat_member, ChatMemberHandler.CHAT_MEMBER),
+                Update.CHAT_MEMBER,
+            )
+        
+        logger.info(
+            f"📋 Handlers registrados: /start, mensajes de texto, cambios de miembros "
+            f"(allowed_updates={self.allowed_updates})"
+        )
+
+    def _add_handler(self, handler: BaseHandler, *update_types: str) -> None:
+        """
+        Registra un handler junto con los tipos de update que atiende.
+        
+        La unión de esos tipos es el `allowed_updates` que se pide a Telegram:
+        así no nos manda (ni parseamos) updates que ningún handler usa.
+        """
+        self.application.add_handler(handler)
+        for update_type in update_types:
+            if update_type not in self.allowed_updates:
+                self.allowed_updates.append(update_type)
 
     async def _handle_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Maneja el comando /start"""
         logger.info(f"🚀 Comando /start recibido de usuario: {update.effective_user.id}")
+        # Quien inicia el bot ya acepta mensajes privados
+        self.notifier.mark_reachable(update.effective_user.id)
         
         welcome_message = (
             "¡Hola! 👋 Soy el bot moderador de Python CDMX.\n\n"
@@ -147,6 +257,10 @@ class TelegramBot:
         await update.message.reply_text(welcome_message)
         logger.info("✅ Mensaje de bienvenida enviado")
 
+    async def _handle_chat_member(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """👑 Un miembro cambió de estado: si toca a un administrador, se olvida el caché del chat"""
+        self.admins.on_chat_member(update.chat_member)
+
     async def _handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """
         🎯 FUNCIÓN MÁS IMPORTANTE DEL BOT
@@ -164,7 +278,7 @@ class TelegramBot:
         1. 📨 Recibe el mensaje
         2. 🤖 Lo envía a ai_analyzer.py
         3. 📊 Recibe decisión de la IA
-        4. ⚡ Ejecuta acción (eliminar, advertir, etc.)
+        4. ⚡ Encola la acción (eliminar, advertir, etc.) sin esperar a Telegram
         5. 📝 Registra resultado
         
         PARÁMETROS:
@@ -173,82 +287,275 @@ class TelegramBot:
         
         🚀 CONEXIÓN CON IA ACTIVADA:
         """
+        received_at = time.perf_counter()
+        
         # Extraer información del mensaje
         message_text = update.message.text
         user_id = update.effective_user.id
+        chat_id = update.effective_chat.id
+        
+        # ⏱️ Retraso desde que Telegram recibió el mensaje (resolución de 1s)
+        if update.message.date is not None:
+            lag = (datetime.now(timezone.utc) - update.message.date).total_seconds()
+            STAGE_SECONDS.observe(max(0.0, lag), stage="receipt")
         
         logger.info(f"📥 Mensaje recibido de usuario {user_id}: {message_text[:50]}...")
         
+        # 👑🌊 Administradores y flood se deciden sin la IA
+        local = await self._local_decision(update, context)
+        if local is not None:
+            source, action = local
+            DECISIONS_TOTAL.inc(source=source, action=action.value)
+            ACTIONS_TOTAL.inc(action=action.value, chat=chat_id)
+            STAGE_SECONDS.observe(time.perf_counter() - received_at, stage="total")
+            return
+        
+        # ✂️ Mensajes seguidos del mismo usuario se analizan juntos al cerrar la ráfaga
+        if self.bursts is not None:
+            self.bursts.add((chat_id, user_id), (update, context, received_at))
+            return
+        
+        await self._moderate([(update, context, received_at)])
+
+    async def _moderate(self, messages: List[Tuple[Update, ContextTypes.DEFAULT_TYPE, float]]) -> None:
+        """
+        🤖 Analiza con la IA uno o varios mensajes seguidos del MISMO usuario
+        en el MISMO chat (una ráfaga) y aplica el veredicto a todos.
+        
+        PARÁMETROS:
+        - messages: (update, context, momento de llegada) de cada mensaje, en orden
+        """
+        update, context, _ = messages[-1]
+        updates = [message_update for message_update, _, _ in messages]
+        user_id = update.effective_user.id
+        chat_id = update.effective_chat.id
+        # Una ráfaga se analiza como un solo texto (una línea por mensaje)
+        message_text = "\n".join(message_update.message.text for message_update in updates)
+        if len(updates) > 1:
+            logger.info(f"✂️ Ráfaga de {len(updates)} mensajes de usuario {user_id}: un solo análisis")
+        
         # 🤖 CONECTAR CON LA IA PARA MODERACIÓN
+        action: Optional[ModerationAction] = None
         try:
-            # Importar la función de análisis
-            from ..moderator.ai_analyzer import analyze_message, ModerationAction
-            
             # Analizar el mensaje con IA
             logger.info("🧠 Enviando mensaje a la IA para análisis...")
-            result = await analyze_message(message_text, user_id)
+            deleted = False
+            analysis_started = time.perf_counter()
+            # 🤝 Usuario de confianza fuera de la muestra: pre-filtros y caché, sin Gemini
+            if self.reputation is not None and not self.reputation.should_analyze(user_id):
+                logger.info(f"🤝 Usuario de confianza {user_id}: solo filtros locales (fuera de la muestra)")
+                result = await analyze_message_locally(message_text, user_id)
+                action = result.action
+                if action in (ModerationAction.DELETE, ModerationAction.BAN):
+                    self._delete_all(context, updates)
+                    deleted = True
+            elif self.settings.ai_two_stage_enabled or self.settings.ai_streaming_enabled:
+                # ⚡ Borrar en cuanto se conoce la acción; la razón sigue llegando
+                if self.settings.ai_two_stage_enabled:
+                    pending = await analyze_message_two_stage(message_text, user_id)
+                else:
+                    pending = await analyze_message_streaming(message_text, user_id)
+                # La acción publicada es la que se ejecuta, aunque el resto del análisis falle
+                action = await pending.action()
+                if action in (ModerationAction.DELETE, ModerationAction.BAN):
+                    self._delete_all(context, updates)
+                    deleted = True
+                result = await pending.result()
+            else:
+                result = await analyze_message(message_text, user_id)
+                action = result.action
+            STAGE_SECONDS.observe(time.perf_counter() - analysis_started, stage="analysis")
+            if self.reputation is not None:
+                # Una vez por análisis (una ráfaga cuenta como uno); solo "llm" suma a la racha
+                self.reputation.record(user_id, action.value, result.confidence, result.source)
+            actions_started = time.perf_counter()
             
-            logger.info(f"🎯 Decisión de IA: {result.action.value} (confianza: {result.confidence:.2f})")
+            logger.info(f"🎯 Decisión de IA: {action.value} (confianza: {result.confidence:.2f})")
             logger.info(f"📝 Razón: {result.reason}")
             
-            # 🚀 EJECUTAR ACCIÓN SEGÚN LA DECISIÓN DE LA IA
-            if result.action == ModerationAction.DELETE:
-                # Eliminar mensaje
-                await update.message.delete()
+            # 🚀 ENCOLAR ACCIÓN SEGÚN LA DECISIÓN DE LA IA (self.actions la ejecuta)
+            if action == ModerationAction.DELETE:
+                # Eliminar mensaje(s) (si el streaming no lo borró ya)
+                if not deleted:
+                    self._delete_all(context, updates)
                 logger.warning(f"🗑️ Mensaje eliminado de usuario {user_id}: {result.reason}")
                 
                 # Enviar advertencia privada (opcional)
                 if self.settings.warn_before_delete:
-                    await context.bot.send_message(
-                        chat_id=user_id,
-                        text=f"⚠️ Tu mensaje fue eliminado del grupo Python CDMX.\n\n"
-                             f"Razón: {result.reason}\n\n"
-                             f"Por favor, asegúrate de seguir las reglas del grupo."
+                    self.notifier.warn(
+                        context.bot, chat_id, update.effective_user,
+                        f"⚠️ Tu mensaje fue eliminado del grupo Python CDMX.\n\n"
+                        f"Razón: {result.reason}\n\n"
+                        f"Por favor, asegúrate de seguir las reglas del grupo."
                     )
                     
-            elif result.action == ModerationAction.WARN:
+            elif action == ModerationAction.WARN:
                 # Enviar advertencia privada
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=f"⚠️ Advertencia del grupo Python CDMX.\n\n"
-                         f"Razón: {result.reason}\n\n"
-                         f"Tu mensaje está en el límite de las reglas. "
-                         f"Por favor, ten cuidado con futuros mensajes."
+                outcome = self.notifier.warn(
+                    context.bot, chat_id, update.effective_user,
+                    f"⚠️ Advertencia del grupo Python CDMX.\n\n"
+                    f"Razón: {result.reason}\n\n"
+                    f"Tu mensaje está en el límite de las reglas. "
+                    f"Por favor, ten cuidado con futuros mensajes."
                 )
-                logger.warning(f"⚠️ Advertencia enviada a usuario {user_id}: {result.reason}")
+                logger.warning(f"⚠️ Advertencia a usuario {user_id} ({outcome}): {result.reason}")
                 
-            elif result.action == ModerationAction.BAN:
+            elif action == ModerationAction.BAN:
                 # Banear usuario (casos extremos)
-                await context.bot.ban_chat_member(
-                    chat_id=update.effective_chat.id,
-                    user_id=user_id
-                )
-                await update.message.delete()
+                self.actions.enqueue(context.bot, "ban_chat_member", chat_id, user_id=user_id)
+                if not deleted:
+                    self._delete_all(context, updates)
                 logger.error(f"🔨 Usuario {user_id} baneado: {result.reason}")
                 
-            elif result.action == ModerationAction.TIMEOUT:
+            elif action == ModerationAction.TIMEOUT:
                 # Silenciar usuario temporalmente (5 minutos)
-                import datetime
-                until_date = datetime.datetime.now() + datetime.timedelta(minutes=5)
-                await context.bot.restrict_chat_member(
-                    chat_id=update.effective_chat.id,
+                self.actions.enqueue(
+                    context.bot, "restrict_chat_member", chat_id,
                     user_id=user_id,
                     permissions=telegram.ChatPermissions(can_send_messages=False),
-                    until_date=until_date
+                    until_date=until_utc(5)
                 )
                 logger.warning(f"⏰ Usuario {user_id} silenciado 5 min: {result.reason}")
                 
-            elif result.action == ModerationAction.APPROVE:
+            elif action == ModerationAction.APPROVE:
                 # Mensaje aprobado - no hacer nada
                 logger.info(f"✅ Mensaje aprobado: {result.reason}")
+            
+            STAGE_SECONDS.observe(time.perf_counter() - actions_started, stage="actions")
                 
         except Exception as e:
             # Si hay error con la IA, aprobar por seguridad
             logger.error(f"❌ Error en moderación con IA: {e}")
             logger.info("🛡️ Aprobando mensaje por seguridad ante error de IA")
+            if action is None:
+                action = ModerationAction.APPROVE
         
+        # 📊 Se cuenta la acción ejecutada, también la aprobación por error
+        ACTIONS_TOTAL.inc(len(updates), action=action.value, chat=chat_id)
+        finished = time.perf_counter()
+        for _, _, received_at in messages:
+            STAGE_SECONDS.observe(finished - received_at, stage="total")
         logger.info("✅ Mensaje procesado exitosamente")
 
+    async def _local_decision(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> Optional[Tuple[str, ModerationAction]]:
+        """
+        ¿Se puede decidir el mensaje sin analizarlo con la IA?
+        
+        Returns:
+            (fuente, acción) ya aplicada: ("admin", APPROVE) o
+            ("flood", DELETE|TIMEOUT); None si hay que analizarlo
+        """
+        user_id = update.effective_user.id
+        chat_id = update.effective_chat.id
+        
+        admin_started = time.perf_counter()
+        is_admin = await self.admins.is_admin(
+            context.bot, update.effective_chat, user_id, update.message.sender_chat
+        )
+        STAGE_SECONDS.observe(time.perf_counter() - admin_started, stage="admin_check")
+        if is_admin:
+            logger.info(f"👑 Mensaje de administrador {user_id}: no se modera")
+            return "admin", ModerationAction.APPROVE
+        
+        if self.flood is not None:
+            excess = self.flood.check(chat_id, user_id)
+            # FLOOD_ACTION=log solo cuenta y registra: el mensaje sigue al análisis normal
+            if excess and self.settings.flood_action != "log":
+                return "flood", self._apply_flood(update, context, excess)
+        return None
+
+    def _apply_flood(self, update: Update, context: ContextTypes.DEFAULT_TYPE, excess: int) -> ModerationAction:
+        """🌊 Borra el mensaje que pasó el límite y, al cruzarlo (excess == 1), silencia si FLOOD_ACTION=timeout"""
+        user_id = update.effective_user.id
+        chat_id = update.effective_chat.id
+        self._delete(context, update)
+        if excess > 1:
+            return ModerationAction.DELETE
+        
+        if self.reputation is not None:
+            self.reputation.record(user_id, ModerationAction.DELETE.value, 1.0, "flood")
+        if self.settings.flood_action != "timeout":
+            return ModerationAction.DELETE
+        
+        minutes = self.settings.flood_timeout_minutes
+        self.actions.enqueue(
+            context.bot, "restrict_chat_member", chat_id,
+            user_id=user_id,
+            permissions=telegram.ChatPermissions(can_send_messages=False),
+            until_date=until_utc(minutes),
+        )
+        logger.warning(f"⏰ Usuario {user_id} silenciado {minutes} min por flood en chat {chat_id}")
+        return ModerationAction.TIMEOUT
+
+    def _delete(self, context: ContextTypes.DEFAULT_TYPE, update: Update) -> None:
+        """🗑️ Encola el borrado del mensaje (se junta con otros borrados del chat)"""
+        self.actions.enqueue(
+            context.bot, "delete_message", update.effective_chat.id, message_id=update.message.message_id
+        )
+
+    def _delete_all(self, context: ContextTypes.DEFAULT_TYPE, updates: List[Update]) -> None:
+        """🗑️ Encola el borrado de todos los mensajes de una ráfaga"""
+        for update in updates:
+            self._delete(context, update)
+
+    def _collect_gauges(self) -> None:
+        """📊 Copia el estado del bot y del moderador (cola, circuito, caché) a gauges al exportar"""
+        if self.update_processor is not None:
+            updates = self.update_processor.get_stats()
+            metrics.gauge("viperguard_updates_running", "Updates de Telegram procesándose").set(updates["running"])
+            metrics.gauge(
+                "viperguard_updates_active_keys", "Chats/usuarios con updates en proceso o esperando turno"
+            ).set(updates["tracked_keys"])
+        
+        metrics.gauge(
+            "viperguard_telegram_actions_pending", "Acciones hacia Telegram esperando en cola"
+        ).set(self.actions.pending)
+        if self.flood is not None:
+            metrics.gauge(
+                "viperguard_flood_tracked_users", "Usuarios con mensajes en la ventana de flood"
+            ).set(len(self.flood.counter))
+        
+        stats = moderator.get_stats()
+        scheduler = stats["scheduler"]
+        metrics.gauge("viperguard_llm_in_flight", "Llamadas a Gemini en vuelo").set(scheduler["in_flight"])
+        metrics.gauge("viperguard_llm_queue_depth", "Llamadas a Gemini esperando lugar").set(scheduler["queue_depth"])
+        if "circuit_breaker" in stats:
+            metrics.gauge(
+                "viperguard_circuit_open", "1 si el circuit breaker de Gemini está abierto"
+            ).set(1 if stats["circuit_breaker"]["state"] == "open" else 0)
+        if "cache" in stats:
+            metrics.gauge("viperguard_cache_entries", "Veredictos en caché").set(stats["cache"]["size"])
+
+    async def _prepare_moderator(self) -> None:
+        """
+        🔥 Inicializa el moderador (una sola vez) y, si AI_WARMUP_PROBE, abre
+        la conexión con Gemini para que el primer mensaje no pague ese costo.
+        
+        Si falla, el bot arranca igual: analyze_message() reintenta la
+        inicialización con el primer mensaje.
+        """
+        try:
+            await moderator.ensure_initialized()
+            if self.settings.ai_warmup_probe:
+                await moderator.warm_up()
+        except Exception as e:
+            logger.error(f"❌ No se pudo preparar el moderador al iniciar: {e}")
+
+    async def _start_metrics_server(self) -> None:
+        """📈 Levanta el endpoint /metrics (si METRICS_ENABLED)"""
+        if not self.settings.metrics_enabled:
+            return
+        metrics.on_collect(self._collect_gauges)
+        self.metrics_server = MetricsServer(metrics, self.settings.metrics_host, self.settings.metrics_port)
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            # Sin métricas el bot sigue moderando
+            logger.error(f"❌ No se pudo abrir el endpoint de métricas: {e}")
+            self.metrics_server = None
+
     async def start(self) -> None:
         """
         🚀 INICIA EL BOT Y LO MANTIENE FUNCIONANDO 24/7
@@ -259,31 +566,42 @@ class TelegramBot:
         PROCESO:
         1. 🔧 Inicializa la conexión con Telegram
         2. 📋 Registra todos los handlers
-        3. 🔄 Inicia el "polling" (escuchar mensajes)
+        2b. 🔥 Inicializa el moderador y calienta la conexión con Gemini
+        3. 🔄 Inicia el "polling" o el webhook (TELEGRAM_MODE)
         4. ⏳ Se queda corriendo hasta recibir Ctrl+C
         5. 🛑 Al detener, limpia todo elegantemente
         
         POLLING vs WEBHOOKS:
         - Polling = El bot pregunta a Telegram "¿hay mensajes nuevos?"
         - Webhooks = Telegram envía mensajes directamente al bot
-        - Usamos polling para desarrollo (más simple)
-        - En producción usaremos webhooks (más eficiente)
+        - Polling por defecto (más simple, no necesita URL pública)
+        - TELEGRAM_MODE=webhook para producción detrás de un proxy HTTPS
         """
         try:
             logger.info("🚀 Iniciando bot...")
+            started = time.perf_counter()
             
             # Inicializar la aplicación
             await self.initialize()
+            if self.reputation is not None:
+                self.reputation.load()
             
-            # AGREGAR: Inicializar la aplicación de Telegram
-            await self.application.initialize()
+            # AGREGAR: Inicializar la aplicación de Telegram mientras se
+            # prepara el moderador (Gemini + warm-up), antes de recibir mensajes
+            await asyncio.gather(self.application.initialize(), self._prepare_moderator())
             
-            # Iniciar polling
-            logger.info("🔄 Iniciando polling...")
+            # 📈 Endpoint de métricas Prometheus
+            await self._start_metrics_server()
+            
+            # Empezar a recibir updates (polling o webhook)
             await self.application.start()
-            await self.application.updater.start_polling()
+            await self._start_receiving()
             
-            logger.info("✅ Bot iniciado exitosamente - Presiona Ctrl+C para detener")
+            time_to_ready = time.perf_counter() - started
+            metrics.gauge(
+                "viperguard_time_to_ready_seconds", "Segundos desde start() hasta empezar a recibir mensajes"
+            ).set(time_to_ready)
+            logger.info(f"✅ Bot iniciado exitosamente en {time_to_ready:.2f}s - Presiona Ctrl+C para detener")
             
             # Mantener el bot ejecutándose
             import signal
@@ -305,14 +623,76 @@ class TelegramBot:
         finally:
             await self.stop()
 
+    async def _start_receiving(self) -> None:
+        """🔄 Empieza a recibir updates según TELEGRAM_MODE (polling o webhook)"""
+        if self.settings.telegram_mode == "webhook":
+            await self._start_webhook()
+        else:
+            logger.info(
+                f"🔄 Iniciando polling (long poll {self.settings.polling_timeout}s, "
+                f"allowed_updates={self.allowed_updates})..."
+            )
+            await self.application.updater.start_polling(
+                timeout=self.settings.polling_timeout,
+                bootstrap_retries=self.settings.polling_bootstrap_retries,
+                allowed_updates=self.allowed_updates,
+                drop_pending_updates=self.settings.telegram_drop_pending_updates,
+            )
+
+    async def _start_webhook(self) -> None:
+        """
+        🪝 Levanta el servidor local del webhook y registra la URL en Telegram.
+        
+        Los updates entran a la misma cola que el polling, así que pasan por
+        los mismos handlers y el mismo procesador concurrente.
+        """
+        if not self.settings.webhook_url:
+            raise ValueError("TELEGRAM_MODE=webhook requiere WEBHOOK_URL")
+        
+        # 🔐 Sin secreto configurado se genera uno por arranque (set_webhook lo actualiza)
+        secret_token = self.settings.webhook_secret_token or secrets.token_urlsafe(32)
+        
+        logger.info("🪝 Iniciando webhook...")
+        self.webhook_server = WebhookServer(
+            self.application,
+            self.settings.webhook_listen,
+            self.settings.webhook_port,
+            self.settings.webhook_path,
+            secret_token,
+        )
+        await self.webhook_server.start()
+        await self.application.bot.set_webhook(
+            url=self.settings.webhook_url,
+            secret_token=secret_token,
+            max_connections=self.settings.webhook_max_connections,
+            allowed_updates=self.allowed_updates,
+            drop_pending_updates=self.settings.telegram_drop_pending_updates,
+        )
+        logger.info(f"🪝 Webhook registrado en Telegram: {self.settings.webhook_url}")
+
     async def stop(self) -> None:
         """Detiene el bot"""
+        if self.webhook_server is not None:
+            await self.webhook_server.stop()
+            self.webhook_server = None
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+            self.metrics_server = None
         if self.application:
             logger.info("🛑 Deteniendo bot...")
             # Verificar que el updater esté corriendo antes de detenerlo
             if self.application.updater.running:
                 await self.application.updater.stop()
             await self.application.stop()
+            # ✂️ Analizar las ráfagas que quedaron abiertas (encolan sus acciones)
+            if self.bursts is not None:
+                await self.bursts.drain()
+            # 🔌 Cancelar la prueba agendada del circuit breaker y lo que quede en segundo plano
+            await moderator.stop()
+            # 📤 Vaciar la cola de acciones antes de cerrar las conexiones del bot
+            await self.actions.stop()
+            if self.reputation is not None:
+                self.reputation.save()
             # AGREGAR: Limpiar recursos
             await self.application.shutdown()
             logger.info("✅ Bot detenido")
@@ -0,0 +1,126 @@
+"""
+🔀 PROCESAMIENTO CONCURRENTE DE UPDATES CON ORDEN POR CHAT Y POR USUARIO
+
+Por defecto python-telegram-bot procesa los updates de UNO en UNO: una
+llamada lenta a Gemini en un grupo frena a todos los demás grupos y
+usuarios. Este procesador deja correr varios updates a la vez, pero:
+
+- 📋 Los updates del MISMO chat se procesan en orden de llegada
+- 👤 Los updates del MISMO usuario también (aunque vengan de chats distintos)
+- 🚀 Chats y usuarios sin relación avanzan en paralelo
+
+Cómo funciona: al llegar cada update se "forma" (sin esperar) detrás del
+último update de su chat y de su usuario. Solo cuando esos terminan toma
+uno de los `max_concurrent_updates` lugares de ejecución, así un chat con
+una ráfaga de mensajes no ocupa todos los lugares esperando su turno.
+
+Uso:
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+    Application.builder().token(token).concurrent_updates(processor).build()
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Hashable, List, Tuple
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from .metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Updates aceptados a la vez (corriendo + esperando turno). Es el semáforo de
+# python-telegram-bot; la concurrencia real la limita self._workers.
+DEFAULT_MAX_PENDING_UPDATES = 1024
+
+
+def ordering_keys(update: object) -> Tuple[Hashable, ...]:
+    """Llaves cuyo orden hay que respetar: ("chat", id) y ("user", id)"""
+    if not isinstance(update, Update):
+        return ()
+    keys: List[Hashable] = []
+    if update.effective_chat is not None:
+        keys.append(("chat", update.effective_chat.id))
+    if update.effective_user is not None:
+        keys.append(("user", update.effective_user.id))
+    return tuple(keys)
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    🔀 PROCESADOR CONCURRENTE QUE RESPETA EL ORDEN POR CHAT/USUARIO
+
+    Args:
+        max_concurrent_updates: Handlers ejecutándose a la vez
+        max_pending_updates: Updates aceptados a la vez (en ejecución + en espera)
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int = DEFAULT_MAX_PENDING_UPDATES):
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates debe ser >= 1")
+        # El semáforo de PTB acota los pendientes; el nuestro, los que corren
+        super().__init__(max(max_pending_updates, max_concurrent_updates))
+        self.concurrency = max_concurrent_updates
+        self._workers = asyncio.Semaphore(max_concurrent_updates)
+        # Último update (su future de "terminado") de cada chat/usuario
+        self._tails: Dict[Hashable, asyncio.Future] = {}
+
+        # 📊 Métricas
+        self.processed = 0
+        self.ordered_waits = 0
+        self.order_wait_total = 0.0
+        self.running = 0
+        self.peak_running = 0
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        keys = ordering_keys(update)
+
+        # Formarse detrás de los updates anteriores del mismo chat/usuario.
+        # Esto ocurre ANTES del primer await: el orden es el de llegada.
+        previous = {id(f): f for f in (self._tails.get(key) for key in keys) if f is not None}
+        done = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._tails[key] = done
+
+        try:
+            if previous:
+                started = time.perf_counter()
+                await asyncio.wait(previous.values())  # wait() no cancela a los demás si nos cancelan
+                waited = time.perf_counter() - started
+                self.ordered_waits += 1
+                self.order_wait_total += waited
+                STAGE_SECONDS.observe(waited, stage="order_wait")
+
+            async with self._workers:
+                self.running += 1
+                self.peak_running = max(self.peak_running, self.running)
+                try:
+                    await coroutine
+                finally:
+                    self.running -= 1
+                    self.processed += 1
+        finally:
+            if not done.done():
+                done.set_result(None)
+            for key in keys:
+                if self._tails.get(key) is done:
+                    del self._tails[key]
+
+    async def initialize(self) -> None:
+        logger.info(f"🔀 Procesando hasta {self.concurrency} updates a la vez (orden por chat y usuario)")
+
+    async def shutdown(self) -> None:
+        """Nada que liberar: las tareas pendientes las cancela la Application"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "peak_running": self.peak_running,
+            "processed": self.processed,
+            "ordered_waits": self.ordered_waits,
+            "avg_order_wait": round(self.order_wait_total / self.ordered_waits, 4) if self.ordered_waits else 0.0,
+            "tracked_keys": len(self._tails),
+        }
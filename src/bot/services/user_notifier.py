@@ -0,0 +1,190 @@
+"""
+📨 AVISOS A USUARIOS (PRIVADO, SIN REPETIR, CON RESPALDO EN EL GRUPO)
+
+Las ramas WARN y DELETE avisan al usuario por privado, pero la mayoría de los
+miembros nunca inició el bot: Telegram responde Forbidden y la llamada se
+desperdicia (una y otra vez, con cada mensaje de esa persona).
+
+Este módulo pone tres filtros antes de gastar una llamada:
+
+1. 🔁 Ventana anti-repetición: un usuario no recibe dos avisos en N segundos
+2. 📵 Caché (con caducidad) de usuarios que ya respondieron Forbidden: a
+   ellos no se les vuelve a intentar el privado hasta que caduque
+3. 💬 Respaldo opcional: si el privado no es posible, UNA respuesta en el
+   grupo mencionando al usuario, que se borra sola después de un rato
+"""
+
+import asyncio
+import html
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from telegram import User
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden
+
+from .action_queue import ActionExecutor
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_TRACKED_USERS = 10_000  # Tope de memoria de cada ExpiringSet
+
+USER_WARNINGS_TOTAL = metrics.counter(
+    "viperguard_user_warnings_total",
+    "Avisos a usuarios por resultado (privado, repetido, sin privado, respaldo en grupo)",
+    ("outcome",),
+)
+
+
+class ExpiringSet:
+    """
+    ⏳ CONJUNTO ACOTADO CUYOS ELEMENTOS CADUCAN
+
+    Cada llave vive `ttl` segundos; si hay más de `max_size` se descartan
+    las más antiguas.
+    """
+
+    def __init__(self, max_size: int = MAX_TRACKED_USERS, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self._clock = clock
+        self._expires: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def add(self, key: Hashable, ttl: float) -> None:
+        self._expires[key] = self._clock() + ttl
+        self._expires.move_to_end(key)
+        while len(self._expires) > self.max_size:
+            self._expires.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self._expires.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is None:
+            return False
+        if self._clock() >= expires_at:
+            del self._expires[key]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+def is_unreachable_error(error: Optional[Exception]) -> bool:
+    """¿El error dice que el bot no puede escribirle por privado a ese usuario?"""
+    if isinstance(error, Forbidden):
+        return True  # "bot can't initiate conversation with a user", "bot was blocked by the user"
+    return isinstance(error, BadRequest) and "chat not found" in str(error).lower()
+
+
+class WarningNotifier:
+    """
+    📨 ENVÍA AVISOS DE MODERACIÓN SIN DESPERDICIAR LLAMADAS
+
+    Uso:
+        notifier = WarningNotifier(actions, dedupe_seconds=300, unreachable_ttl=86400)
+        notifier.warn(context.bot, chat_id, update.effective_user, "⚠️ ...")
+
+    Args:
+        actions: Cola de acciones hacia Telegram (los envíos pasan por ella)
+        dedupe_seconds: Ventana en la que no se repite un aviso al mismo usuario (0 = sin filtro)
+        unreachable_ttl: Segundos que se recuerda que un usuario no acepta privados
+        group_fallback: Avisar en el grupo cuando el privado no es posible
+        group_fallback_ttl: Segundos antes de borrar el aviso del grupo
+    """
+
+    def __init__(
+        self,
+        actions: ActionExecutor,
+        dedupe_seconds: float,
+        unreachable_ttl: float,
+        group_fallback: bool = False,
+        group_fallback_ttl: float = 60.0,
+    ):
+        self.actions = actions
+        self.dedupe_seconds = dedupe_seconds
+        self.unreachable_ttl = unreachable_ttl
+        self.group_fallback = group_fallback
+        self.group_fallback_ttl = group_fallback_ttl
+
+        self._recent = ExpiringSet()
+        self._unreachable = ExpiringSet()
+
+        # 📊 Métricas
+        self.outcomes: Dict[str, int] = {}
+
+    def warn(self, bot: Any, chat_id: int, user: User, text: str) -> str:
+        """
+        Avisa a `user` de una acción tomada en `chat_id`. No espera a Telegram.
+
+        Returns:
+            Qué se hizo: "dm" (privado encolado), "deduped", "fallback" o "skipped"
+        """
+        if user.id in self._recent:
+            return self._count("deduped")
+        if self.dedupe_seconds > 0:
+            self._recent.add(user.id, self.dedupe_seconds)
+
+        if user.id in self._unreachable:
+            # 📵 Ya sabemos que el privado falla: ni lo intentamos
+            self._count("known_unreachable")
+            return self._count(self._fallback(bot, chat_id, user, text))
+
+        self.actions.enqueue(
+            bot, "send_message", user.id,
+            on_done=partial(self._on_dm_done, bot, chat_id, user, text),
+            text=text,
+        )
+        return self._count("dm")
+
+    def mark_reachable(self, user_id: int) -> None:
+        """El usuario inició el bot (/start): ya se le puede escribir por privado"""
+        self._unreachable.discard(user_id)
+
+    def _on_dm_done(self, bot: Any, chat_id: int, user: User, text: str, result: Any, error: Optional[Exception]) -> None:
+        if error is None:
+            self._count("dm_sent")
+        elif is_unreachable_error(error):
+            if self.unreachable_ttl > 0:
+                self._unreachable.add(user.id, self.unreachable_ttl)
+            self._count("dm_unreachable")
+            logger.info(f"📵 Usuario {user.id} no acepta mensajes privados (se recuerda {self.unreachable_ttl:.0f}s)")
+            self._count(self._fallback(bot, chat_id, user, text))
+
+    def _fallback(self, bot: Any, chat_id: int, user: User, text: str) -> str:
+        """💬 Aviso en el grupo con mención, que se borra después de group_fallback_ttl"""
+        if not self.group_fallback:
+            return "skipped"
+        self.actions.enqueue(
+            bot, "send_message", chat_id,
+            on_done=partial(self._schedule_cleanup, bot, chat_id),
+            text=f"{user.mention_html()} {html.escape(text)}",
+            parse_mode=ParseMode.HTML,
+        )
+        return "fallback"
+
+    def _schedule_cleanup(self, bot: Any, chat_id: int, result: Any, error: Optional[Exception]) -> None:
+        message_id = getattr(result, "message_id", None)
+        if message_id is None:
+            return
+        asyncio.get_running_loop().call_later(
+            self.group_fallback_ttl,
+            partial(self.actions.enqueue, bot, "delete_message", chat_id, message_id=message_id),
+        )
+
+    def _count(self, outcome: str) -> str:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        USER_WARNINGS_TOTAL.inc(outcome=outcome)
+        return outcome
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.outcomes,
+            "unreachable_users": len(self._unreachable),
+            "recently_warned": len(self._recent),
+        }
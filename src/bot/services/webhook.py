@@ -0,0 +1,161 @@
+"""
+🪝 RECEPCIÓN DE UPDATES POR WEBHOOK (ALTERNATIVA AL LONG POLLING)
+
+Con polling el bot pregunta a Telegram "¿hay mensajes nuevos?" en un bucle.
+Con webhook Telegram hace un POST con cada update a una URL nuestra:
+
+    Telegram ──HTTPS──▶ proxy (nginx, Caddy, túnel) ──HTTP──▶ WebhookServer
+                                                               │
+                                          application.update_queue ──▶ handlers
+
+WebhookServer es un HTTP/1.1 mínimo sobre asyncio (sin tornado), con
+keep-alive porque Telegram reutiliza hasta `max_connections` conexiones:
+
+- 🔐 Solo acepta POST a `path` con la cabecera X-Telegram-Bot-Api-Secret-Token
+  correcta (comparación en tiempo constante); si no → 403
+- 📨 Convierte el JSON en Update y lo deja en la MISMA cola que usa el
+  polling: los handlers, el orden por chat y las métricas no cambian
+- ⚡ Responde 200 en cuanto encola, sin esperar la moderación (Telegram
+  reintenta si tardamos)
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+from typing import Optional, Set
+
+from telegram import Update
+from telegram.ext import Application
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY_BYTES = 1024 * 1024  # Un update de texto pesa unos pocos KB
+
+WEBHOOK_REQUESTS_TOTAL = metrics.counter(
+    "viperguard_webhook_requests_total",
+    "Peticiones recibidas en el webhook por código de respuesta",
+    ("status",),
+)
+
+
+class WebhookServer:
+    """
+    🪝 SERVIDOR DEL WEBHOOK DE TELEGRAM
+
+    Uso:
+        server = WebhookServer(application, "127.0.0.1", 8080, "/telegram", secret)
+        await server.start()
+        await application.bot.set_webhook(url, secret_token=secret)
+        ...
+        await server.stop()
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        host: str,
+        port: int,
+        path: str,
+        secret_token: str,
+    ):
+        if not secret_token:
+            raise ValueError("El webhook necesita un secret_token")
+        self.application = application
+        self.host = host
+        self.port = port
+        self.path = "/" + path.lstrip("/")
+        self._secret = secret_token.encode("utf-8")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+        # 📊 Métricas
+        self.received = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🪝 Webhook escuchando en http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()  # Conexiones keep-alive abiertas por Telegram
+            await self._server.wait_closed()
+            await asyncio.sleep(0)  # Dejar terminar los handlers de esas conexiones
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:  # keep-alive: varias peticiones por conexión
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    self._respond(writer, 413, keep_alive=False)
+                    break
+                body = await reader.readexactly(length)
+
+                status = self._route(method, target, headers, body)
+                self._respond(writer, status, keep_alive=True)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _route(self, method: str, target: str, headers: dict, body: bytes) -> int:
+        """Valida la petición y encola el update; devuelve el código HTTP"""
+        if target.split("?", 1)[0] != self.path:
+            status = 404
+        elif method != "POST":
+            status = 405
+        elif not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode("utf-8"), self._secret):
+            logger.warning("🔐 Petición al webhook con secret token inválido")
+            status = 403
+        else:
+            status = self._enqueue(body)
+
+        WEBHOOK_REQUESTS_TOTAL.inc(status=status)
+        if status != 200:
+            self.rejected += 1
+        return status
+
+    def _enqueue(self, body: bytes) -> int:
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"❌ Update inválido en el webhook: {e}")
+            return 400
+        self.application.update_queue.put_nowait(update)
+        self.received += 1
+        return 200
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        reason = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+                  405: "Method Not Allowed", 413: "Payload Too Large"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        )
+
+    def get_stats(self) -> dict:
+        return {"received": self.received, "rejected": self.rejected, "connections": len(self._connections)}
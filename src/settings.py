@@ -22,8 +22,8 @@ ARCHIVOS QUE LO USAN:
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field, computed_field
-from typing import Optional, List
+from pydantic import Field, PrivateAttr, computed_field
+from typing import FrozenSet, Optional, List, Tuple
 import os
 from pathlib import Path
 
@@ -62,6 +62,111 @@ class Settings(BaseSettings):
         # Ejemplo en .env: TELEGRAM_CHAT_ID=-1001234567890
     )
     
+    telegram_base_url: str = Field(
+        default="",
+        description="🧪 URL alternativa de la Bot API (ej: http://127.0.0.1:8081 de benchmarks/telegram_ingest.py)"
+        # Vacío = https://api.telegram.org
+    )
+    
+    # ===================================================================
+    # 📡 POLLING Y CONEXIONES CON LA BOT API
+    # ===================================================================
+    
+    polling_timeout: int = Field(
+        default=30,
+        ge=0,
+        le=50,
+        description="📡 Long poll: segundos que Telegram retiene getUpdates si no hay mensajes"
+    )
+    
+    polling_read_timeout: float = Field(
+        default=5.0,
+        gt=0,
+        description="📡 Margen de lectura de getUpdates (se suma a polling_timeout)"
+    )
+    
+    polling_bootstrap_retries: int = Field(
+        default=5,
+        ge=-1,
+        description="📡 Reintentos al arrancar el polling si Telegram no responde (-1 = sin límite)"
+    )
+    
+    polling_connection_pool_size: int = Field(
+        default=1,
+        ge=1,
+        le=8,
+        description="🔌 Conexiones reservadas para getUpdates (solo hay un long poll a la vez)"
+    )
+    
+    telegram_connection_pool_size: int = Field(
+        default=64,
+        ge=1,
+        le=1024,
+        description="🔌 Conexiones para las llamadas normales (borrar, banear, avisar por DM)"
+    )
+    
+    telegram_pool_timeout: float = Field(
+        default=3.0,
+        gt=0,
+        description="🔌 Segundos máximos esperando una conexión libre del pool"
+    )
+    
+    telegram_read_timeout: float = Field(
+        default=10.0,
+        gt=0,
+        description="⏱️ Segundos máximos de espera por respuesta de la Bot API"
+    )
+    
+    telegram_drop_pending_updates: bool = Field(
+        default=False,
+        description="🧹 Al iniciar, descartar los updates acumulados mientras el bot estuvo apagado"
+    )
+    
+    # ===================================================================
+    # 🪝 RECEPCIÓN DE UPDATES: POLLING O WEBHOOK
+    # ===================================================================
+    
+    telegram_mode: str = Field(
+        default="polling",
+        pattern=r"^(polling|webhook)$",
+        description="🪝 polling (el bot pregunta a Telegram) o webhook (Telegram hace POST al bot)"
+    )
+    
+    webhook_url: str = Field(
+        default="",
+        description="🪝 URL pública HTTPS que Telegram llamará (ej: https://bot.ejemplo.com/telegram)"
+    )
+    
+    webhook_listen: str = Field(
+        default="127.0.0.1",
+        description="🪝 Interfaz del servidor local del webhook (detrás de un proxy HTTPS)"
+    )
+    
+    webhook_port: int = Field(
+        default=8080,
+        ge=0,
+        le=65535,
+        description="🪝 Puerto del servidor local del webhook"
+    )
+    
+    webhook_path: str = Field(
+        default="/telegram",
+        description="🪝 Ruta local donde llegan los POST de Telegram"
+    )
+    
+    webhook_secret_token: str = Field(
+        default="",
+        pattern=r"^[A-Za-z0-9_-]{0,256}$",
+        description="🔐 Secreto que Telegram envía en cada POST (vacío = se genera uno al iniciar)"
+    )
+    
+    webhook_max_connections: int = Field(
+        default=40,
+        ge=1,
+        le=100,
+        description="🪝 Conexiones simultáneas que Telegram puede abrir al webhook"
+    )
+    
     # ===================================================================
     # 🧠 CONFIGURACIÓN DE GOOGLE GEMINI (INTELIGENCIA ARTIFICIAL)
     # ===================================================================
@@ -101,6 +206,88 @@ class Settings(BaseSettings):
         # 1000 tokens ≈ 750 palabras (perfecto para moderación)
     )
     
+    ai_timeout_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        le=300,
+        description="⏱️ Segundos máximos de espera por respuesta de Gemini"
+    )
+    
+    ai_max_retries: int = Field(
+        default=3,
+        ge=0,
+        le=10,
+        description="🔁 Reintentos de LangChain si Gemini falla"
+    )
+    
+    ai_warmup_probe: bool = Field(
+        default=True,
+        description="🔥 Al iniciar, enviar una llamada mínima a Gemini para abrir la conexión HTTP"
+    )
+    
+    ai_backend: str = Field(
+        default="langchain",
+        pattern=r"^(langchain|genai|fake)$",
+        description="🔌 Cliente de Gemini: langchain, genai (SDK directo) o fake (simulado)"
+        # langchain = ChatGoogleGenerativeAI (original)
+        # genai = SDK google-genai sin LangChain (menos overhead, requiere: uv add google-genai)
+        # fake = respuestas simuladas en proceso, sin red (pruebas y benchmarks)
+    )
+    
+    ai_fake_latency_ms: int = Field(
+        default=0,
+        ge=0,
+        description="🧪 Latencia simulada por llamada del backend fake (ms)"
+    )
+    
+    gemini_base_url: str = Field(
+        default="",
+        description="🧪 URL alternativa de la API de Gemini (ej: http://127.0.0.1:8089 de benchmarks/fake_gemini.py)"
+        # Vacío = API real de Google
+    )
+    
+    ai_record_mode: str = Field(
+        default="off",
+        pattern=r"^(off|record|replay)$",
+        description="📼 off, record (graba prompt→respuesta) o replay (responde desde la grabación sin red)"
+    )
+    
+    ai_record_path: str = Field(
+        default="gemini_recordings.jsonl",
+        description="📼 Archivo JSONL con las respuestas grabadas"
+    )
+    
+    ai_replay_latency: bool = Field(
+        default=False,
+        description="📼 En replay, esperar la latencia grabada de cada respuesta"
+    )
+    
+    # ===================================================================
+    # 🐇 CASCADA DE MODELOS (RÁPIDO PRIMERO, FUERTE PARA CASOS DIFÍCILES)
+    # ===================================================================
+
+    ai_cascade_enabled: bool = Field(
+        default=False,
+        description="🐇 Responder primero con un modelo rápido y escalar a ai_model solo si hace falta"
+    )
+
+    ai_cascade_fast_model: str = Field(
+        default="gemini-1.5-flash-8b",
+        description="🐇 Modelo rápido/barato que responde primero en la cascada"
+    )
+
+    ai_cascade_escalate_below: float = Field(
+        default=0.85,
+        ge=0.0,
+        le=1.0,
+        description="🦉 Confianza mínima del modelo rápido; por debajo se consulta a ai_model"
+    )
+
+    ai_cascade_escalate_destructive: bool = Field(
+        default=True,
+        description="🦉 Confirmar con ai_model cualquier DELETE/BAN del modelo rápido"
+    )
+    
     # === ENVIRONMENT CONFIGURATION ===
     environment: str = Field(
         default="development",
@@ -113,7 +300,28 @@ class Settings(BaseSettings):
         pattern=r"^(DEBUG|INFO|WARNING|ERROR|CRITICAL)$",
         description="Nivel de logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)"
     )
-    
+
+    # ===================================================================
+    # 📈 MÉTRICAS PROMETHEUS (LATENCIA POR ETAPA)
+    # ===================================================================
+
+    metrics_enabled: bool = Field(
+        default=False,
+        description="📈 Exponer /metrics en formato Prometheus al iniciar el bot"
+    )
+
+    metrics_host: str = Field(
+        default="127.0.0.1",
+        description="📈 Interfaz del endpoint de métricas (solo local por defecto)"
+    )
+
+    metrics_port: int = Field(
+        default=9464,
+        ge=0,
+        le=65535,
+        description="📈 Puerto del endpoint de métricas"
+    )
+
     # ===================================================================
     # 🛡️ CONFIGURACIÓN DE MODERACIÓN 
     # ===================================================================
@@ -139,6 +347,34 @@ class Settings(BaseSettings):
         # False = Elimina silenciosamente
     )
     
+    warning_dedupe_seconds: int = Field(
+        default=300,
+        ge=0,
+        le=86400,
+        description="🔁 No repetir avisos al mismo usuario dentro de esta ventana (0 = sin filtro)"
+    )
+    
+    dm_unreachable_ttl: int = Field(
+        default=86400,
+        ge=0,
+        le=30 * 86400,
+        description="📵 Segundos que se recuerda que un usuario no acepta mensajes privados (Forbidden)"
+    )
+    
+    warning_group_fallback: bool = Field(
+        default=False,
+        description="💬 Si el privado no es posible, avisar en el grupo con una mención"
+        # True = Una respuesta en el grupo que se borra sola
+        # False = Sin aviso (solo se registra en logs)
+    )
+    
+    warning_group_fallback_ttl: int = Field(
+        default=60,
+        ge=5,
+        le=3600,
+        description="🧹 Segundos antes de borrar el aviso publicado en el grupo"
+    )
+    
     max_warnings: int = Field(
         default=3,        # Después de 3 advertencias = ban
         gt=0,            # Mínimo 1 advertencia
@@ -155,6 +391,17 @@ class Settings(BaseSettings):
         description="IDs de usuarios administradores (separados por comas)"
     )
     
+    chat_admins_cache_ttl: int = Field(
+        default=600,
+        ge=0,
+        le=86400,
+        description="👑 Segundos que se recuerdan los administradores de cada grupo (0 = no consultarlos)"
+        # Los cambios de administradores (chat_member) invalidan el caché antes
+    )
+    
+    # admin_user_ids ya parseado: (cadena original, frozenset de IDs)
+    _admin_ids_cache: Tuple[Optional[str], FrozenSet[int]] = PrivateAttr(default=(None, frozenset()))
+    
     # === RATE LIMITING ===
     rate_limit_enabled: bool = Field(
         default=True,
@@ -168,6 +415,20 @@ class Settings(BaseSettings):
         description="Máximo número de mensajes por minuto por usuario"
     )
     
+    flood_action: str = Field(
+        default="delete",
+        pattern=r"^(log|delete|timeout)$",
+        description="🌊 Qué hacer con quien pasa el límite: delete (borrar el exceso sin IA), timeout (además silenciar) o log (solo contar)"
+        # log = observar antes de activar: el exceso sigue al análisis normal con Gemini
+    )
+    
+    flood_timeout_minutes: int = Field(
+        default=5,
+        ge=1,
+        le=1440,
+        description="⏰ Minutos de silencio para quien hace flood (con FLOOD_ACTION=timeout)"
+    )
+    
     # === CONTENT FILTERING ===
     filter_spam: bool = Field(
         default=True,
@@ -183,7 +444,355 @@ class Settings(BaseSettings):
         default=True,
         description="Filtrar mensajes fuera de tema"
     )
-    
+
+    # ===================================================================
+    # ✂️ RÁFAGAS: MENSAJES SEGUIDOS DEL MISMO USUARIO, UN SOLO ANÁLISIS
+    # ===================================================================
+
+    burst_coalescing_enabled: bool = Field(
+        default=False,
+        description="✂️ Analizar juntos los mensajes seguidos de un usuario en un chat"
+    )
+
+    burst_window_ms: int = Field(
+        default=1500,
+        ge=50,
+        le=10000,
+        description="✂️ Silencio (ms) que cierra la ráfaga"
+    )
+
+    burst_max_wait_ms: int = Field(
+        default=4000,
+        ge=50,
+        le=30000,
+        description="⏱️ Espera máxima (ms) desde el primer mensaje de la ráfaga hasta analizarla"
+    )
+
+    burst_max_messages: int = Field(
+        default=8,
+        ge=1,
+        le=50,
+        description="📦 Mensajes que cierran la ráfaga de inmediato"
+    )
+
+    # ===================================================================
+    # 🤝 REPUTACIÓN DE USUARIOS (AUDITORÍA POR MUESTREO)
+    # ===================================================================
+
+    reputation_enabled: bool = Field(
+        default=False,
+        description="🤝 Analizar solo una muestra de los mensajes de usuarios de confianza"
+    )
+
+    reputation_trust_threshold: int = Field(
+        default=50,
+        ge=1,
+        le=100000,
+        description="🤝 Mensajes aprobados seguidos (sin faltas) para ser de confianza"
+    )
+
+    reputation_sample_rate: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="🎲 Fracción de mensajes de usuarios de confianza que se analizan igual (auditoría)"
+    )
+
+    reputation_max_users: int = Field(
+        default=50000,
+        ge=100,
+        le=10_000_000,
+        description="📇 Usuarios recordados como máximo (se olvidan los menos activos)"
+    )
+
+    reputation_path: Optional[str] = Field(
+        default=None,
+        description="💾 JSON donde se guarda la reputación entre reinicios (vacío = solo en memoria)"
+    )
+
+    # ===================================================================
+    # 🔀 PROCESAMIENTO CONCURRENTE DE UPDATES DE TELEGRAM
+    # ===================================================================
+
+    telegram_concurrent_updates: int = Field(
+        default=8,
+        ge=1,
+        le=256,
+        description="🔀 Updates procesados a la vez (orden estricto por chat y por usuario; 1 = de uno en uno)"
+    )
+
+    # ===================================================================
+    # 📤 COLA DE ACCIONES HACIA TELEGRAM (LÍMITES DE ENVÍO)
+    # ===================================================================
+
+    telegram_actions_per_second: float = Field(
+        default=25.0,
+        gt=0,
+        le=30,
+        description="📤 Llamadas por segundo a la Bot API para todo el bot (Telegram corta cerca de 30)"
+    )
+
+    telegram_actions_per_chat_per_minute: float = Field(
+        default=20.0,
+        gt=0,
+        le=60,
+        description="📤 Llamadas por minuto a un mismo chat (Telegram permite ~20 en grupos)"
+    )
+
+    telegram_delete_batch_window_ms: int = Field(
+        default=0,
+        ge=0,
+        le=2000,
+        description="🗑️ Espera para juntar borrados en un deleteMessages (0 = solo junta los ya encolados)"
+    )
+
+    telegram_action_max_retries: int = Field(
+        default=3,
+        ge=0,
+        le=10,
+        description="⏳ Reintentos de una acción tras RetryAfter o error de red"
+    )
+
+    # ===================================================================
+    # 🚥 LÍMITE DE LLAMADAS SIMULTÁNEAS A GEMINI
+    # ===================================================================
+
+    llm_max_in_flight: int = Field(
+        default=8,
+        gt=0,
+        le=256,
+        description="🎫 Máximo de llamadas a Gemini en vuelo al mismo tiempo"
+    )
+
+    llm_max_queue: int = Field(
+        default=100,
+        ge=0,
+        description="🧍 Máximo de llamadas esperando turno (cola acotada)"
+    )
+
+    llm_overflow_policy: str = Field(
+        default="fallback",
+        pattern=r"^(fallback|drop|block)$",
+        description="🚨 Qué hacer si la cola se llena: fallback (veredicto local), drop (aprobar sin analizar), block (esperar)"
+    )
+
+    # ===================================================================
+    # 🪣 CUOTA DE LA API KEY DE GEMINI (RPM / TPM)
+    # ===================================================================
+
+    gemini_rpm_limit: int = Field(
+        default=0,
+        ge=0,
+        description="📨 Peticiones por minuto permitidas por tu plan de Gemini (0 = sin límite)"
+        # Ejemplo plan gratuito de gemini-1.5-flash: GEMINI_RPM_LIMIT=15
+    )
+
+    gemini_tpm_limit: int = Field(
+        default=0,
+        ge=0,
+        description="🪙 Tokens por minuto permitidos por tu plan de Gemini (0 = sin límite)"
+        # Ejemplo plan gratuito de gemini-1.5-flash: GEMINI_TPM_LIMIT=1000000
+    )
+
+    gemini_quota_safety: float = Field(
+        default=0.9,
+        gt=0.0,
+        le=1.0,
+        description="🛟 Fracción de la cuota que se usa (0.9 = ir al 90% para no rozar el límite)"
+    )
+
+    # ===================================================================
+    # 🔌 CIRCUIT BREAKER (GEMINI CAÍDO O LENTO)
+    # ===================================================================
+
+    circuit_breaker_enabled: bool = Field(
+        default=True,
+        description="🔌 Dejar de llamar a Gemini mientras falle, usando veredictos locales"
+    )
+
+    circuit_breaker_failure_rate: float = Field(
+        default=0.5,
+        gt=0.0,
+        le=1.0,
+        description="❌ Fracción de errores en la ventana que abre el circuito"
+    )
+
+    circuit_breaker_slow_call_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        description="🐢 Una llamada más lenta que esto cuenta como lenta"
+    )
+
+    circuit_breaker_slow_rate: float = Field(
+        default=0.8,
+        gt=0.0,
+        le=1.0,
+        description="🐢 Fracción de llamadas lentas en la ventana que abre el circuito"
+    )
+
+    circuit_breaker_window: int = Field(
+        default=20,
+        gt=0,
+        description="🪟 Número de llamadas recientes que se evalúan"
+    )
+
+    circuit_breaker_min_calls: int = Field(
+        default=5,
+        gt=0,
+        description="🔢 Mínimo de llamadas en la ventana antes de poder abrir el circuito"
+    )
+
+    circuit_breaker_open_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        description="⏳ Segundos con el circuito abierto antes de la llamada de prueba"
+    )
+
+    # ===================================================================
+    # ⚡ STREAMING DE RESPUESTAS DE GEMINI
+    # ===================================================================
+
+    ai_streaming_enabled: bool = Field(
+        default=False,
+        description="⚡ Actuar en cuanto Gemini escribe la acción, sin esperar la razón completa"
+        # True = El spam se borra antes; la razón llega después para el DM y el log
+        # False = Se espera la respuesta completa (compatible con micro-batching)
+    )
+
+    # ===================================================================
+    # 🎯 MODERACIÓN EN DOS ETAPAS
+    # ===================================================================
+
+    ai_two_stage_enabled: bool = Field(
+        default=False,
+        description="🎯 Clasificar primero con respuesta compacta y pedir la razón solo si no es APPROVE"
+        # Ahorra tokens de salida y tiempo de generación en el ~95% de mensajes aprobados
+    )
+
+    ai_classify_max_tokens: int = Field(
+        default=16,
+        gt=0,
+        le=1024,
+        description="📝 Máximo de tokens de salida para la clasificación compacta (ej: 'APPROVE 0.97')"
+    )
+
+    # ===================================================================
+    # 🚦 PRE-FILTRO LOCAL (ANTES DE GEMINI)
+    # ===================================================================
+
+    prefilter_enabled: bool = Field(
+        default=True,
+        description="🚦 Decidir localmente saludos, emojis y spam evidente sin llamar a Gemini"
+    )
+
+    prefilter_max_safe_length: int = Field(
+        default=40,
+        gt=0,
+        le=500,
+        description="📏 Largo máximo (caracteres) para aprobar un mensaje por léxico seguro"
+    )
+
+    prefilter_min_spam_signals: int = Field(
+        default=2,
+        ge=1,
+        le=5,
+        description="🔴 Reglas de spam que deben coincidir para borrar sin Gemini (con menos, decide Gemini)"
+    )
+
+    # ===================================================================
+    # 🧮 CLASIFICADOR LOCAL ENTRENADO (moderation.log → modelo)
+    # ===================================================================
+
+    classifier_enabled: bool = Field(
+        default=True,
+        description="🧮 Usar el clasificador local entrenado si existe el archivo del modelo"
+    )
+
+    classifier_model_path: str = Field(
+        default="moderation_model.json",
+        description="📁 Modelo generado con: python -m src.bot.moderator.classifier train"
+    )
+
+    classifier_approve_threshold: float = Field(
+        default=0.97,
+        ge=0.5,
+        le=1.0,
+        description="🟢 Probabilidad mínima para aprobar localmente sin Gemini"
+    )
+
+    classifier_action_threshold: float = Field(
+        default=0.995,
+        ge=0.5,
+        le=1.0,
+        description="🔴 Probabilidad mínima para WARN/DELETE/... locales sin Gemini"
+        # Más alto que el de aprobar: borrar por error es peor que aprobar por error
+    )
+
+    classifier_min_known_fraction: float = Field(
+        default=0.6,
+        ge=0.0,
+        le=1.0,
+        description="🔤 Fracción mínima de n-gramas ya vistos al entrenar para confiar en el clasificador"
+        # Con textos muy nuevos Naive Bayes es "confiado" sin motivo: mejor que decida Gemini
+    )
+
+    decision_log_path: str = Field(
+        default="moderation.log",
+        description="🧾 Archivo del log de moderación (las decisiones se escriben sin importar LOG_LEVEL)"
+    )
+
+    # ===================================================================
+    # 💾 CACHÉ DE VEREDICTOS
+    # ===================================================================
+
+    verdict_cache_enabled: bool = Field(
+        default=True,
+        description="💾 Reutilizar veredictos de mensajes idénticos sin llamar a Gemini"
+    )
+
+    verdict_cache_size: int = Field(
+        default=10000,
+        ge=0,
+        description="📦 Máximo número de veredictos guardados (LRU)"
+    )
+
+    verdict_cache_ttl: int = Field(
+        default=3600,
+        gt=0,
+        description="⏳ Segundos que vive un veredicto en caché"
+        # 3600 = 1 hora (el mismo "gracias" se reutiliza todo ese tiempo)
+    )
+
+    singleflight_enabled: bool = Field(
+        default=True,
+        description="🛫 Copias idénticas (texto normalizado) que llegan a la vez comparten una sola llamada a Gemini"
+    )
+
+    # ===================================================================
+    # 📦 MICRO-BATCHING DE LLAMADAS A GEMINI
+    # ===================================================================
+
+    ai_batch_enabled: bool = Field(
+        default=False,
+        description="📦 Agrupar mensajes simultáneos en una sola llamada a Gemini"
+        # True = Mejor throughput en raids (añade hasta ai_batch_window_ms de espera)
+        # False = Una llamada por mensaje (menor latencia con poco tráfico)
+    )
+
+    ai_batch_max_size: int = Field(
+        default=10,
+        gt=0,
+        le=50,
+        description="📏 Máximo de mensajes por lote (al llenarse se envía de inmediato)"
+    )
+
+    ai_batch_window_ms: int = Field(
+        default=150,
+        ge=0,
+        le=5000,
+        description="⏱️ Milisegundos que se espera para juntar mensajes en un lote"
+    )
+
     # ===================================================================
     # 🧮 CAMPOS CALCULADOS AUTOMÁTICAMENTE (Pydantic v2)
     # ===================================================================
@@ -266,8 +875,8 @@ class Settings(BaseSettings):
             "model": str(self.ai_model),                       # gemini-1.5-flash
             "temperature": float(self.ai_temperature),         # 0.1 (consistente)
             "max_output_tokens": int(self.ai_max_tokens),      # 1000 tokens máximo
-            "max_retries": 3,                                  # Reintentos si falla
-            "timeout": 30,                                     # 30 segundos timeout
+            "max_retries": int(self.ai_max_retries),           # Reintentos si falla
+            "timeout": float(self.ai_timeout_seconds),         # 30 segundos timeout
         }
     
     # === HELPER METHODS ===
@@ -275,9 +884,18 @@ class Settings(BaseSettings):
         """Método alternativo para obtener lista de admins"""
         return self.admin_ids_list
     
+    @property
+    def admin_ids(self) -> FrozenSet[int]:
+        """🔐 admin_user_ids como frozenset, parseado una sola vez (y de nuevo solo si cambia)"""
+        raw, ids = self._admin_ids_cache
+        if raw != self.admin_user_ids:
+            ids = frozenset(self.admin_ids_list)
+            self._admin_ids_cache = (self.admin_user_ids, ids)
+        return ids
+    
     def is_admin(self, user_id: int) -> bool:
         """Verifica si un usuario es administrador"""
-        return user_id in self.admin_ids_list
+        return user_id in self.admin_ids
     
     def get_log_config(self) -> dict:
         """Configuración para logging"""
@@ -294,16 +912,91 @@ class Settings(BaseSettings):
             "enabled": self.moderation_enabled,
             "delete_spam": self.delete_spam_messages,
             "warn_before_delete": self.warn_before_delete,
+            "bursts": {
+                "enabled": self.burst_coalescing_enabled,
+                "window_ms": self.burst_window_ms,
+                "max_wait_ms": self.burst_max_wait_ms,
+            },
+            "reputation": {
+                "enabled": self.reputation_enabled,
+                "trust_threshold": self.reputation_trust_threshold,
+                "sample_rate": self.reputation_sample_rate,
+            },
+            "admins": {
+                "configured": len(self.admin_ids),
+                "chat_admins_cache_ttl": self.chat_admins_cache_ttl,
+            },
+            "warnings": {
+                "dedupe_seconds": self.warning_dedupe_seconds,
+                "dm_unreachable_ttl": self.dm_unreachable_ttl,
+                "group_fallback": self.warning_group_fallback,
+            },
             "max_warnings": self.max_warnings,
             "rate_limit": {
                 "enabled": self.rate_limit_enabled,
                 "max_per_minute": self.max_messages_per_minute,
+                "flood_action": self.flood_action,
             },
             "filters": {
                 "spam": self.filter_spam,
                 "nsfw": self.filter_nsfw,
                 "off_topic": self.filter_off_topic,
-            }
+            },
+            "prefilter": {
+                "enabled": self.prefilter_enabled,
+                "max_safe_length": self.prefilter_max_safe_length,
+                "min_spam_signals": self.prefilter_min_spam_signals,
+            },
+            "classifier": {
+                "enabled": self.classifier_enabled,
+                "model_path": self.classifier_model_path,
+                "band": [self.classifier_approve_threshold, self.classifier_action_threshold],
+                "min_known_fraction": self.classifier_min_known_fraction,
+            },
+            "cache": {
+                "enabled": self.verdict_cache_enabled,
+                "size": self.verdict_cache_size,
+                "ttl": self.verdict_cache_ttl,
+                "singleflight": self.singleflight_enabled,
+            },
+            "concurrent_updates": self.telegram_concurrent_updates,
+            "actions_per_second": self.telegram_actions_per_second,
+            "actions_per_chat_per_minute": self.telegram_actions_per_chat_per_minute,
+            "scheduler": {
+                "max_in_flight": self.llm_max_in_flight,
+                "max_queue": self.llm_max_queue,
+                "overflow_policy": self.llm_overflow_policy,
+            },
+            "quota": {
+                "rpm": self.gemini_rpm_limit,
+                "tpm": self.gemini_tpm_limit,
+                "safety": self.gemini_quota_safety,
+            },
+            "circuit_breaker": {
+                "enabled": self.circuit_breaker_enabled,
+                "failure_rate": self.circuit_breaker_failure_rate,
+                "slow_call_seconds": self.circuit_breaker_slow_call_seconds,
+                "open_seconds": self.circuit_breaker_open_seconds,
+            },
+            "backend": {
+                "kind": self.ai_backend,
+                "base_url": self.gemini_base_url,
+                "record_mode": self.ai_record_mode,
+            },
+            "cascade": {
+                "enabled": self.ai_cascade_enabled,
+                "fast_model": self.ai_cascade_fast_model,
+                "strong_model": self.ai_model,
+                "escalate_below": self.ai_cascade_escalate_below,
+                "escalate_destructive": self.ai_cascade_escalate_destructive,
+            },
+            "streaming": self.ai_streaming_enabled,
+            "two_stage": self.ai_two_stage_enabled,
+            "batching": {
+                "enabled": self.ai_batch_enabled,
+                "max_size": self.ai_batch_max_size,
+                "window_ms": self.ai_batch_window_ms,
+            },
         }
     
     # === VALIDATION METHODS ===
@@ -0,0 +1,14 @@
+"""
+🧪 CONFIGURACIÓN COMÚN DE LAS PRUEBAS
+
+Settings exige los tokens al importarse; las pruebas nunca llegan a la red,
+así que basta con valores de relleno.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+# El log de moderación de las pruebas no debe ensuciar el repo
+os.environ.setdefault("DECISION_LOG_PATH", os.path.join(tempfile.gettempdir(), "viperguard-tests-moderation.log"))
@@ -0,0 +1,134 @@
+"""📤 Cola de acciones: orden por chat, borrados en lote y reintentos"""
+
+import asyncio
+
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from src.bot.services.action_queue import ActionExecutor
+
+
+class FakeBot:
+    """Registra las llamadas; `errors` se lanzan en orden, una por llamada"""
+
+    def __init__(self, *errors):
+        self.calls = []
+        self.errors = list(errors)
+
+    async def _call(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        await asyncio.sleep(0)
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        return True
+
+    async def delete_message(self, **kwargs):
+        return await self._call("delete_message", **kwargs)
+
+    async def delete_messages(self, **kwargs):
+        return await self._call("delete_messages", **kwargs)
+
+    async def send_message(self, **kwargs):
+        return await self._call("send_message", **kwargs)
+
+    async def ban_chat_member(self, **kwargs):
+        return await self._call("ban_chat_member", **kwargs)
+
+
+def run(scenario):
+    async def main():
+        actions = ActionExecutor(global_per_second=1000, chat_per_minute=6000)
+        await scenario(actions)
+        await actions.drain()
+        return actions
+
+    return asyncio.run(main())
+
+
+def test_pending_deletes_of_a_chat_become_one_bulk_call():
+    bot = FakeBot()
+
+    async def scenario(actions):
+        for message_id in range(1, 6):
+            actions.enqueue(bot, "delete_message", 1, message_id=message_id)
+
+    actions = run(scenario)
+    assert bot.calls == [("delete_messages", {"chat_id": 1, "message_ids": [1, 2, 3, 4, 5]})]
+    assert actions.get_stats()["coalesced_deletes"] == 4
+
+
+def test_order_within_chat_is_kept_around_deletes():
+    bot = FakeBot()
+
+    async def scenario(actions):
+        actions.enqueue(bot, "send_message", 1, text="aviso")
+        actions.enqueue(bot, "ban_chat_member", 1, user_id=9)
+        actions.enqueue(bot, "send_message", 1, text="otro")
+
+    run(scenario)
+    assert [method for method, _ in bot.calls] == ["send_message", "ban_chat_member", "send_message"]
+
+
+def test_deletes_queued_after_other_actions_are_not_moved_ahead():
+    bot = FakeBot()
+
+    async def scenario(actions):
+        actions.enqueue(bot, "delete_message", 1, message_id=1)
+        actions.enqueue(bot, "delete_message", 1, message_id=2)
+        actions.enqueue(bot, "ban_chat_member", 1, user_id=9)
+        actions.enqueue(bot, "delete_message", 1, message_id=3)
+        actions.enqueue(bot, "send_message", 1, text="aviso")
+        actions.enqueue(bot, "delete_message", 1, message_id=4)
+        actions.enqueue(bot, "delete_message", 1, message_id=5)
+
+    run(scenario)
+    assert bot.calls == [
+        ("delete_messages", {"chat_id": 1, "message_ids": [1, 2]}),
+        ("ban_chat_member", {"chat_id": 1, "user_id": 9}),
+        ("delete_message", {"chat_id": 1, "message_id": 3}),
+        ("send_message", {"chat_id": 1, "text": "aviso"}),
+        ("delete_messages", {"chat_id": 1, "message_ids": [4, 5]}),
+    ]
+
+
+def test_retry_after_requeues_at_the_front():
+    bot = FakeBot(RetryAfter(0))
+    outcomes = []
+
+    async def scenario(actions):
+        actions.enqueue(bot, "send_message", 1, on_done=lambda r, e: outcomes.append((r, e)), text="a")
+        actions.enqueue(bot, "ban_chat_member", 1, user_id=9)
+
+    actions = run(scenario)
+    assert [method for method, _ in bot.calls] == ["send_message", "send_message", "ban_chat_member"]
+    assert outcomes == [(True, None)]
+    assert actions.retry_after == 1 and actions.failed == 0
+
+
+def test_rejected_actions_are_not_retried():
+    error = Forbidden("bot was blocked by the user")
+    bot = FakeBot(error, BadRequest("Message to delete not found"))
+    outcomes = []
+
+    async def scenario(actions):
+        actions.enqueue(bot, "send_message", 7, on_done=lambda r, e: outcomes.append(e), text="dm")
+        actions.enqueue(bot, "delete_message", 7, message_id=3)
+
+    actions = run(scenario)
+    assert len(bot.calls) == 2
+    assert outcomes == [error]
+    assert actions.failed == 2
+
+
+def test_gives_up_after_max_retries():
+    async def main():
+        bot = FakeBot(*[RetryAfter(0)] * 10)
+        actions = ActionExecutor(global_per_second=1000, chat_per_minute=6000, max_retries=2)
+        actions.enqueue(bot, "send_message", 1, text="x")
+        await actions.drain()
+        return bot, actions
+
+    bot, actions = asyncio.run(main())
+    assert len(bot.calls) == 3  # 1 intento + 2 reintentos
+    assert actions.failed == 1 and actions.pending == 0
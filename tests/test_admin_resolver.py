@@ -0,0 +1,94 @@
+"""👑 Administradores: IDs configurados, caché por chat y una consulta a la vez"""
+
+import asyncio
+from types import SimpleNamespace
+
+from telegram import Chat, ChatMember
+
+from src.bot.services.admin_resolver import AdminResolver
+
+GROUP = Chat(-100, Chat.SUPERGROUP)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBot:
+    def __init__(self, admin_ids, fail=False):
+        self.admin_ids = admin_ids
+        self.fail = fail
+        self.calls = 0
+
+    async def get_chat_administrators(self, chat_id):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("Telegram no responde")
+        return [SimpleNamespace(user=SimpleNamespace(id=user_id)) for user_id in self.admin_ids]
+
+
+def test_configured_and_anonymous_admins_skip_telegram():
+    bot = FakeBot([])
+    admins = AdminResolver(frozenset({1}), cache_ttl=600)
+    assert asyncio.run(admins.is_admin(bot, GROUP, 1))
+    assert asyncio.run(admins.is_admin(bot, GROUP, 1087968824, sender_chat=GROUP))
+    assert bot.calls == 0
+
+
+def test_concurrent_lookups_share_one_fetch_and_cache():
+    bot = FakeBot([5])
+    admins = AdminResolver(frozenset(), cache_ttl=600)
+
+    async def main():
+        return await asyncio.gather(*(admins.is_admin(bot, GROUP, user_id) for user_id in (5, 6, 5, 7)))
+
+    assert asyncio.run(main()) == [True, False, True, False]
+    assert bot.calls == 1
+    assert asyncio.run(admins.is_admin(bot, GROUP, 5))
+    assert bot.calls == 1 and admins.cache_hits == 1
+
+
+def test_ttl_and_invalidation_refetch():
+    clock = FakeClock()
+    bot = FakeBot([5])
+    admins = AdminResolver(frozenset(), cache_ttl=600, clock=clock)
+    asyncio.run(admins.is_admin(bot, GROUP, 5))
+    clock.now = 600.0
+    asyncio.run(admins.is_admin(bot, GROUP, 5))
+    assert bot.calls == 2
+
+    # Solo los campos que lee on_chat_member (los constructores de PTB cambian entre versiones)
+    promoted = SimpleNamespace(
+        chat=GROUP,
+        old_chat_member=SimpleNamespace(status=ChatMember.MEMBER, user=SimpleNamespace(id=8)),
+        new_chat_member=SimpleNamespace(status=ChatMember.ADMINISTRATOR, user=SimpleNamespace(id=8)),
+    )
+    admins.on_chat_member(promoted)
+    bot.admin_ids = [5, 8]
+    assert asyncio.run(admins.is_admin(bot, GROUP, 8))
+    assert bot.calls == 3 and admins.invalidations == 1
+
+
+def test_fetch_errors_are_cached_briefly():
+    clock = FakeClock()
+    bot = FakeBot([5], fail=True)
+    admins = AdminResolver(frozenset(), cache_ttl=600, clock=clock)
+    assert not asyncio.run(admins.is_admin(bot, GROUP, 5))
+    assert not asyncio.run(admins.is_admin(bot, GROUP, 5))
+    assert bot.calls == 1  # No se reintenta con cada mensaje
+
+    clock.now = 60.0
+    bot.fail = False
+    assert asyncio.run(admins.is_admin(bot, GROUP, 5))
+
+
+def test_private_chats_and_disabled_cache_do_not_fetch():
+    bot = FakeBot([5])
+    assert not asyncio.run(AdminResolver(frozenset(), cache_ttl=0).is_admin(bot, GROUP, 5))
+    assert not asyncio.run(AdminResolver(frozenset(), cache_ttl=600).is_admin(bot, Chat(5, Chat.PRIVATE), 5))
+    assert bot.calls == 0
@@ -0,0 +1,107 @@
+"""🔌 Backends de LLM: prompts, respuesta de cada implementación y la fábrica"""
+
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.bot.moderator.backends import (
+    DEFAULT_FAKE_RESPONSE,
+    FakeBackend,
+    LangChainBackend,
+    LLMBackend,
+    LLMResponse,
+    create_backend,
+    render_prompt,
+)
+
+TEMPLATE = [("system", "Eres un moderador. Responde {{\"action\": ...}}"), ("human", "Analiza:\n\n{message}")]
+RESPONSE = '{"action": "APPROVE", "reason": "ok", "confidence": 0.9}'
+
+
+def test_render_prompt_keeps_literal_braces():
+    assert render_prompt(TEMPLATE, {"message": "hola {mundo}"}) == [
+        ("system", 'Eres un moderador. Responde {"action": ...}'),
+        ("human", "Analiza:\n\nhola {mundo}"),
+    ]
+
+
+def test_base_astream_yields_the_whole_answer():
+    class Echo(LLMBackend):
+        async def ainvoke(self, messages):
+            return LLMResponse(messages[-1][1])
+
+    async def main():
+        return [chunk.content async for chunk in Echo().astream([("human", "hola")])]
+
+    assert asyncio.run(main()) == ["hola"]
+
+
+def test_fake_backend_cycles_and_streams_with_usage_on_the_last_chunk():
+    backend = FakeBackend(["uno", "abcdefghij"], chunk_size=4)
+    messages = render_prompt(TEMPLATE, {"message": "x" * 40})
+
+    async def main():
+        first = await backend.ainvoke(messages)
+        chunks = [chunk async for chunk in backend.astream(messages)]
+        return first, chunks
+
+    first, chunks = asyncio.run(main())
+    assert first.content == "uno" and first.usage_metadata["output_tokens"] == 0
+    assert [chunk.content for chunk in chunks] == ["abcd", "efgh", "ij"]
+    assert [chunk.usage_metadata is None for chunk in chunks] == [True, True, False]
+    assert chunks[-1].usage_metadata["output_tokens"] == 2
+    assert backend.calls == 2
+
+
+def test_langchain_backend_converts_roles_and_reads_usage():
+    chat_model = FakeListChatModel(responses=[RESPONSE])
+    backend = LangChainBackend(chat_model)
+
+    async def main():
+        response = await backend.ainvoke(render_prompt(TEMPLATE, {"message": "hola"}))
+        streamed = "".join([chunk.content async for chunk in backend.astream([("human", "hola")])])
+        return response, streamed
+
+    response, streamed = asyncio.run(main())
+    assert response.content == streamed == RESPONSE
+    assert backend.model == "FakeListChatModel"
+
+
+def test_genai_backend_splits_system_prompt_and_maps_usage():
+    httpx = pytest.importorskip("httpx")
+    genai = pytest.importorskip("google.genai")
+    from google.genai import types
+
+    from src.bot.moderator.backends import GenAIBackend
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={
+            "candidates": [{"content": {"role": "model", "parts": [{"text": RESPONSE}]}}],
+            "usageMetadata": {"promptTokenCount": 120, "candidatesTokenCount": 20, "totalTokenCount": 140},
+        })
+
+    client = genai.Client(
+        api_key="test",
+        http_options=types.HttpOptions(async_client_args={"transport": httpx.MockTransport(handler)}),
+    )
+    backend = GenAIBackend("gemini-1.5-flash", "test", 0.3, 100, client=client)
+
+    response = asyncio.run(backend.ainvoke(render_prompt(TEMPLATE, {"message": "hola"})))
+    assert response.content == RESPONSE
+    assert response.usage_metadata == {"input_tokens": 120, "output_tokens": 20, "total_tokens": 140}
+    body = requests[0].read().decode()
+    assert "Eres un moderador" in body and "Analiza" in body
+
+
+def test_create_backend():
+    backend = create_backend("fake", "gemini-1.5-flash", fake_latency=0.01)
+    assert isinstance(backend, FakeBackend)
+    assert (backend.model, backend.latency) == ("gemini-1.5-flash", 0.01)
+    assert asyncio.run(backend.ainvoke([("human", "hola")])).content == DEFAULT_FAKE_RESPONSE
+
+    with pytest.raises(ValueError, match="desconocido"):
+        create_backend("openai", "gpt")
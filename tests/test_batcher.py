@@ -0,0 +1,90 @@
+"""📦 MessageBatcher: cierre por tamaño y por ventana, reparto de resultados y errores"""
+
+import asyncio
+
+import pytest
+
+from src.bot.moderator.ai_analyzer import MessageBatcher
+
+
+def make_batcher(calls, fail=False, **kwargs):
+    async def analyze_batch(items):
+        calls.append([message for message, _ in items])
+        await asyncio.sleep(0)
+        if fail:
+            raise RuntimeError("Gemini caído")
+        return [f"veredicto:{message}" for message, _ in items]
+
+    return MessageBatcher(analyze_batch, **{"max_batch_size": 3, "window_seconds": 0.05, **kwargs})
+
+
+def test_full_batch_flushes_without_waiting_window():
+    calls = []
+
+    async def main():
+        batcher = make_batcher(calls, window_seconds=10.0)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(text, 0.0) for text in ("a", "b", "c"))),
+            timeout=1.0,
+        ), batcher
+
+    results, batcher = asyncio.run(main())
+    assert calls == [["a", "b", "c"]]
+    assert results == ["veredicto:a", "veredicto:b", "veredicto:c"]
+    assert batcher.get_stats() == {
+        "batches_sent": 1, "messages_batched": 3, "avg_batch_size": 3.0, "pending": 0,
+    }
+
+
+def test_window_flushes_partial_batch():
+    calls = []
+
+    async def main():
+        batcher = make_batcher(calls)
+        first = asyncio.create_task(batcher.submit("a", 0.0))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(batcher.submit("b", 0.0))
+        await asyncio.sleep(0.01)
+        assert calls == []
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(main()) == ["veredicto:a", "veredicto:b"]
+    assert calls == [["a", "b"]]
+
+
+def test_each_caller_gets_its_own_result_across_batches():
+    calls = []
+
+    async def main():
+        batcher = make_batcher(calls, max_batch_size=2)
+        texts = ["m1", "m2", "m3", "m4", "m5"]
+        results = await asyncio.gather(*(batcher.submit(text, 0.0) for text in texts))
+        return texts, results, batcher
+
+    texts, results, batcher = asyncio.run(main())
+    assert results == [f"veredicto:{text}" for text in texts]
+    assert calls == [["m1", "m2"], ["m3", "m4"], ["m5"]]
+    assert batcher.get_stats()["batches_sent"] == 3
+
+
+def test_batch_failure_reaches_every_caller():
+    calls = []
+
+    async def main():
+        batcher = make_batcher(calls, fail=True)
+        return await asyncio.gather(
+            *(batcher.submit(text, 0.0) for text in ("a", "b")), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert len(results) == 2
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batch_failure_raises_on_submit():
+    async def main():
+        batcher = make_batcher([], fail=True, max_batch_size=1)
+        await batcher.submit("a", 0.0)
+
+    with pytest.raises(RuntimeError, match="Gemini caído"):
+        asyncio.run(main())
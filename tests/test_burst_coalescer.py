@@ -0,0 +1,114 @@
+"""✂️ Ráfagas: cierre por ventana, por espera máxima y por tamaño, en orden por llave"""
+
+import asyncio
+
+from src.bot.services.burst_coalescer import BurstCoalescer
+
+
+def run(scenario, **kwargs):
+    """Ejecuta `scenario(bursts)`; devuelve (flushes en orden de inicio, coalescedor)"""
+    flushed = []
+
+    async def main():
+        async def flush(items):
+            flushed.append(list(items))
+
+        bursts = BurstCoalescer(flush, **{"window": 0.03, "max_wait": 0.2, "max_messages": 4, **kwargs})
+        await scenario(bursts)
+        await bursts.drain()
+        return bursts
+
+    bursts = asyncio.run(main())
+    return flushed, bursts
+
+
+def test_messages_within_window_are_one_burst():
+    async def scenario(bursts):
+        for text in ("hola", "una pregunta", "¿alguien sabe?"):
+            bursts.add("u", text)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.06)
+
+    flushed, bursts = run(scenario)
+    assert flushed == [["hola", "una pregunta", "¿alguien sabe?"]]
+    assert bursts.get_stats()["coalesced"] == 2
+
+
+def test_gap_longer_than_window_splits():
+    async def scenario(bursts):
+        bursts.add("u", "a")
+        await asyncio.sleep(0.06)
+        bursts.add("u", "b")
+        await asyncio.sleep(0.06)
+
+    flushed, _ = run(scenario)
+    assert flushed == [["a"], ["b"]]
+
+
+def test_max_messages_closes_immediately():
+    async def scenario(bursts):
+        for i in range(6):
+            bursts.add("u", i)
+        await asyncio.sleep(0.06)
+
+    flushed, bursts = run(scenario)
+    assert flushed == [[0, 1, 2, 3], [4, 5]]
+    assert bursts.closed_by_size == 1
+
+
+def test_max_wait_caps_a_long_burst():
+    async def scenario(bursts):
+        for i in range(10):  # Sigue escribiendo cada 10 ms (< ventana)
+            bursts.add("u", i)
+            await asyncio.sleep(0.01)
+
+    flushed, bursts = run(scenario, window=0.03, max_wait=0.05, max_messages=100)
+    assert len(flushed) >= 2
+    assert [item for burst in flushed for item in burst] == list(range(10))
+    assert bursts.closed_by_max_wait >= 1
+
+
+def test_bursts_of_same_key_flush_in_order():
+    order = []
+
+    async def main():
+        async def flush(items):
+            await asyncio.sleep(0.03 if items[0] == "lento" else 0)
+            order.append(items[0])
+
+        bursts = BurstCoalescer(flush, window=1.0, max_wait=1.0, max_messages=1)
+        bursts.add("u", "lento")  # max_messages=1: cada mensaje cierra su ráfaga
+        bursts.add("u", "rápido")  # Su flush es inmediato, pero espera al anterior
+        await bursts.drain()
+
+    asyncio.run(main())
+    assert order == ["lento", "rápido"]
+
+
+def test_keys_are_independent():
+    async def scenario(bursts):
+        bursts.add(("chat", 1), "a")
+        bursts.add(("chat", 2), "b")
+        bursts.add(("chat", 1), "c")
+        await asyncio.sleep(0.06)
+
+    flushed, _ = run(scenario)
+    assert sorted(flushed) == [["a", "c"], ["b"]]
+
+
+def test_drain_flushes_open_bursts_and_survives_errors():
+    async def main():
+        seen = []
+
+        async def flush(items):
+            seen.append(items)
+            raise RuntimeError("falló el análisis")
+
+        bursts = BurstCoalescer(flush, window=10.0, max_wait=10.0, max_messages=10)
+        bursts.add("u", "x")
+        await bursts.drain()
+        return seen, bursts.get_stats()
+
+    seen, stats = asyncio.run(main())
+    assert seen == [["x"]]
+    assert stats["open_bursts"] == 0
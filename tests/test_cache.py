@@ -0,0 +1,57 @@
+"""💾 Caché de veredictos: LRU, TTL y namespace"""
+
+from src.bot.moderator.cache import VerdictCache, build_cache_namespace, normalize_message
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalized_copies_share_an_entry():
+    cache = VerdictCache(max_size=10, ttl_seconds=60)
+    cache.set("  Hola   A TODOS ", "approve")
+    assert cache.get("hola a todos") == "approve"
+    assert normalize_message("  Hola   A TODOS ") == "hola a todos"
+
+
+def test_ttl_expires_entries():
+    clock = FakeClock()
+    cache = VerdictCache(max_size=10, ttl_seconds=60, clock=clock)
+    cache.set("gracias", "approve")
+    clock.now = 59.9
+    assert cache.get("gracias") == "approve"
+    clock.now = 60.0
+    assert cache.get("gracias") is None
+    assert cache.stats.expirations == 1 and len(cache) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = VerdictCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" pasa a ser la menos usada
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_namespace_change_clears_entries():
+    first = build_cache_namespace("gemini-1.5-flash", 0.1, "prompt v1")
+    second = build_cache_namespace("gemini-1.5-flash", 0.1, "prompt v2")
+    assert first != second
+
+    cache = VerdictCache(max_size=10, ttl_seconds=60, namespace=first)
+    cache.set("hola", "approve")
+    cache.set_namespace(second)
+    assert cache.get("hola") is None
+
+
+def test_zero_size_disables_storage():
+    cache = VerdictCache(max_size=0, ttl_seconds=60)
+    cache.set("hola", "approve")
+    assert len(cache) == 0
@@ -0,0 +1,169 @@
+"""🐇→🦉 Cascada: el modelo rápido decide y solo lo dudoso o destructivo escala al fuerte"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.bot.moderator import ai_analyzer
+from src.bot.moderator.ai_analyzer import ModerationAction
+from src.bot.moderator.backends import FakeBackend
+from src.bot.moderator.model_registry import ModelRegistry, TierMetrics, should_escalate
+
+
+def verdict(action, confidence, reason="ok"):
+    return json.dumps({"action": action, "reason": reason, "confidence": confidence})
+
+
+class FailingBackend(FakeBackend):
+    async def ainvoke(self, messages):
+        self.calls += 1
+        raise TimeoutError("el modelo rápido no respondió")
+
+
+@pytest.mark.parametrize("action, confidence, threshold, destructive, expected", [
+    ("approve", 0.95, 0.85, True, False),
+    ("approve", 0.60, 0.85, True, True),
+    ("delete", 0.99, 0.85, True, True),
+    ("delete", 0.99, 0.85, False, False),
+    ("warn", 0.90, 0.85, True, False),
+    ("approve", 0.0, 0.0, False, True),  # Veredicto de error: escala aunque el umbral sea 0
+])
+def test_should_escalate(action, confidence, threshold, destructive, expected):
+    assert should_escalate(action, confidence, threshold, destructive) is expected
+
+
+def test_registry_reuses_clients_per_model_and_tokens():
+    built = []
+    registry = ModelRegistry(lambda model, tokens: built.append((model, tokens)) or object())
+    fast = registry.get("flash-8b", 1000)
+    assert registry.get("flash-8b", 1000) is fast
+    assert registry.get("flash-8b", 16) is not fast
+    assert built == [("flash-8b", 1000), ("flash-8b", 16)]
+
+
+def test_tier_metrics():
+    tier = TierMetrics("flash-8b")
+    tier.record(0.2)
+    tier.record(0.4, escalated=True)
+    assert tier.as_dict() == {
+        "model": "flash-8b", "calls": 2, "avg_latency": 0.3, "max_latency": 0.4, "escalation_rate": 0.5,
+    }
+
+
+def make_moderator(monkeypatch, fast, strong, **overrides):
+    """Moderador con cascada: `fast` y `strong` reemplazan a los clientes del registro"""
+    monkeypatch.setattr(ai_analyzer, "settings", ai_analyzer.settings.model_copy(update={
+        "ai_backend": "fake",
+        "ai_cascade_enabled": True,
+        "ai_cascade_escalate_below": 0.85,
+        "ai_cascade_escalate_destructive": True,
+        "prefilter_enabled": False,
+        "classifier_enabled": False,
+        "verdict_cache_enabled": False,
+        "singleflight_enabled": False,
+        "circuit_breaker_enabled": False,
+        **overrides,
+    }))
+    moderator = ai_analyzer.ContentModerator()
+
+    async def ready():
+        await moderator.initialize()
+        moderator.fast_llm, moderator.llm = fast, strong
+        return moderator
+
+    return ready
+
+
+@pytest.mark.parametrize("fast_response, escalated", [
+    (verdict("APPROVE", 0.97), False),
+    (verdict("WARN", 0.90), False),
+    (verdict("APPROVE", 0.50), True),
+    (verdict("DELETE", 0.99), True),
+    ("esto no es JSON", True),
+])
+def test_single_message_cascade(monkeypatch, fast_response, escalated):
+    fast = FakeBackend([fast_response])
+    strong = FakeBackend([verdict("APPROVE", 0.99, "modelo fuerte")])
+    ready = make_moderator(monkeypatch, fast, strong)
+
+    async def main():
+        moderator = await ready()
+        return await moderator.analyze_message("¿Alguien usa Polars en producción?", 1), moderator
+
+    result, moderator = asyncio.run(main())
+    assert fast.calls == 1
+    assert strong.calls == (1 if escalated else 0)
+    assert (result.reason == "modelo fuerte") is escalated
+    assert moderator.cascade_tiers["fast"].escalated == (1 if escalated else 0)
+
+
+def test_fast_model_failure_escalates(monkeypatch):
+    strong = FakeBackend([verdict("DELETE", 0.95, "modelo fuerte")])
+    ready = make_moderator(monkeypatch, FailingBackend(), strong)
+
+    async def main():
+        moderator = await ready()
+        return await moderator.analyze_message("Compra seguidores baratos", 1)
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.DELETE and result.reason == "modelo fuerte"
+    assert strong.calls == 1
+
+
+def test_batches_go_through_the_cascade_per_message(monkeypatch):
+    fast = FakeBackend([json.dumps([
+        {"index": 0, "action": "APPROVE", "reason": "rápido", "confidence": 0.97},
+        {"index": 1, "action": "APPROVE", "reason": "rápido", "confidence": 0.40},
+        {"index": 2, "action": "DELETE", "reason": "rápido", "confidence": 0.99},
+    ])])
+    strong = FakeBackend([json.dumps([
+        {"index": 0, "action": "WARN", "reason": "fuerte", "confidence": 0.9},
+        {"index": 1, "action": "DELETE", "reason": "fuerte", "confidence": 0.95},
+    ])])
+    ready = make_moderator(monkeypatch, fast, strong)
+
+    async def main():
+        moderator = await ready()
+        results = await moderator._analyze_batch([("uno", 0.0), ("dos", 0.0), ("tres", 0.0)])
+        return results, moderator
+
+    results, moderator = asyncio.run(main())
+    assert (fast.calls, strong.calls) == (1, 1)  # Un lote a cada modelo
+    assert [(r.action.value, r.reason) for r in results] == [
+        ("approve", "rápido"), ("warn", "fuerte"), ("delete", "fuerte"),
+    ]
+    assert moderator.cascade_tiers["fast"].calls == 3
+    assert moderator.cascade_tiers["fast"].escalated == 2
+    assert moderator.cascade_tiers["strong"].calls == 2
+
+
+def test_batch_falls_back_to_strong_model_when_fast_fails(monkeypatch):
+    strong = FakeBackend([json.dumps([
+        {"index": 0, "action": "APPROVE", "reason": "fuerte", "confidence": 0.9},
+        {"index": 1, "action": "APPROVE", "reason": "fuerte", "confidence": 0.9},
+    ])])
+    ready = make_moderator(monkeypatch, FailingBackend(), strong)
+
+    async def main():
+        moderator = await ready()
+        return await moderator._analyze_batch([("uno", 0.0), ("dos", 0.0)])
+
+    results = asyncio.run(main())
+    assert [r.reason for r in results] == ["fuerte", "fuerte"]
+
+
+def test_batch_without_cascade_uses_the_main_model(monkeypatch):
+    strong = FakeBackend([json.dumps([
+        {"index": 0, "action": "APPROVE", "reason": "único", "confidence": 0.9},
+        {"index": 1, "action": "WARN", "reason": "único", "confidence": 0.9},
+    ])])
+    ready = make_moderator(monkeypatch, None, strong, ai_cascade_enabled=False)
+
+    async def main():
+        moderator = await ready()
+        return await moderator._analyze_batch([("uno", 0.0), ("dos", 0.0)])
+
+    results = asyncio.run(main())
+    assert [r.action.value for r in results] == ["approve", "warn"]
+    assert strong.calls == 1
@@ -0,0 +1,135 @@
+"""🔌 Circuit breaker: CLOSED → OPEN → HALF_OPEN → CLOSED/OPEN"""
+
+import asyncio
+
+from src.bot.moderator.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, **kwargs):
+    options = {"failure_rate_threshold": 0.5, "slow_call_seconds": 1.0, "window_size": 4,
+               "min_calls": 4, "open_seconds": 30.0, "clock": clock}
+    return CircuitBreaker(**{**options, **kwargs})
+
+
+def test_opens_on_failure_rate_after_min_calls():
+    breaker = make_breaker(FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.CLOSED  # Menos de min_calls
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.OPEN  # 2/4 = 0.5
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+
+
+def test_opens_on_slow_calls():
+    breaker = make_breaker(FakeClock(), slow_rate_threshold=0.75)
+    for latency in (2.0, 2.0, 2.0, 0.1):
+        breaker.record_success(latency)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_single_probe_after_open_seconds():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 29.0
+    assert not breaker.allow_request()
+    clock.now = 30.0
+    assert breaker.allow_request()  # La prueba
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()  # Solo una prueba a la vez
+
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_stats()["window_calls"] == 0
+
+
+def test_failed_or_slow_probe_reopens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 30.0
+    assert breaker.allow_request()
+    breaker.record_success(5.0)  # Lenta: Gemini no se recuperó
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.seconds_until_probe == 30.0
+
+    clock.now = 60.0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_cancelled_probe_frees_the_slot_and_listeners_see_transitions():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    seen = []
+    breaker.add_listener(lambda old, new: seen.append((old.value, new.value)))
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 30.0
+    assert breaker.allow_request()
+    breaker.record_cancelled()
+    assert breaker.allow_request()  # Otra prueba posible
+    assert seen == [("closed", "open"), ("open", "half_open")]
+
+
+def make_moderator(monkeypatch, open_seconds):
+    from src.bot.moderator import ai_analyzer
+
+    monkeypatch.setattr(ai_analyzer, "settings", ai_analyzer.settings.model_copy(update={
+        "ai_backend": "fake",
+        "circuit_breaker_enabled": True,
+        "circuit_breaker_min_calls": 1,
+        "circuit_breaker_open_seconds": open_seconds,
+    }))
+    return ai_analyzer.ContentModerator()
+
+
+def test_probe_task_is_tracked_and_cancelled_on_stop(monkeypatch):
+    from src.bot.moderator.backends import FakeBackend
+
+    moderator = make_moderator(monkeypatch, open_seconds=0.01)
+
+    async def main():
+        await moderator.initialize()
+        moderator.llm = FakeBackend(latency=5.0)  # La prueba queda en vuelo
+        moderator.breaker.record_failure()
+        scheduled = moderator._probe_timer is not None
+        await asyncio.sleep(0.05)
+        probing = list(moderator._tasks)
+        await moderator.stop()
+        return scheduled, probing
+
+    scheduled, probing = asyncio.run(main())
+    assert scheduled
+    assert moderator._probe_timer is None
+    assert len(probing) == 1 and probing[0].cancelled()
+    assert not moderator._tasks
+
+
+def test_stop_cancels_the_scheduled_probe(monkeypatch):
+    moderator = make_moderator(monkeypatch, open_seconds=30.0)
+
+    async def main():
+        await moderator.initialize()
+        moderator.breaker.record_failure()
+        timer = moderator._probe_timer
+        await moderator.stop()
+        return timer
+
+    timer = asyncio.run(main())
+    assert timer.cancelled()
+    assert moderator._probe_timer is None
@@ -0,0 +1,95 @@
+"""🧮 Clasificador local: entrenamiento, holdout y log de decisiones"""
+
+import json
+import logging
+
+import pytest
+
+from src.bot.moderator import ai_analyzer
+from src.bot.moderator.classifier import (
+    DECISION_LOG_MARKER,
+    NaiveBayesClassifier,
+    in_holdout,
+    main,
+    split_holdout,
+)
+
+SPAM = ["gana dinero rápido con cripto {n}", "oferta de inversión garantizada {n}", "únete a mi grupo de señales {n}"]
+OK = ["¿cómo instalo django {n}?", "error de importación en pandas {n}", "alguien usa fastapi con asyncio {n}"]
+
+
+def write_log(path, records):
+    with open(path, "w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write("2026-01-01 00:00:00,000 - x - INFO - " + DECISION_LOG_MARKER + json.dumps(record) + "\n")
+
+
+def decisions(n=40):
+    records = []
+    for i in range(n):
+        records += [{"source": "llm", "action": "delete", "message": t.format(n=i)} for t in SPAM]
+        records += [{"source": "llm", "action": "approve", "message": t.format(n=i)} for t in OK]
+    return records
+
+
+def test_holdout_is_stable_and_by_text():
+    texts = [f"mensaje número {i}" for i in range(1000)]
+    labels = ["approve"] * len(texts)
+    train_x, _, test_x, _ = split_holdout(texts, labels, 0.2)
+    assert not set(train_x) & set(test_x)
+    assert 120 < len(test_x) < 280
+    # Copias con otra capitalización/espacios caen del mismo lado
+    assert in_holdout("Mensaje  NÚMERO 7", 0.2) == in_holdout("mensaje número 7", 0.2)
+
+
+def test_train_refuses_single_class(tmp_path):
+    log = tmp_path / "moderation.log"
+    write_log(log, [{"source": "llm", "action": "approve", "message": f"hola {i}"} for i in range(50)])
+    out = tmp_path / "model.json"
+    with pytest.raises(SystemExit):
+        main(["train", "--log", str(log), "--out", str(out)])
+    assert not out.exists()
+
+
+def test_saved_model_excludes_holdout_and_evaluate_uses_it(tmp_path, capsys):
+    log = tmp_path / "moderation.log"
+    write_log(log, decisions())
+    out = tmp_path / "model.json"
+    main(["train", "--log", str(log), "--out", str(out), "--test-ratio", "0.25"])
+
+    model = NaiveBayesClassifier.load(str(out))
+    assert model.holdout_ratio == 0.25
+    records = decisions()
+    train_count = sum(not in_holdout(r["message"], 0.25) for r in records)
+    assert sum(model.class_counts.values()) == train_count
+
+    capsys.readouterr()
+    main(["evaluate", "--model", str(out), "--log", str(log)])
+    report = capsys.readouterr().out
+    assert "(holdout)" in report
+    assert f"'samples': {len(records) - train_count}" in report
+
+
+def test_decisions_logged_even_at_warning_level():
+    captured = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            captured.append(record.getMessage())
+
+    handler = ListHandler()
+    previous = ai_analyzer.logger.level
+    ai_analyzer.logger.setLevel(logging.WARNING)
+    ai_analyzer.decision_logger.addHandler(handler)
+    try:
+        moderator = ai_analyzer.ContentModerator()
+        result = ai_analyzer.ModerationResult(
+            ai_analyzer.ModerationAction.APPROVE, "ok", 0.9, "hola", None, 0.0
+        )
+        moderator._log_decision(result, "llm", 1)
+    finally:
+        ai_analyzer.decision_logger.removeHandler(handler)
+        ai_analyzer.logger.setLevel(previous)
+
+    assert len(captured) == 1 and captured[0].startswith(DECISION_LOG_MARKER)
+    assert json.loads(captured[0][len(DECISION_LOG_MARKER):])["source"] == "llm"
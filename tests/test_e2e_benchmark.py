@@ -0,0 +1,65 @@
+"""🏁 Benchmark de punta a punta: mezclas reproducibles, percentiles y detección de regresiones"""
+
+import asyncio
+import json
+
+import pytest
+
+from benchmarks import e2e
+
+
+def test_scenarios_are_reproducible():
+    assert e2e.generate_messages("raid", 50, seed=7) == e2e.generate_messages("raid", 50, seed=7)
+    assert e2e.generate_messages("raid", 50, seed=7) != e2e.generate_messages("raid", 50, seed=8)
+
+    raid = e2e.generate_messages("raid", 200, seed=1)
+    questions = sum(m["text"].startswith("¿Alguien sabe") for m in raid)
+    assert 20 <= questions <= 60  # ~80% de spam, el resto preguntas
+    assert all(m["user_id"] >= 1000 for m in raid)  # Cuentas nuevas
+
+    with pytest.raises(ValueError):
+        e2e.generate_messages("otro", 1, seed=1)
+
+
+def test_percentiles_in_milliseconds():
+    assert e2e._percentiles([]) == {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    samples = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert e2e._percentiles(samples) == {"p50": 51.0, "p95": 96.0, "p99": 100.0, "mean": 50.5}
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"scenarios": {"raid": {"throughput": 100.0, "latency_p50": 10.0, "latency_p95": 50.0,
+                                       "latency_p99": 0}}}
+    results = {"scenarios": {
+        "raid": {"throughput": 85.0, "latency_p50": 10.5, "latency_p95": 80.0, "latency_p99": 5.0},
+        "code": {"throughput": 1.0},  # Sin línea base: no se compara
+    }}
+    regressions = e2e.compare(results, baseline, tolerance=0.10)
+    assert [line.split(":")[0] for line in regressions] == ["raid.throughput", "raid.latency_p95"]
+
+
+def test_mock_bot_counts_api_calls():
+    bot = e2e.MockBot(latency=0.0)
+    asyncio.run(bot.delete_message(chat_id=1, message_id=2))
+    asyncio.run(bot.delete_message(chat_id=1, message_id=3))
+    assert bot.calls == {"delete_message": 2}
+    with pytest.raises(AttributeError):
+        bot._private
+
+
+def test_end_to_end_run_and_baseline_gate(tmp_path):
+    out = tmp_path / "results.json"
+    args = ["--scenarios", "baseline", "--messages", "20", "--rate", "1000",
+            "--llm-latency", "fixed:0", "--telegram-latency", "0", "--out", str(out)]
+    e2e.main(args)
+
+    summary = json.loads(out.read_text())["scenarios"]["baseline"]
+    assert summary["throughput"] > 0
+    assert summary["latency_p50"] <= summary["latency_p95"] <= summary["latency_p99"]
+
+    # Una línea base imposible de alcanzar hace fallar la corrida
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"scenarios": {"baseline": {**summary, "throughput": summary["throughput"] * 100}}}))
+    with pytest.raises(SystemExit) as exit_info:
+        e2e.main(args + ["--baseline", str(baseline)])
+    assert exit_info.value.code == 1
@@ -0,0 +1,131 @@
+"""🌊 Limitador de flood: ventana deslizante aproximada de dos contadores"""
+
+from datetime import timezone
+
+import pytest
+
+from src.bot.moderator.flood_limiter import FloodLimiter, SlidingWindowCounter
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_excess_within_one_window():
+    clock = FakeClock(0.0)
+    counter = SlidingWindowCounter(limit=3, window=60, clock=clock)
+    assert [counter.hit("u") for _ in range(5)] == [0, 0, 0, 1, 2]
+    assert counter.exceeded == 2
+
+
+def test_previous_window_is_weighted_by_overlap():
+    clock = FakeClock(0.0)
+    counter = SlidingWindowCounter(limit=4, window=60, clock=clock)
+    for _ in range(4):
+        counter.hit("u")
+
+    # 15 s dentro de la siguiente ventana: 4 × (1 - 0.25) = 3 + 1 nuevo = 4 → dentro
+    clock.now = 75.0
+    assert counter.hit("u") == 0
+    # Otro más: 3 + 2 = 5 → uno por encima
+    assert counter.hit("u") == 1
+
+    # 45 s dentro: 4 × 0.25 = 1 + 2 = 3 → dentro de nuevo
+    clock.now = 105.0
+    assert counter.hit("u") == 0
+
+
+def test_gap_of_two_windows_forgets_history():
+    clock = FakeClock(0.0)
+    counter = SlidingWindowCounter(limit=2, window=60, clock=clock)
+    for _ in range(10):
+        counter.hit("u")
+    clock.now = 130.0  # Ventana 2: la 0 ya no es la inmediata anterior
+    assert counter.hit("u") == 0
+
+
+def test_keys_are_independent_and_bounded():
+    clock = FakeClock(0.0)
+    counter = SlidingWindowCounter(limit=1, window=60, max_keys=3, clock=clock)
+    for key in range(5):
+        assert counter.hit(key) == 0
+    assert len(counter) == 3
+
+
+def test_idle_keys_are_evicted():
+    clock = FakeClock(0.0)
+    counter = SlidingWindowCounter(limit=5, window=60, clock=clock)
+    counter.hit("a")
+    counter.hit("b")
+    clock.now = 200.0
+    counter.hit("c")
+    assert len(counter) == 1
+    assert counter.evicted_idle == 2
+
+
+def test_flood_limiter_counts_by_chat():
+    limiter = FloodLimiter(max_per_minute=1)
+    assert limiter.action == "delete"
+    limiter.counter._clock = FakeClock(0.0)
+    assert limiter.check(10, 1) == 0
+    assert limiter.check(10, 1) == 1
+    assert limiter.check(20, 1) == 0  # Otro chat, otra cuenta
+    assert limiter.get_stats()["flooded_by_chat"] == {10: 1}
+
+
+@pytest.mark.parametrize("minutes", [1, 5, 1440])
+def test_until_utc_is_timezone_aware(minutes):
+    from src.bot.services.telegram_client import until_utc
+
+    until = until_utc(minutes)
+    assert until.tzinfo is timezone.utc
+
+
+def test_excess_is_deleted_without_the_llm_by_default():
+    import asyncio
+    from types import SimpleNamespace
+
+    from src.bot.moderator.ai_analyzer import ModerationAction
+    from src.bot.services.telegram_client import TelegramBot
+    from src.settings import Settings
+
+    assert Settings.model_fields["flood_action"].default == "delete"
+
+    class FakeTelegram:
+        def __init__(self):
+            self.calls = []
+
+        async def delete_message(self, **kwargs):
+            self.calls.append(kwargs["message_id"])
+            return True
+
+        async def delete_messages(self, **kwargs):
+            self.calls.extend(kwargs["message_ids"])
+            return True
+
+    async def not_admin(*args):
+        return False
+
+    async def main():
+        bot = TelegramBot()
+        bot.flood = FloodLimiter(max_per_minute=2)
+        bot.admins.is_admin = not_admin
+        context = SimpleNamespace(bot=FakeTelegram())
+        decisions = []
+        for message_id in range(1, 5):
+            update = SimpleNamespace(
+                effective_user=SimpleNamespace(id=7),
+                effective_chat=SimpleNamespace(id=-100),
+                message=SimpleNamespace(message_id=message_id, sender_chat=None),
+            )
+            decisions.append(await bot._local_decision(update, context))
+        await bot.actions.drain()
+        return decisions, context.bot.calls
+
+    decisions, calls = asyncio.run(main())
+    assert decisions == [None, None, ("flood", ModerationAction.DELETE), ("flood", ModerationAction.DELETE)]
+    assert calls == [3, 4]
@@ -0,0 +1,96 @@
+"""📈 Métricas: formato de exposición de Prometheus y conteo de acciones en cada camino"""
+
+import asyncio
+from types import SimpleNamespace
+
+from src.bot.services import telegram_client
+from src.bot.services.metrics import ACTIONS_TOTAL, MetricsRegistry
+
+
+def test_counter_exposition():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_actions_total", "Acciones", ("action", "chat"))
+    counter.inc(action="delete", chat=-100)
+    counter.inc(2, action="delete", chat=-100)
+    counter.inc(action='say "hi"\\', chat=1)
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_actions_total Acciones",
+        "# TYPE demo_actions_total counter",
+        'demo_actions_total{action="delete",chat="-100"} 3',
+        'demo_actions_total{action="say \\"hi\\"\\\\",chat="1"} 1',
+    ]
+
+
+def test_histogram_exposition():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Duración", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="llm")
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_seconds Duración",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="llm",le="0.1"} 2',  # le es inclusivo
+        'demo_seconds_bucket{stage="llm",le="1"} 3',
+        'demo_seconds_bucket{stage="llm",le="+Inf"} 4',
+        'demo_seconds_sum{stage="llm"} 3.65',
+        'demo_seconds_count{stage="llm"} 4',
+    ]
+    assert histogram.count(stage="llm") == 4
+
+
+def test_registry_returns_the_existing_metric_and_runs_collectors():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("demo_pending", "En cola")
+    assert registry.gauge("demo_pending", "En cola") is gauge
+
+    registry.on_collect(lambda: gauge.set(7))
+    registry.on_collect(lambda: 1 / 0)  # Un callback roto no tumba la exportación
+    assert "demo_pending 7" in registry.render().splitlines()
+
+
+def make_update(chat_id, message_id=1):
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(id=5),
+        effective_chat=SimpleNamespace(id=chat_id),
+        message=SimpleNamespace(text="hola", message_id=message_id, date=None, sender_chat=None),
+    )
+
+
+def make_bot():
+    bot = telegram_client.TelegramBot()
+    bot.settings = bot.settings.model_copy(update={"ai_streaming_enabled": False, "ai_two_stage_enabled": False})
+    bot.flood = bot.bursts = bot.reputation = None
+    return bot
+
+
+def test_admin_approval_is_counted(monkeypatch):
+    async def is_admin(*args):
+        return True
+
+    async def main():
+        bot = make_bot()
+        monkeypatch.setattr(bot.admins, "is_admin", is_admin)
+        await bot._handle_message(make_update(-201), SimpleNamespace(bot=None))
+
+    asyncio.run(main())
+    assert ACTIONS_TOTAL.value(action="approve", chat=-201) == 1
+
+
+def test_ai_error_counts_the_fallback_approval(monkeypatch):
+    async def is_admin(*args):
+        return False
+
+    async def broken(text, user_id):
+        raise RuntimeError("Gemini caído")
+
+    monkeypatch.setattr(telegram_client, "analyze_message", broken)
+
+    async def main():
+        bot = make_bot()
+        monkeypatch.setattr(bot.admins, "is_admin", is_admin)
+        await bot._handle_message(make_update(-202), SimpleNamespace(bot=None))
+
+    asyncio.run(main())
+    assert ACTIONS_TOTAL.value(action="approve", chat=-202) == 1
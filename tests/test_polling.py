@@ -0,0 +1,61 @@
+"""📡 Polling: allowed_updates sale de los handlers y getUpdates tiene su propio pool"""
+
+import asyncio
+
+from telegram import Update
+from telegram.ext import MessageHandler, filters
+
+from src.bot.services.telegram_client import TelegramBot
+
+
+def make_bot(**overrides):
+    bot = TelegramBot()
+    bot.settings = bot.settings.model_copy(update={"telegram_base_url": "", **overrides})
+    asyncio.run(bot.initialize())
+    return bot
+
+
+def test_allowed_updates_is_the_union_of_handler_types():
+    bot = make_bot()
+    assert Update.MESSAGE in bot.allowed_updates
+    assert Update.EDITED_MESSAGE not in bot.allowed_updates
+    assert len(set(bot.allowed_updates)) == len(bot.allowed_updates)
+
+    before = list(bot.allowed_updates)
+    handler = MessageHandler(filters.ALL, bot._handle_start)
+    bot._add_handler(handler, Update.MESSAGE, Update.CALLBACK_QUERY)
+    assert bot.allowed_updates == before + [Update.CALLBACK_QUERY]
+    assert handler in bot.application.handlers[0]
+
+
+def test_get_updates_uses_its_own_pool_and_timeouts():
+    bot = make_bot(
+        polling_connection_pool_size=2,
+        polling_read_timeout=7.0,
+        telegram_connection_pool_size=32,
+        telegram_pool_timeout=1.5,
+        telegram_read_timeout=12.0,
+    )
+    polling, actions = bot.application.bot._request
+    assert polling._client_kwargs["limits"].max_connections == 2
+    assert polling._client_kwargs["timeout"].read == 7.0
+    assert actions._client_kwargs["limits"].max_connections == 32
+    assert actions._client_kwargs["timeout"].pool == 1.5
+    assert actions._client_kwargs["timeout"].read == 12.0
+
+
+def test_start_polling_requests_only_the_allowed_updates(monkeypatch):
+    bot = make_bot(telegram_mode="polling", polling_timeout=25, telegram_drop_pending_updates=True)
+    calls = []
+
+    async def start_polling(updater, **kwargs):
+        calls.append(kwargs)
+
+    monkeypatch.setattr(type(bot.application.updater), "start_polling", start_polling)
+    asyncio.run(bot._start_receiving())
+    assert calls == [{
+        "timeout": 25,
+        "bootstrap_retries": bot.settings.polling_bootstrap_retries,
+        "allowed_updates": bot.allowed_updates,
+        "drop_pending_updates": True,
+    }]
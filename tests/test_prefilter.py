@@ -0,0 +1,75 @@
+"""🚦 Pre-filtro local: una sola señal de spam no basta para borrar sin Gemini"""
+
+import pytest
+
+from src.bot.moderator.prefilter import RuleBasedPreFilter
+
+
+@pytest.fixture
+def prefilter():
+    return RuleBasedPreFilter()
+
+
+@pytest.mark.parametrize("message", [
+    "Ojo con los que prometen ingresos pasivos, casi siempre es estafa",
+    "Busco libertad financiera aprendiendo Python, ¿por dónde empiezo?",
+    "Este es el discord de la comunidad de Django: https://discord.gg/django",
+    "Únanse al grupo de PyData: t.me/+pydata_mx",
+])
+def test_single_signal_goes_to_gemini(prefilter, message):
+    assert prefilter.check(message) is None
+    assert (prefilter.suspicious, prefilter.forwarded) == (1, 1)
+    assert not prefilter.hits
+
+
+def test_amount_without_currency_is_not_a_signal(prefilter):
+    assert prefilter.check("Mi meta es make 3 daily commits en mi proyecto") is None
+    assert (prefilter.suspicious, prefilter.forwarded) == (0, 1)
+
+
+def test_single_signal_is_counted_as_suspicious(prefilter):
+    assert prefilter.check("Gana $500 al día desde casa") is None
+    assert prefilter.get_stats()["suspicious"] == 1
+
+
+@pytest.mark.parametrize("message", [
+    "🚀 Gana $500 al día con bitcoin, ganancias garantizadas. Únete: t.me/+abc123",
+    "Sé tu propio jefe con ingresos pasivos, entra ya: chat.whatsapp.com/AbCdEf",
+    "Trading con ganancias diarias, gana 300 dólares al día",
+])
+def test_multiple_signals_delete_locally(prefilter, message):
+    verdict = prefilter.check(message)
+    assert verdict is not None and verdict.action == "delete"
+    assert (prefilter.suspicious, prefilter.forwarded) == (0, 0)
+
+
+def test_min_spam_signals_is_configurable():
+    strict = RuleBasedPreFilter(min_spam_signals=1)
+    verdict = strict.check("Únanse a discord.gg/abc")
+    assert verdict is not None and verdict.rule == "invite_link"
+
+
+@pytest.mark.parametrize("message, rule", [
+    ("hola", "safe_phrase"),
+    ("¡Gracias!", "safe_phrase"),
+    ("jajaja", "laughter"),
+    ("👍👍", "emoji_only"),
+    ("+1", "plus_one"),
+])
+def test_safe_messages_approve(prefilter, message, rule):
+    verdict = prefilter.check(message)
+    assert verdict is not None and verdict.action == "approve"
+    assert prefilter.hits == {rule: 1}
+    assert (prefilter.suspicious, prefilter.forwarded) == (0, 0)
+
+
+def test_safe_phrases_have_no_punctuation():
+    from src.bot.moderator.prefilter import _PUNCTUATION_RE, SAFE_PHRASES
+
+    # Se comparan contra el mensaje SIN puntuación: una entrada con signos nunca coincidiría
+    assert [phrase for phrase in SAFE_PHRASES if _PUNCTUATION_RE.search(phrase)] == []
+
+
+def test_questions_go_to_gemini(prefilter):
+    assert prefilter.check("¿Cómo uso la API de Binance con asyncio?") is None
+    assert prefilter.forwarded == 1
@@ -0,0 +1,109 @@
+"""🪣 Cuota de Gemini: lo que se reserva es lo que se ajusta"""
+
+import asyncio
+
+from src.bot.moderator.rate_limiter import GeminiQuotaLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_limiter(clock, rpm=60, tpm=1000):
+    return GeminiQuotaLimiter(rpm=rpm, tpm=tpm, safety=1.0, clock=clock, sleep=clock.sleep)
+
+
+def test_oversized_prompt_is_not_over_refunded():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    # 8000 caracteres ≈ 2000 tokens + salida: más que la capacidad (1000)
+    reserved = asyncio.run(limiter.acquire(prompt_chars=8000))
+    assert reserved == 1000
+    assert limiter.tokens.tokens == 0
+
+    # Gemini reporta menos de lo estimado pero más que la capacidad: no hay reembolso
+    limiter.settle(reserved, {"input_tokens": 1100, "output_tokens": 100, "total_tokens": 1200})
+    assert limiter.tokens.tokens == -200  # Deuda real, no un saldo positivo
+
+
+def test_settle_refunds_unused_reservation():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    reserved = asyncio.run(limiter.acquire(prompt_chars=400))  # 100 + 100 de salida típica
+    assert reserved == 200
+    limiter.settle(reserved, {"input_tokens": 90, "output_tokens": 30, "total_tokens": 120})
+    assert limiter.tokens.tokens == 1000 - 120
+
+
+def test_acquire_waits_for_refill():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rpm=60, tpm=0)  # 1 petición por segundo
+    limiter.requests.tokens = 0
+    asyncio.run(limiter.acquire(prompt_chars=10))
+    assert clock.now == 1.0
+    assert limiter.throttled == 1
+
+
+def test_bucket_debt_is_paid_by_waiting():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=10, refill_per_second=1, clock=clock)
+    bucket.adjust(-15)
+    assert bucket.time_until(1) == 6.0
+
+
+def test_release_returns_the_reservation():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    reserved = asyncio.run(limiter.acquire(prompt_chars=400))
+    limiter.release(reserved)
+    assert limiter.tokens.tokens == 1000
+    assert limiter.requests.tokens == 59  # La petición sí se hizo
+    assert limiter.get_stats()["released"] == 1
+
+
+def test_failed_gemini_calls_do_not_drain_the_token_bucket(monkeypatch):
+    from src.bot.moderator import ai_analyzer
+    from src.bot.moderator.backends import FakeBackend
+
+    class DownBackend(FakeBackend):
+        async def ainvoke(self, messages):
+            raise ConnectionError("Gemini caído")
+
+    monkeypatch.setattr(ai_analyzer, "settings", ai_analyzer.settings.model_copy(update={
+        "ai_backend": "fake",
+        "gemini_tpm_limit": 10_000,
+        "gemini_quota_safety": 1.0,
+        "circuit_breaker_enabled": False,
+    }))
+    moderator = ai_analyzer.ContentModerator()
+
+    async def main():
+        await moderator.initialize()
+        for _ in range(5):
+            try:
+                await moderator._call_llm("single", DownBackend(), moderator.prompt_template, {"message": "hola"})
+            except ConnectionError:
+                pass
+
+        async def slow(messages):
+            await asyncio.sleep(5)
+
+        backend = FakeBackend()
+        backend.ainvoke = slow
+        call = asyncio.create_task(
+            moderator._call_llm("single", backend, moderator.prompt_template, {"message": "hola"})
+        )
+        await asyncio.sleep(0.01)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+
+    asyncio.run(main())
+    assert moderator.quota.tokens.tokens == 10_000
+    assert moderator.quota.released == 6
@@ -0,0 +1,73 @@
+"""📼 Grabar y reproducir respuestas de Gemini (RecordingBackend)"""
+
+import asyncio
+
+import pytest
+
+from src.bot.moderator import ai_analyzer
+from src.bot.moderator.backends import LLMBackend, LLMResponse
+from src.bot.moderator.recording import RecordingBackend, ReplayMissError, prompt_key
+
+MESSAGES = [("system", "Eres un moderador"), ("human", "Analiza:\n\nhola")]
+VERDICT = '{"action": "APPROVE", "reason": "Saludo", "confidence": 0.99}'
+
+
+class PrefixedBackend(LLMBackend):
+    """Como ChatGoogleGenerativeAI 2.x: reporta el modelo como "models/<modelo>" """
+
+    name = "prefixed"
+
+    def __init__(self, model: str):
+        self.model = f"models/{model}"
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return LLMResponse(VERDICT, {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15})
+
+
+def test_prompt_key_ignores_models_prefix():
+    assert prompt_key("models/gemini-1.5-flash", MESSAGES) == prompt_key("gemini-1.5-flash", MESSAGES)
+    assert prompt_key("gemini-1.5-pro", MESSAGES) != prompt_key("gemini-1.5-flash", MESSAGES)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "rec.jsonl")
+    inner = PrefixedBackend("gemini-1.5-flash")
+    recorder = RecordingBackend(inner, path, "record")
+    asyncio.run(recorder.ainvoke(MESSAGES))
+    asyncio.run(recorder.ainvoke(MESSAGES))  # Ya grabado: no se duplica
+    assert recorder.recorded == 1
+
+    player = RecordingBackend(None, path, "replay", model="gemini-1.5-flash")
+    response = asyncio.run(player.ainvoke(MESSAGES))
+    assert response.content == VERDICT
+    assert response.usage_metadata["total_tokens"] == 15
+
+    with pytest.raises(ReplayMissError):
+        asyncio.run(player.ainvoke([("human", "otro prompt")]))
+
+
+def test_record_then_replay_through_build_client(tmp_path, monkeypatch):
+    path = str(tmp_path / "rec.jsonl")
+    created = []
+
+    def fake_create_backend(kind, model, **kwargs):
+        created.append(PrefixedBackend(model))
+        return created[-1]
+
+    monkeypatch.setattr(ai_analyzer, "create_backend", fake_create_backend)
+    moderator = ai_analyzer.ContentModerator()
+    base = moderator.settings
+
+    moderator.settings = base.model_copy(update={"ai_record_mode": "record", "ai_record_path": path})
+    recorder = moderator._build_client(base.ai_model, base.ai_max_tokens)
+    asyncio.run(recorder.ainvoke(MESSAGES))
+    assert created[0].calls == 1
+
+    moderator.settings = base.model_copy(update={"ai_record_mode": "replay", "ai_record_path": path})
+    player = moderator._build_client(base.ai_model, base.ai_max_tokens)
+    response = asyncio.run(player.ainvoke(MESSAGES))
+    assert response.content == VERDICT
+    assert player.get_stats()["misses"] == 0
+    assert len(created) == 1  # Replay no crea backend real
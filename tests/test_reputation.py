@@ -0,0 +1,48 @@
+"""🤝 Reputación: solo los veredictos de Gemini construyen confianza"""
+
+from src.bot.moderator.reputation import ReputationStore
+
+
+def make_store(**kwargs):
+    return ReputationStore(max_users=100, trust_threshold=3, sample_rate=0.0, **kwargs)
+
+
+def test_only_llm_approvals_build_trust():
+    store = make_store()
+    for source in ("rules", "cache", "classifier", "singleflight", "trusted"):
+        store.record(1, "approve", 0.99, source)
+    assert not store.is_trusted(1)
+
+    for _ in range(3):
+        store.record(1, "approve", 0.9, "llm")
+    assert store.is_trusted(1)
+    assert not store.should_analyze(1)  # sample_rate=0: nunca se audita
+
+
+def test_low_confidence_approvals_do_not_count():
+    store = make_store()
+    for _ in range(5):
+        store.record(1, "approve", 0.0, "llm")  # Aprobado por error
+    assert not store.is_trusted(1)
+
+
+def test_any_flag_resets_streak():
+    store = make_store()
+    for _ in range(3):
+        store.record(1, "approve", 0.9, "llm")
+    store.record(1, "delete", 0.95, "rules")
+    assert not store.is_trusted(1)
+    assert store.audit_flags == 1
+    assert store.should_analyze(1)
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "reputation.json")
+    store = make_store(path=path)
+    for _ in range(3):
+        store.record(7, "approve", 0.9, "llm")
+    store.save()
+
+    loaded = make_store(path=path)
+    assert loaded.load() == 1
+    assert loaded.is_trusted(7)
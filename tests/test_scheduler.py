@@ -0,0 +1,94 @@
+"""🚥 Planificador: concurrencia acotada, cola FIFO y desborde"""
+
+import asyncio
+
+import pytest
+
+from src.bot.moderator.scheduler import LLMScheduler, SchedulerOverflowError
+
+
+def test_limits_in_flight_and_overflows_when_queue_full():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=2, max_queue=1)
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "ok"
+
+        tasks = [asyncio.create_task(scheduler.run(call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 2 and scheduler.waiting == 1
+        with pytest.raises(SchedulerOverflowError):
+            await scheduler.run(call)
+        release.set()
+        return await asyncio.gather(*tasks), scheduler.get_stats()
+
+    results, stats = asyncio.run(main())
+    assert results == ["ok"] * 3
+    assert stats["peak_in_flight"] == 2
+    assert stats["overflowed"] == 1
+    assert stats["in_flight"] == stats["queue_depth"] == 0
+
+
+def test_waiters_are_served_in_arrival_order():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=10)
+        order = []
+
+        async def call(i):
+            order.append(i)
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*(scheduler.run(lambda i=i: call(i)) for i in range(5)))
+        return order
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+
+
+def test_block_policy_never_overflows():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=0, overflow_policy="block")
+
+        async def call():
+            await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(scheduler.run(call) for _ in range(4)))
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.overflowed == 0 and scheduler.completed == 4
+
+
+def test_failures_and_cancelled_waiters_release_slots():
+    async def main():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=5)
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("429")
+
+        first = asyncio.create_task(scheduler.run(boom))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(scheduler.run(boom))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(RuntimeError):
+            await first
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        async def ok():
+            return 1
+
+        return await scheduler.run(ok), scheduler
+
+    result, scheduler = asyncio.run(main())
+    assert result == 1
+    assert scheduler.failed == 1
+    assert scheduler.waiting == 0 and scheduler.in_flight == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        LLMScheduler(1, 1, overflow_policy="panic")
@@ -0,0 +1,131 @@
+"""🛫 SingleFlight: una sola llamada por llave a la vez"""
+
+import asyncio
+
+import pytest
+
+from src.bot.moderator.cache import normalize_message
+from src.bot.moderator.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def main():
+        flights = SingleFlight()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "veredicto"
+
+        results = await asyncio.gather(*(flights.do("k", call) for _ in range(5)))
+        return flights, calls, results
+
+    flights, calls, results = asyncio.run(main())
+    assert calls == 1
+    assert [shared for _, shared in results].count(False) == 1
+    assert all(result == "veredicto" for result, _ in results)
+    assert flights.get_stats() == {"leaders": 1, "collapsed": 4, "collapse_rate": 0.8, "in_flight": 0}
+
+
+def test_sequential_calls_do_not_share():
+    async def main():
+        flights = SingleFlight()
+
+        async def call():
+            return 1
+
+        return [await flights.do("k", call) for _ in range(3)], flights
+
+    results, flights = asyncio.run(main())
+    assert results == [(1, False)] * 3
+    assert flights.collapsed == 0
+
+
+def test_leader_failure_reaches_waiters():
+    async def main():
+        flights = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Gemini caído")
+
+        results = await asyncio.gather(*(flights.do("k", call) for _ in range(3)), return_exceptions=True)
+        return flights, results
+
+    flights, results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.get_stats()["in_flight"] == 0
+
+
+def test_leader_cancel_makes_waiter_retry():
+    async def main():
+        flights = SingleFlight()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        leader = asyncio.create_task(flights.do("k", call))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("k", call))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter, calls
+
+    (result, shared), calls = asyncio.run(main())
+    assert calls == 2  # El que esperaba reintentó como líder
+    assert (result, shared) == (2, False)
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    async def main():
+        flights = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        leader = asyncio.create_task(flights.do("k", call))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("k", call))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == ("ok", False)
+
+
+def test_normalized_key_matches_docstring_example():
+    assert normalize_message("GANA  $500   YA") == normalize_message("gana $500 ya")
+    assert normalize_message("gana $500 ya!!") != normalize_message("gana $500 ya")
+
+
+def test_waiters_keep_error_source(monkeypatch):
+    from src.bot.moderator import ai_analyzer
+
+    moderator = ai_analyzer.ContentModerator()
+    moderator.cache = None
+    moderator.singleflight = SingleFlight()
+    moderator.llm, moderator.prompt_template = object(), [("human", "{message}")]
+
+    async def failing(message, start_time):
+        await asyncio.sleep(0.01)
+        return moderator._error_result(message, start_time, RuntimeError("Gemini caído"))
+
+    monkeypatch.setattr(moderator, "_analyze_uncached", failing)
+    text = "¿Alguien sabe cómo usar asyncio.TaskGroup en Python 3.11?"
+
+    async def main():
+        return await asyncio.gather(*(moderator.analyze_message(text, user_id) for user_id in (1, 2, 3)))
+
+    results = asyncio.run(main())
+    assert moderator.singleflight.collapsed == 2
+    assert [r.source for r in results] == ["error"] * 3
+    assert all(r.confidence == 0.0 for r in results)
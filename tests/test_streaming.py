@@ -0,0 +1,173 @@
+"""⚡ Streaming: la acción se publica antes que la razón y no se pierde si el stream falla"""
+
+import asyncio
+from types import SimpleNamespace
+
+from src.bot.moderator import ai_analyzer
+from src.bot.moderator.ai_analyzer import ModerationAction, PendingModeration
+from src.bot.moderator.backends import FakeBackend
+from src.bot.services import telegram_client
+from src.bot.services.metrics import ACTIONS_TOTAL
+
+SPAM = '{"action": "DELETE", "reason": "Promoción de criptomonedas con enlace sospechoso", "confidence": 0.95}'
+TEXT = "Invierte en mi grupo de señales, ganancias garantizadas"
+
+
+class BrokenStream(FakeBackend):
+    """Escribe los primeros `chunks` fragmentos de la respuesta y luego falla"""
+
+    def __init__(self, responses, chunks, error=None, **kwargs):
+        super().__init__(responses, **kwargs)
+        self.chunks = chunks
+        self.error = error or ConnectionError("stream interrumpido")
+
+    async def astream(self, messages):
+        sent = 0
+        async for chunk in super().astream(messages):
+            if sent == self.chunks:
+                raise self.error
+            sent += 1
+            yield chunk
+
+
+def make_moderator(monkeypatch, backend):
+    """Moderador con solo Gemini (sin pre-filtros, caché ni breaker) y `backend` como modelo"""
+    monkeypatch.setattr(ai_analyzer, "settings", ai_analyzer.settings.model_copy(update={
+        "ai_backend": "fake",
+        "prefilter_enabled": False,
+        "classifier_enabled": False,
+        "verdict_cache_enabled": False,
+        "singleflight_enabled": False,
+        "circuit_breaker_enabled": False,
+        "ai_cascade_enabled": False,
+    }))
+    moderator = ai_analyzer.ContentModerator()
+
+    async def ready():
+        await moderator.initialize()
+        moderator.llm = backend
+        return moderator
+
+    return ready
+
+
+def test_action_is_published_before_the_reason(monkeypatch):
+    ready = make_moderator(monkeypatch, FakeBackend([SPAM], latency=0.2, chunk_size=8))
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_streaming(TEXT, 1)
+        action = await pending.action()
+        reason_ready = pending._result.done()
+        return action, reason_ready, await pending.result(), moderator
+
+    action, reason_ready, result, moderator = asyncio.run(main())
+    assert action == ModerationAction.DELETE
+    assert not reason_ready
+    assert result.action == ModerationAction.DELETE and result.confidence == 0.95
+    assert result.source == "llm"
+    assert not moderator._tasks
+
+
+def test_stream_failure_after_action_keeps_the_action(monkeypatch):
+    # 4 fragmentos de 8 caracteres ya contienen '"action": "DELETE"'
+    ready = make_moderator(monkeypatch, BrokenStream([SPAM], chunks=4, chunk_size=8))
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_streaming(TEXT, 1)
+        return await pending.action(), await asyncio.wait_for(pending.result(), 1)
+
+    action, result = asyncio.run(main())
+    assert action == ModerationAction.DELETE
+    assert result.action == ModerationAction.DELETE
+    assert result.confidence == 0.0
+    assert "stream interrumpido" in result.reason
+
+
+def test_stream_failure_before_action_approves(monkeypatch):
+    ready = make_moderator(monkeypatch, BrokenStream([SPAM], chunks=1, chunk_size=8))
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_streaming(TEXT, 1)
+        return await asyncio.wait_for(pending.result(), 1)
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.APPROVE and result.confidence == 0.0
+
+
+def test_unparseable_tail_keeps_the_action(monkeypatch):
+    ready = make_moderator(monkeypatch, FakeBackend(['{"action": "DELETE", "reason": "sin cerrar'], chunk_size=8))
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_streaming(TEXT, 1)
+        return await asyncio.wait_for(pending.result(), 1)
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.DELETE
+    assert result.confidence == 0.0
+    assert result.source == "error"
+
+
+def test_cancelled_stream_still_resolves_the_result(monkeypatch):
+    ready = make_moderator(monkeypatch, FakeBackend([SPAM], latency=5.0, chunk_size=8))
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_streaming(TEXT, 1)
+        await asyncio.sleep(0.01)
+        (task,) = moderator._tasks
+        task.cancel()
+        return await asyncio.wait_for(pending.result(), 1)
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.APPROVE
+    assert "cancelado" in result.reason
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.calls = []
+
+    async def _call(self, method, **kwargs):
+        self.calls.append(method)
+        return True
+
+    async def delete_message(self, **kwargs):
+        return await self._call("delete_message", **kwargs)
+
+    async def send_message(self, **kwargs):
+        return await self._call("send_message", **kwargs)
+
+
+def test_handler_acts_on_the_published_action(monkeypatch):
+    """Aunque el resultado final no coincida, cuenta y avisa lo que de verdad se ejecutó"""
+    async def streaming(text, user_id):
+        pending = PendingModeration()
+        pending.set_action(ModerationAction.DELETE)
+        pending.set_result(ai_analyzer.moderator._error_result(text, 0.0, RuntimeError("cuota agotada")))
+        return pending
+
+    monkeypatch.setattr(telegram_client, "analyze_message_streaming", streaming)
+
+    async def main():
+        bot = telegram_client.TelegramBot()
+        bot.settings = bot.settings.model_copy(update={"ai_streaming_enabled": True, "ai_two_stage_enabled": False})
+        bot.reputation = None
+        telegram = FakeTelegram()
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=5),
+            effective_chat=SimpleNamespace(id=-100),
+            message=SimpleNamespace(text=TEXT, message_id=42),
+        )
+        await bot._moderate([(update, SimpleNamespace(bot=telegram), 0.0)])
+        await bot.actions.drain()
+        return telegram
+
+    deleted_before = ACTIONS_TOTAL.value(action="delete", chat=-100)
+    telegram = asyncio.run(main())
+    assert telegram.calls == ["delete_message", "send_message"]  # Borrado + aviso por privado
+    assert ACTIONS_TOTAL.value(action="delete", chat=-100) == deleted_before + 1
+    assert ACTIONS_TOTAL.value(action="approve", chat=-100) == 0
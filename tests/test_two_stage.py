@@ -0,0 +1,148 @@
+"""🎯 Dos etapas: clasificación compacta, respaldo JSON y razón solo para lo que no se aprueba"""
+
+import asyncio
+
+import pytest
+
+from src.bot.moderator import ai_analyzer
+from src.bot.moderator.ai_analyzer import _COMPACT_VERDICT_RE, ModerationAction
+from src.bot.moderator.backends import FakeBackend
+
+TEXT = "Únete a mi canal de trading, 300% mensual garantizado"
+
+
+class FailingBackend(FakeBackend):
+    async def ainvoke(self, messages):
+        self.calls += 1
+        raise TimeoutError("Gemini no respondió")
+
+
+def make_moderator(monkeypatch, classify, reason):
+    """Moderador con solo Gemini: `classify` responde la etapa 1 y `reason` la etapa 2"""
+    monkeypatch.setattr(ai_analyzer, "settings", ai_analyzer.settings.model_copy(update={
+        "ai_backend": "fake",
+        "ai_two_stage_enabled": True,
+        "prefilter_enabled": False,
+        "classifier_enabled": False,
+        "verdict_cache_enabled": False,
+        "singleflight_enabled": False,
+        "circuit_breaker_enabled": False,
+        "ai_cascade_enabled": False,
+    }))
+    moderator = ai_analyzer.ContentModerator()
+
+    async def ready():
+        await moderator.initialize()
+        moderator.classify_llm, moderator.llm = classify, reason
+        return moderator
+
+    return ready
+
+
+@pytest.mark.parametrize("content, action, confidence", [
+    ("DELETE 0.92", "DELETE", "0.92"),
+    ("delete: 0.8", "delete", "0.8"),
+    ("Acción: BAN|1", "BAN", "1"),
+    ("WARN", "WARN", None),
+])
+def test_compact_verdict_regex(content, action, confidence):
+    match = _COMPACT_VERDICT_RE.search(content)
+    assert match.group(1) == action
+    assert match.group(2) == confidence
+
+
+def test_compact_verdict_regex_ignores_words_inside_other_words():
+    assert _COMPACT_VERDICT_RE.search("BANANA DELETED") is None
+
+
+def test_approve_needs_no_second_call(monkeypatch):
+    reason = FakeBackend(["no debería llamarse"])
+    ready = make_moderator(monkeypatch, FakeBackend(["APPROVE 0.97"]), reason)
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_two_stage("¿Qué ORM recomiendan?", 1)
+        return await pending.result()
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.APPROVE and result.confidence == 0.97
+    assert result.source == "llm"
+    assert reason.calls == 0
+
+
+def test_action_first_then_reason(monkeypatch):
+    reason = FakeBackend(["Promoción de esquemas de inversión"], latency=0.05)
+    ready = make_moderator(monkeypatch, FakeBackend(["DELETE 0.9"]), reason)
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_two_stage(TEXT, 1)
+        action = await pending.action()
+        tracked = len(moderator._tasks)
+        result = await pending.result()
+        await asyncio.sleep(0)
+        return action, tracked, result, moderator
+
+    action, tracked, result, moderator = asyncio.run(main())
+    assert action == ModerationAction.DELETE
+    assert tracked == 1 and not moderator._tasks  # La etapa 2 se guarda hasta terminar
+    assert result.action == ModerationAction.DELETE and result.confidence == 0.9
+    assert result.reason == "Promoción de esquemas de inversión"
+    assert reason.calls == 1
+
+
+def test_full_json_answer_skips_second_stage(monkeypatch):
+    reason = FakeBackend(["no debería llamarse"])
+    classify = FakeBackend(['{"action": "WARN", "reason": "Borderline", "confidence": 0.7}'])
+    ready = make_moderator(monkeypatch, classify, reason)
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_two_stage(TEXT, 1)
+        return await pending.result()
+
+    result = asyncio.run(main())
+    assert (result.action, result.reason, result.confidence) == (ModerationAction.WARN, "Borderline", 0.7)
+    assert reason.calls == 0
+
+
+def test_second_stage_failure_keeps_the_action(monkeypatch):
+    ready = make_moderator(monkeypatch, FakeBackend(["BAN 0.99"]), FailingBackend())
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_two_stage(TEXT, 1)
+        return await pending.action(), await asyncio.wait_for(pending.result(), 1)
+
+    action, result = asyncio.run(main())
+    assert action == result.action == ModerationAction.BAN
+    assert result.confidence == 0.99
+    assert "Gemini no respondió" in result.reason
+
+
+def test_classification_failure_approves(monkeypatch):
+    ready = make_moderator(monkeypatch, FailingBackend(), FakeBackend())
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_two_stage(TEXT, 1)
+        return await pending.result()
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.APPROVE and result.confidence == 0.0
+
+
+def test_cancelled_second_stage_still_resolves(monkeypatch):
+    ready = make_moderator(monkeypatch, FakeBackend(["DELETE 0.9"]), FakeBackend(["razón"], latency=5.0))
+
+    async def main():
+        moderator = await ready()
+        pending = await moderator.analyze_message_two_stage(TEXT, 1)
+        await asyncio.sleep(0.01)
+        (task,) = moderator._tasks
+        task.cancel()
+        return await asyncio.wait_for(pending.result(), 1)
+
+    result = asyncio.run(main())
+    assert result.action == ModerationAction.DELETE
+    assert "cancelado" in result.reason
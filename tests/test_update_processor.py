@@ -0,0 +1,94 @@
+"""🔀 Procesador concurrente: orden por chat y por usuario"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from telegram import Chat, Message, Update, User
+
+from src.bot.services.update_processor import ChatOrderedUpdateProcessor, ordering_keys
+
+
+def make_update(update_id, chat_id, user_id):
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(timezone.utc),
+        chat=Chat(chat_id, Chat.SUPERGROUP),
+        from_user=User(user_id, f"user{user_id}", False),
+        text=f"mensaje {update_id}",
+    )
+    return Update(update_id, message=message)
+
+
+def run(processor, updates, durations, fail=()):
+    """Procesa `updates` como lo haría la Application; devuelve (inicios, fines) en orden"""
+    started, finished = [], []
+
+    async def handler(update, delay):
+        started.append(update.update_id)
+        await asyncio.sleep(delay)
+        if update.update_id in fail:
+            raise RuntimeError("handler roto")
+        finished.append(update.update_id)
+
+    async def main():
+        await processor.initialize()
+        tasks = [
+            asyncio.create_task(processor.process_update(update, handler(update, delay)))
+            for update, delay in zip(updates, durations)
+        ]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    return started, finished
+
+
+def test_same_chat_keeps_arrival_order():
+    processor = ChatOrderedUpdateProcessor(4)
+    updates = [make_update(i, chat_id=1, user_id=100 + i) for i in range(1, 6)]
+    # El primero es el más lento: sin orden, los demás terminarían antes
+    started, finished = run(processor, updates, [0.05, 0.01, 0.03, 0.0, 0.02])
+    assert started == finished == [1, 2, 3, 4, 5]
+    assert processor.peak_running == 1
+
+
+def test_same_user_across_chats_keeps_order():
+    processor = ChatOrderedUpdateProcessor(4)
+    updates = [make_update(i, chat_id=i, user_id=7) for i in range(1, 4)]
+    _, finished = run(processor, updates, [0.03, 0.0, 0.01])
+    assert finished == [1, 2, 3]
+
+
+def test_unrelated_chats_run_in_parallel():
+    processor = ChatOrderedUpdateProcessor(4)
+    updates = [make_update(i, chat_id=i, user_id=100 + i) for i in range(1, 5)]
+    _, finished = run(processor, updates, [0.04, 0.03, 0.02, 0.01])
+    assert finished == [4, 3, 2, 1]
+    assert processor.peak_running == 4
+    assert processor.get_stats()["tracked_keys"] == 0
+
+
+def test_concurrency_limit():
+    processor = ChatOrderedUpdateProcessor(2)
+    updates = [make_update(i, chat_id=i, user_id=100 + i) for i in range(1, 7)]
+    run(processor, updates, [0.01] * 6)
+    assert processor.peak_running == 2
+    assert processor.processed == 6
+
+
+def test_failed_update_does_not_block_its_chat():
+    processor = ChatOrderedUpdateProcessor(2)
+    updates = [make_update(i, chat_id=1, user_id=5) for i in range(1, 4)]
+    started, finished = run(processor, updates, [0.01, 0.0, 0.0], fail={1})
+    assert started == [1, 2, 3]
+    assert finished == [2, 3]
+
+
+def test_ordering_keys():
+    assert ordering_keys(make_update(1, chat_id=-100, user_id=9)) == (("chat", -100), ("user", 9))
+    assert ordering_keys(object()) == ()
+
+
+def test_rejects_zero_concurrency():
+    with pytest.raises(ValueError):
+        ChatOrderedUpdateProcessor(0)
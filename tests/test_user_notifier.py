@@ -0,0 +1,95 @@
+"""📨 Avisos: sin repetir, sin insistir con quien no acepta privados"""
+
+import asyncio
+from types import SimpleNamespace
+
+from telegram import User
+from telegram.error import Forbidden
+
+from src.bot.services.action_queue import ActionExecutor
+from src.bot.services.user_notifier import ExpiringSet, WarningNotifier, is_unreachable_error
+
+USER = User(42, "Ana", False)
+CHAT = -100
+
+
+class FakeBot:
+    def __init__(self, blocked=()):
+        self.blocked = set(blocked)
+        self.sent = []
+
+    async def send_message(self, chat_id, **kwargs):
+        self.sent.append(chat_id)
+        if chat_id in self.blocked:
+            raise Forbidden("bot can't initiate conversation with a user")
+        return SimpleNamespace(message_id=len(self.sent))
+
+
+def run(bot, scenario, **kwargs):
+    async def main():
+        actions = ActionExecutor(global_per_second=1000, chat_per_minute=6000)
+        notifier = WarningNotifier(actions, **{"dedupe_seconds": 300, "unreachable_ttl": 3600, **kwargs})
+        outcomes = await scenario(notifier, actions)
+        await actions.drain()
+        return outcomes, notifier
+
+    return asyncio.run(main())
+
+
+def test_repeated_warnings_are_deduped():
+    bot = FakeBot()
+
+    async def scenario(notifier, actions):
+        return [notifier.warn(bot, CHAT, USER, "⚠️") for _ in range(3)]
+
+    outcomes, notifier = run(bot, scenario)
+    assert outcomes == ["dm", "deduped", "deduped"]
+    assert bot.sent == [USER.id]
+    assert notifier.get_stats()["dm_sent"] == 1
+
+
+def test_unreachable_users_are_not_retried():
+    bot = FakeBot(blocked={USER.id})
+
+    async def scenario(notifier, actions):
+        first = notifier.warn(bot, CHAT, USER, "⚠️")
+        await actions.drain()
+        return [first, notifier.warn(bot, CHAT, USER, "⚠️")]
+
+    outcomes, notifier = run(bot, scenario, dedupe_seconds=0)
+    assert outcomes == ["dm", "skipped"]
+    assert bot.sent == [USER.id]  # El segundo aviso ni se intentó
+    assert notifier.get_stats()["unreachable_users"] == 1
+
+
+def test_group_fallback_and_mark_reachable():
+    bot = FakeBot(blocked={USER.id})
+
+    async def scenario(notifier, actions):
+        notifier.warn(bot, CHAT, USER, "⚠️ <cuidado>")
+        await actions.drain()
+        notifier.mark_reachable(USER.id)
+        bot.blocked.clear()
+        return notifier.warn(bot, CHAT, USER, "⚠️")
+
+    outcome, notifier = run(bot, scenario, dedupe_seconds=0, group_fallback=True)
+    assert outcome == "dm"
+    assert bot.sent == [USER.id, CHAT, USER.id]
+    assert notifier.outcomes["fallback"] == 1
+
+
+def test_expiring_set():
+    now = [0.0]
+    items = ExpiringSet(max_size=2, clock=lambda: now[0])
+    items.add("a", 10)
+    items.add("b", 10)
+    items.add("c", 10)
+    assert "a" not in items and len(items) == 2
+    now[0] = 10.0
+    assert "b" not in items
+
+
+def test_is_unreachable_error():
+    assert is_unreachable_error(Forbidden("bot was blocked by the user"))
+    assert not is_unreachable_error(RuntimeError("otra cosa"))
+    assert not is_unreachable_error(None)
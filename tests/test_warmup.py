@@ -0,0 +1,77 @@
+"""🔒 Arranque: el moderador se inicializa una sola vez y el warm-up toca cada cliente"""
+
+import asyncio
+
+from src.bot.moderator import ai_analyzer
+from src.bot.moderator.backends import FakeBackend
+
+
+def make_moderator(monkeypatch, **overrides):
+    monkeypatch.setattr(ai_analyzer, "settings", ai_analyzer.settings.model_copy(update={
+        "ai_backend": "fake", "ai_cascade_enabled": False, **overrides,
+    }))
+    return ai_analyzer.ContentModerator()
+
+
+def test_concurrent_first_messages_initialize_once(monkeypatch):
+    moderator = make_moderator(monkeypatch)
+    calls = []
+    initialize = moderator.initialize
+
+    async def slow_initialize():
+        calls.append(1)
+        await asyncio.sleep(0.01)  # Las demás tareas llegan mientras tanto
+        await initialize()
+
+    monkeypatch.setattr(moderator, "initialize", slow_initialize)
+
+    async def main():
+        return await asyncio.gather(*(moderator.ensure_initialized() for _ in range(5)))
+
+    assert sorted(asyncio.run(main())) == [False, False, False, False, True]
+    assert len(calls) == 1
+    assert moderator.is_ready
+
+
+def test_failed_initialization_is_retried(monkeypatch):
+    moderator = make_moderator(monkeypatch)
+    initialize = moderator.initialize
+    attempts = []
+
+    async def flaky_initialize():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("sin red")
+        await initialize()
+
+    monkeypatch.setattr(moderator, "initialize", flaky_initialize)
+
+    async def main():
+        try:
+            await moderator.ensure_initialized()
+        except ConnectionError:
+            pass
+        return moderator.is_ready, await moderator.ensure_initialized()
+
+    assert asyncio.run(main()) == (False, True)
+    assert len(attempts) == 2
+
+
+def test_warm_up_calls_each_client_once_and_tolerates_failures(monkeypatch):
+    moderator = make_moderator(monkeypatch, circuit_breaker_enabled=False)
+
+    class Broken(FakeBackend):
+        async def ainvoke(self, messages):
+            self.calls += 1
+            raise TimeoutError("sin respuesta")
+
+    async def main():
+        await moderator.ensure_initialized()
+        shared, broken = FakeBackend(["OK"]), Broken()
+        moderator.llm, moderator.classify_llm, moderator.fast_llm = shared, shared, broken
+        elapsed = await moderator.warm_up()
+        return shared, broken, elapsed
+
+    shared, broken, elapsed = asyncio.run(main())
+    assert (shared.calls, broken.calls) == (1, 1)
+    assert elapsed >= 0
@@ -0,0 +1,93 @@
+"""🪝 Webhook: solo entra lo que trae el secret token correcto, por la misma conexión keep-alive"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update
+
+from src.bot.services.webhook import MAX_BODY_BYTES, WebhookServer
+
+SECRET = "s3cr3t-token"
+UPDATE = {
+    "update_id": 10,
+    "message": {
+        "message_id": 1, "date": 0, "text": "hola",
+        "chat": {"id": -100, "type": "supergroup"},
+        "from": {"id": 5, "is_bot": False, "first_name": "Ana"},
+    },
+}
+
+
+def request(method="POST", path="/telegram", secret=SECRET, body=b"", length=None):
+    headers = [f"{method} {path} HTTP/1.1", "Host: bot"]
+    if secret is not None:
+        headers.append(f"X-Telegram-Bot-Api-Secret-Token: {secret}")
+    headers.append(f"Content-Length: {len(body) if length is None else length}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def read_status(reader):
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return status
+
+
+def run(requests):
+    """Manda las peticiones por UNA conexión y devuelve (códigos, updates encolados)"""
+    async def main():
+        application = SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+        server = WebhookServer(application, "127.0.0.1", 0, "telegram", SECRET)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            statuses = []
+            for raw in requests:
+                writer.write(raw)
+                await writer.drain()
+                statuses.append(await read_status(reader))
+            writer.close()
+        finally:
+            await server.stop()
+        queued = [application.update_queue.get_nowait() for _ in range(application.update_queue.qsize())]
+        return statuses, queued, server.get_stats()
+
+    return asyncio.run(main())
+
+
+def test_valid_update_is_queued():
+    statuses, queued, stats = run([request(body=json.dumps(UPDATE).encode())])
+    assert statuses == [200]
+    assert isinstance(queued[0], Update) and queued[0].message.text == "hola"
+    assert stats["received"] == 1 and stats["rejected"] == 0
+
+
+@pytest.mark.parametrize("secret", [None, "", "otro-token", SECRET + "x"])
+def test_wrong_secret_is_rejected(secret):
+    statuses, queued, stats = run([request(secret=secret, body=json.dumps(UPDATE).encode())])
+    assert statuses == [403]
+    assert queued == [] and stats["rejected"] == 1
+
+
+def test_routing_and_bad_bodies_share_one_keep_alive_connection():
+    statuses, queued, stats = run([
+        request(path="/otro"),
+        request(method="GET"),
+        request(body=b"{no es json"),
+        request(path="/telegram?x=1", body=json.dumps(UPDATE).encode()),
+    ])
+    assert statuses == [404, 405, 400, 200]
+    assert len(queued) == 1
+    assert (stats["received"], stats["rejected"]) == (1, 3)
+
+
+def test_oversized_body_closes_the_connection():
+    statuses, queued, _ = run([request(length=MAX_BODY_BYTES + 1)])
+    assert statuses == [413] and queued == []
+
+
+def test_secret_token_is_required():
+    with pytest.raises(ValueError):
+        WebhookServer(SimpleNamespace(), "127.0.0.1", 0, "/telegram", "")